@@ -1,3 +1,4 @@
+import math
 from flask import Flask, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
@@ -17,16 +18,59 @@ def create_app(config_name='development'):
     app = Flask(__name__)
     app.config.from_object(config_by_name[config_name])
     
+    # orjson-backed JSON when available
+    from app.utils.json_provider import create_json_provider
+    app.json = create_json_provider(app)
+    
     # Initialize extensions with app
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
     CORS(app)
     
+    # gzip/brotli compression of responses
+    from app.utils.compression import init_compression
+    init_compression(app)
+    
     # Health check endpoint for container monitoring
     @app.route('/api/health', methods=['GET'])
     def health_check():
         return jsonify({"status": "healthy"}), 200
+
+    # Circuit breaker state and call latency of external services in this process,
+    # with storage call counts per operation and presigned URL cache hits
+    @app.route('/api/health/dependencies', methods=['GET'])
+    def dependency_health():
+        from app.services.email_service import get_smtp_breaker
+        from app.services.storage_service import get_storage_breaker, get_storage_stats, get_url_cache_stats
+        dependencies = {
+            'storage': dict(
+                get_storage_breaker().public_stats(),
+                operations=get_storage_stats(),
+                url_cache=get_url_cache_stats()
+            ),
+            'smtp': get_smtp_breaker(app.config).public_stats()
+        }
+        degraded = any(stats['state'] != 'closed' for stats in dependencies.values())
+        return jsonify({
+            "status": "degraded" if degraded else "healthy",
+            "dependencies": dependencies
+        }), 200
+
+    # A dependency behind an open circuit breaker: fail fast and tell clients when to retry
+    from app.utils.circuit_breaker import CircuitOpenError
+
+    @app.errorhandler(CircuitOpenError)
+    def dependency_unavailable(error):
+        db.session.rollback()
+        return jsonify({'error': str(error)}), 503, {'Retry-After': str(math.ceil(error.retry_after))}
+    
+    # ?fields= or ?embed= asked for something the model does not have
+    from app.utils.serialization import FieldsetError
+
+    @app.errorhandler(FieldsetError)
+    def handle_fieldset_error(error):
+        return jsonify({'error': str(error)}), 400
     
     # Register blueprints
     from app.routes.auth import auth_bp
@@ -36,6 +80,9 @@ def create_app(config_name='development'):
     from app.routes.meetings import meetings_bp
     from app.routes.leaderboard import leaderboard_bp
     from app.routes.files import files_bp
+    from app.routes.notifications import notifications_bp
+    from app.routes.ideas import ideas_bp
+    from app.routes.search import search_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(teams_bp, url_prefix='/api/teams')
@@ -44,10 +91,39 @@ def create_app(config_name='development'):
     app.register_blueprint(meetings_bp, url_prefix='/api/meetings')
     app.register_blueprint(leaderboard_bp, url_prefix='/api/leaderboard')
     app.register_blueprint(files_bp, url_prefix='/api/files')
+    app.register_blueprint(notifications_bp, url_prefix='/api/notifications')
+    app.register_blueprint(ideas_bp, url_prefix='/api/ideas')
+    app.register_blueprint(search_bp, url_prefix='/api/search')
     
     # Shell context for flask cli
     @app.shell_context_processor
     def ctx():
         return {'app': app, 'db': db}
-    
+
+    # Shared storage client and bucket, set up once per process
+    from app.services.storage_service import init_storage
+    init_storage(app)
+
+    # Custom flask cli commands
+    from app.cli import register_commands
+    register_commands(app)
+
+    # Deliver queued emails from this process when enabled
+    # (otherwise run `flask outbox-worker` separately)
+    if app.config['EMAIL_WORKER_AUTOSTART']:
+        from app.services.outbox_service import start_outbox_workers
+        start_outbox_workers(app)
+
+    # Render thumbnails and previews of uploads in the background
+    # (otherwise run `flask preview-worker` separately)
+    if app.config['PREVIEW_WORKER_AUTOSTART']:
+        from app.services.preview_service import start_preview_worker
+        start_preview_worker(app)
+
+    # Remove stored objects no file references any more
+    # (otherwise run `flask storage-gc` periodically)
+    if app.config['STORAGE_GC_AUTOSTART']:
+        from app.services.file_service import start_storage_gc
+        start_storage_gc(app)
+
     return app 
\ No newline at end of file
@@ -0,0 +1,223 @@
+import time
+import click
+from flask import current_app
+
+def register_commands(app):
+    """Register the custom flask CLI commands"""
+
+    @app.cli.command('outbox-worker')
+    @click.option('--threads', type=int, default=None, help='Number of delivery threads')
+    def outbox_worker(threads):
+        """Run the email outbox delivery workers in the foreground"""
+        from app.services.outbox_service import OutboxWorkerPool
+
+        pool = OutboxWorkerPool(current_app._get_current_object(), threads)
+        pool.start()
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            click.echo('Stopping outbox workers...')
+        finally:
+            pool.stop()
+
+    @app.cli.command('outbox-status')
+    def outbox_status():
+        """Show the number of outbox emails per status"""
+        from app.services.outbox_service import get_outbox_stats
+
+        stats = get_outbox_stats()
+        if not stats:
+            click.echo('Outbox is empty')
+        for status, count in sorted(stats.items()):
+            click.echo(f'{status}: {count}')
+
+    @app.cli.command('digest-flush')
+    def digest_flush():
+        """Queue digests for recipients whose buffering window has elapsed"""
+        from app.services.digest_service import flush_due_digests
+
+        count = flush_due_digests()
+        click.echo(f'Queued {count} digest emails')
+
+    @app.cli.command('broadcast')
+    @click.argument('audience')
+    @click.option('--subject', required=True, help='Email subject')
+    @click.option('--message', required=True, help='Message body')
+    @click.option('--template', default='broadcast.html', help='Email template name')
+    @click.option('--personalize', is_flag=True, help="Add each recipient's name to the template")
+    @click.option('--concurrency', type=int, default=None, help='Number of SMTP connections')
+    @click.option('--rate', type=float, default=None, help='Maximum messages per second (0 = unlimited)')
+    def broadcast(audience, subject, message, template, personalize, concurrency, rate):
+        """Email everyone in AUDIENCE (e.g. all_students, unteamed_students)"""
+        from app.services.broadcast_service import create_broadcast, run_broadcast, validate_broadcast
+
+        validation_result = validate_broadcast({'audience': audience, 'subject': subject, 'message': message})
+        if not validation_result['valid']:
+            raise click.UsageError(validation_result['message'])
+
+        campaign = create_broadcast(audience, subject, message, template=template, personalize=personalize)
+        click.echo(f'Broadcast {campaign.id}: {campaign.total_recipients} recipients')
+
+        def report(progress):
+            click.echo(f'  {progress.sent_count} sent, {progress.failed_count} failed '
+                       f'({progress.progress:.0%})')
+
+        campaign = run_broadcast(campaign, concurrency=concurrency, rate_limit=rate, progress=report)
+        click.echo(f'Broadcast {campaign.id} {campaign.status}')
+
+    @app.cli.command('broadcast-status')
+    @click.argument('broadcast_id', type=int)
+    def broadcast_status(broadcast_id):
+        """Show the progress of a broadcast"""
+        from app.models.broadcast import Broadcast
+
+        campaign = Broadcast.get_by_id(broadcast_id)
+        if not campaign:
+            raise click.UsageError('Broadcast not found')
+        for key, value in campaign.to_dict().items():
+            click.echo(f'{key}: {value}')
+
+    @app.cli.command('outbox-requeue')
+    @click.argument('ids', nargs=-1, type=int)
+    def outbox_requeue(ids):
+        """Move dead-lettered emails (all, or the given ids) back to pending"""
+        from app.services.outbox_service import requeue_dead_emails
+
+        count = requeue_dead_emails(list(ids))
+        click.echo(f'Requeued {count} emails')
+
+    @app.cli.command('storage-gc')
+    @click.option('--limit', type=int, default=None, help='Maximum number of objects to remove')
+    def storage_gc(limit):
+        """Remove unreferenced objects and abandoned direct and resumable uploads"""
+        from app.services.file_service import collect_garbage, expire_direct_uploads, expire_resumable_uploads
+
+        count = collect_garbage(limit)
+        click.echo(f'Removed {count} unreferenced objects')
+        count = expire_direct_uploads(limit)
+        click.echo(f'Expired {count} abandoned direct uploads')
+        count = expire_resumable_uploads(limit)
+        click.echo(f'Expired {count} idle resumable uploads')
+
+    @app.cli.command('storage-reconcile')
+    def storage_reconcile():
+        """Recompute team storage usage counters from the files and fix drift"""
+        from app.services.quota_service import reconcile_storage_usage
+
+        corrected = reconcile_storage_usage()
+        for row in corrected:
+            click.echo(f"team {row['team_id']}: counter was {row['used_bytes']} bytes, {row['file_count']} files")
+        click.echo(f'Corrected {len(corrected)} teams')
+
+    @app.cli.command('storage-quota')
+    @click.argument('team_id', type=int)
+    @click.argument('quota_mb', type=int, required=False)
+    def storage_quota(team_id, quota_mb):
+        """Set TEAM_ID's storage quota in MB (0 for no limit; omit to restore the default)"""
+        from app.services.quota_service import set_team_quota
+
+        set_team_quota(team_id, quota_mb * 1024 * 1024 if quota_mb is not None else None)
+        click.echo(f'Quota of team {team_id} set to {f"{quota_mb}MB" if quota_mb is not None else "the default"}')
+
+    @app.cli.command('storage-usage')
+    @click.option('--team', 'team_id', type=int, default=None, help='Only show this team')
+    def storage_usage(team_id):
+        """Show storage used and quota per team"""
+        from app.services.quota_service import get_storage_usage
+
+        for row in get_storage_usage(team_id):
+            quota = f"{row['quota_bytes']} bytes quota" if row['quota_bytes'] is not None else 'no quota'
+            click.echo(f"team {row['team_id']} ({row['team_name']}): {row['file_count']} files, "
+                       f"{row['used_bytes']} bytes used, {quota}")
+
+    @app.cli.command('storage-savings')
+    @click.option('--team', 'team_id', type=int, default=None, help='Only show this team')
+    def storage_savings(team_id):
+        """Show bytes uploaded and saved by deduplication per team"""
+        from app.services.file_service import get_storage_savings
+
+        for row in get_storage_savings(team_id):
+            click.echo(f"team {row['team_id']}: {row['file_count']} files, {row['uploaded_bytes']} bytes uploaded, "
+                       f"{row['saved_bytes']} saved")
+
+    @app.cli.command('export-files')
+    @click.argument('output', type=click.File('wb'))
+    @click.option('--team', 'team_id', type=int, default=None, help='Only export this team')
+    def export_files(output, team_id):
+        """Write every team's files (or one team's) to a ZIP archive at OUTPUT"""
+        from app.models.team import Team
+        from app.services.archive_service import (
+            get_all_teams_archive_entries, get_team_archive_entries, stream_archive
+        )
+
+        if team_id is None:
+            entries = get_all_teams_archive_entries()
+        else:
+            team = Team.get_by_id(team_id)
+            if not team:
+                raise click.UsageError('Team not found')
+            entries = get_team_archive_entries(team)
+
+        for chunk in stream_archive(entries):
+            output.write(chunk)
+        click.echo(f'Exported {len(entries)} files')
+
+    @app.cli.command('preview-worker')
+    @click.option('--processes', type=int, default=None, help='Number of rendering processes')
+    def preview_worker(processes):
+        """Render thumbnails and previews of uploaded files in the foreground"""
+        from app.services.preview_service import PreviewWorker
+
+        worker = PreviewWorker(current_app._get_current_object(), processes)
+        worker.start()
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            click.echo('Stopping preview worker...')
+        finally:
+            worker.stop()
+
+    @app.cli.command('preview-requeue')
+    @click.option('--failed-only', is_flag=True, help='Only files whose previews failed')
+    def preview_requeue(failed_only):
+        """Queue previewable files for (re)generation, e.g. files uploaded before previews existed"""
+        from app.services.preview_service import requeue_previews
+
+        count = requeue_previews(failed_only)
+        click.echo(f'Queued {count} files for previews')
+
+    @app.cli.command('search-index')
+    @click.option('--rebuild', is_flag=True, help='Refill the index from the ideas (SQLite)')
+    def search_index(rebuild):
+        """Create the idea full-text search index (a deploy step, run after migrations)"""
+        from app.services.search_service import create_search_index
+
+        create_search_index(rebuild=rebuild)
+        click.echo('Idea search index is ready')
+
+    @app.cli.command('idea-signatures')
+    @click.option('--rebuild', is_flag=True, help='Recompute every signature, not only missing ones')
+    def idea_signatures(rebuild):
+        """Index ideas for near-duplicate detection (e.g. ideas created before it existed)"""
+        from app.services.similarity_service import index_missing_ideas
+
+        count = index_missing_ideas(rebuild=rebuild)
+        click.echo(f'Indexed {count} ideas')
+
+    @app.cli.command('idea-duplicates')
+    @click.option('--threshold', type=click.FloatRange(0, 1, min_open=True), default=None,
+                  help='Estimated similarity from which ideas count as duplicates (default IDEA_DUPLICATE_THRESHOLD)')
+    def idea_duplicates(threshold):
+        """Show groups of near-duplicate ideas across the cohort, largest first"""
+        from app.services.similarity_service import duplicate_clusters
+
+        report = duplicate_clusters(threshold)
+        for cluster in report['clusters']:
+            click.echo(f"{cluster['size']} ideas from {cluster['team_count']} teams "
+                       f"(similarity up to {cluster['max_similarity']}):")
+            for idea in cluster['ideas']:
+                click.echo(f"  idea {idea['id']} '{idea['title']}' by team {idea['team_id']} ({idea['team_name']})")
+        click.echo(f"{len(report['clusters'])} groups among {report['indexed_ideas']} indexed ideas "
+                   f"(threshold {report['threshold']})")
@@ -18,6 +18,80 @@ class Config:
     MINIO_ACCESS_KEY = os.getenv('MINIO_ACCESS_KEY', 'minioadmin')
     MINIO_SECRET_KEY = os.getenv('MINIO_SECRET_KEY', 'minioadmin')
     MINIO_BUCKET_NAME = os.getenv('MINIO_BUCKET_NAME', 'wisepair')
+    MINIO_SECURE = os.getenv('MINIO_SECURE', 'false').lower() == 'true'
+    MINIO_REGION = os.getenv('MINIO_REGION', 'us-east-1')
+
+    # Storage client (one per process)
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'minio')  # 'minio' (MinIO or S3), 'local' or 'memory' (in-process stand-in)
+    LOCAL_STORAGE_ROOT = os.getenv('LOCAL_STORAGE_ROOT', 'storage')  # Directory holding buckets with the 'local' backend
+    LOCAL_STORAGE_URL_BASE = os.getenv('LOCAL_STORAGE_URL_BASE', '')  # Public origin of the app for download URLs ('' for relative)
+    LOCAL_STORAGE_ACCEL_REDIRECT = os.getenv('LOCAL_STORAGE_ACCEL_REDIRECT', '')  # nginx internal location mapped to the root ('' to serve from the app)
+    STORAGE_POOL_SIZE = int(os.getenv('STORAGE_POOL_SIZE', 16))  # Keep-alive connections to MinIO
+    STORAGE_CONNECT_TIMEOUT = 5  # Seconds
+    STORAGE_READ_TIMEOUT = 60  # Seconds
+    STORAGE_RETRIES = int(os.getenv('STORAGE_RETRIES', 3))  # Retries of idempotent requests on connection errors and 5xx
+    STORAGE_RETRY_MAX_SECONDS = 2  # Cap on the jittered backoff between retries
+    STORAGE_SLOW_SECONDS = 2  # Log storage operations slower than this
+
+    # Presigned download URLs (generated on read, never stored)
+    PRESIGNED_URL_EXPIRY_SECONDS = int(os.getenv('PRESIGNED_URL_EXPIRY_SECONDS', 24 * 3600))  # At most 7 days
+    PRESIGNED_URL_REFRESH_SECONDS = 3600  # Re-sign this often, so URLs keep expiry - refresh seconds of validity
+    PRESIGNED_URL_CACHE_SIZE = 10000
+
+    # Uploads (streamed to MinIO as multipart uploads)
+    MAX_UPLOAD_SIZE = int(os.getenv('MAX_UPLOAD_SIZE_MB', 10)) * 1024 * 1024  # Bytes
+    UPLOAD_PART_SIZE = int(os.getenv('UPLOAD_PART_SIZE_MB', 8)) * 1024 * 1024  # At least 5MB (S3 minimum)
+    UPLOAD_PARALLEL_PARTS = int(os.getenv('UPLOAD_PARALLEL_PARTS', 4))  # Parts in flight per upload
+    TEAM_STORAGE_QUOTA = int(os.getenv('TEAM_STORAGE_QUOTA_MB', 500)) * 1024 * 1024  # Bytes per team (0 for no limit)
+    BATCH_UPLOAD_MAX_FILES = int(os.getenv('BATCH_UPLOAD_MAX_FILES', 20))  # Files per multi-file upload request
+    BATCH_UPLOAD_CONCURRENCY = int(os.getenv('BATCH_UPLOAD_CONCURRENCY', 4))  # Files written to storage at once per request
+    # Thumbnails and WebP previews of images and PDFs, rendered after upload
+    PREVIEW_WORKER_AUTOSTART = os.getenv('PREVIEW_WORKER_AUTOSTART', 'false').lower() == 'true'
+    PREVIEW_PROCESSES = int(os.getenv('PREVIEW_PROCESSES', 2))  # Rendering processes
+    PREVIEW_BATCH_SIZE = 4  # Files claimed (and held in memory) per batch
+    PREVIEW_POLL_INTERVAL = 2  # Seconds to sleep when nothing is waiting
+    PREVIEW_LEASE_SECONDS = 300  # Reclaim files from workers that died mid-render
+    PREVIEW_MAX_SOURCE_SIZE = 20 * 1024 * 1024  # Larger originals are not previewed
+    PREVIEW_THUMBNAIL_SIZE = 256  # Longest side in pixels
+    PREVIEW_IMAGE_SIZE = 1280
+    PREVIEW_QUALITY = 80  # WebP quality
+    ARCHIVE_PREFETCH = int(os.getenv('ARCHIVE_PREFETCH', 3))  # Objects downloaded ahead while zipping
+    ARCHIVE_PREFETCH_CHUNKS = 16  # 64KB chunks buffered per prefetched object
+    ARCHIVE_COMPRESS = os.getenv('ARCHIVE_COMPRESS', 'false').lower() == 'true'  # Deflate (most uploads are already compressed)
+    DIRECT_UPLOAD_EXPIRY_SECONDS = int(os.getenv('DIRECT_UPLOAD_EXPIRY_SECONDS', 3600))  # Presigned upload validity
+    RESUMABLE_UPLOAD_EXPIRY_SECONDS = int(os.getenv('RESUMABLE_UPLOAD_EXPIRY_SECONDS', 24 * 3600))  # Idle sessions expire after this
+    RESUMABLE_CHUNK_LEASE_SECONDS = 300  # A worker receiving a chunk holds the session this long
+
+    # JSON encoding of responses: 'auto' (orjson if installed), 'orjson' or 'stdlib'
+    JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'auto')
+
+    # Response compression (gzip, and brotli when installed)
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))  # Smaller bodies are sent as they are
+    COMPRESSION_LEVEL = int(os.getenv('COMPRESSION_LEVEL', 6))  # gzip level, 1 (fastest) to 9 (smallest)
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', 5))  # brotli quality, 0 to 11
+    COMPRESSION_CACHE_SIZE = int(os.getenv('COMPRESSION_CACHE_SIZE', 128))  # Compressed public responses kept
+
+    # Ideas
+    IDEA_DUPLICATE_THRESHOLD = float(os.getenv('IDEA_DUPLICATE_THRESHOLD', 0.5))  # Estimated Jaccard similarity of near-duplicates
+    RECOMMENDATION_REFRESH_SECONDS = float(os.getenv('RECOMMENDATION_REFRESH_SECONDS', 30))  # Most often changed profiles are looked for
+    RECOMMENDATION_REBUILD_SECONDS = float(os.getenv('RECOMMENDATION_REBUILD_SECONDS', 3600))  # Full rebuild of the profile matrices
+
+    # Typeahead search
+    TYPEAHEAD_REFRESH_SECONDS = float(os.getenv('TYPEAHEAD_REFRESH_SECONDS', 5))  # Most often changed rows are looked for
+    TYPEAHEAD_REBUILD_SECONDS = float(os.getenv('TYPEAHEAD_REBUILD_SECONDS', 3600))  # Full rebuild, which also drops deleted rows
+
+    # Garbage collection of stored objects no file references any more
+    STORAGE_GC_AUTOSTART = os.getenv('STORAGE_GC_AUTOSTART', 'false').lower() == 'true'
+    STORAGE_GC_INTERVAL = 60  # Seconds between collection runs
+    STORAGE_GC_GRACE_SECONDS = int(os.getenv('STORAGE_GC_GRACE_SECONDS', 3600))  # Keep unreferenced objects this long
+    STORAGE_GC_BATCH_SIZE = 100  # Objects removed per run
+    STORAGE_RECONCILE_INTERVAL = 3600  # Seconds between usage counter reconciliations by the collector
+
+    # Circuit breakers around storage and SMTP: open after this many consecutive
+    # failures, then probe the service in the background every reset interval
+    CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', 5))
+    CIRCUIT_RESET_SECONDS = int(os.getenv('CIRCUIT_RESET_SECONDS', 30))
     
     # SMTP Configuration
     SMTP_HOST = os.getenv('SMTP_HOST', 'smtp.mailtrap.io')
@@ -25,6 +99,33 @@ class Config:
     SMTP_USER = os.getenv('SMTP_USER', '')
     SMTP_PASS = os.getenv('SMTP_PASS', '')
     SMTP_FROM_EMAIL = os.getenv('SMTP_FROM_EMAIL', 'noreply@wisepair.com')
+    SMTP_USE_TLS = os.getenv('SMTP_USE_TLS', 'true').lower() == 'true'
+    SMTP_TIMEOUT = int(os.getenv('SMTP_TIMEOUT', 10))  # Seconds per socket operation
+    SMTP_POOL_SIZE = int(os.getenv('SMTP_POOL_SIZE', 2))  # Long-lived connections per process
+    SMTP_IDLE_CHECK_SECONDS = 30  # NOOP-check pooled connections idle for longer than this
+    SMTP_CONNECT_ATTEMPTS = int(os.getenv('SMTP_CONNECT_ATTEMPTS', 3))  # Connection attempts before giving up
+    SMTP_RETRY_BASE_SECONDS = 0.5  # Jittered backoff between connection attempts starts here
+
+    # Email outbox delivery
+    EMAIL_WORKER_AUTOSTART = os.getenv('EMAIL_WORKER_AUTOSTART', 'false').lower() == 'true'
+    EMAIL_WORKER_THREADS = int(os.getenv('EMAIL_WORKER_THREADS', 2))
+    EMAIL_WORKER_BATCH_SIZE = 20
+    EMAIL_WORKER_POLL_INTERVAL = 2  # Seconds to sleep when the outbox is empty
+    EMAIL_SENDING_LEASE_SECONDS = 300  # Reclaim entries from workers that died mid-send
+    EMAIL_MAX_ATTEMPTS = int(os.getenv('EMAIL_MAX_ATTEMPTS', 6))
+    EMAIL_RETRY_BASE_SECONDS = 30
+    EMAIL_RETRY_MAX_SECONDS = 3600
+
+    # Notification digests
+    EMAIL_DIGEST_WINDOW_SECONDS = int(os.getenv('EMAIL_DIGEST_WINDOW_SECONDS', 600))  # 0 disables digests
+    EMAIL_DIGEST_URGENT_KINDS = set(os.getenv('EMAIL_DIGEST_URGENT_KINDS', 'meeting_notification,team_invitation').split(','))
+    EMAIL_DIGEST_FLUSH_INTERVAL = 30  # Seconds between checks for due digests
+    EMAIL_DIGEST_BATCH_SIZE = 200  # Recipients per flush
+
+    # Bulk broadcasts
+    BROADCAST_CONCURRENCY = int(os.getenv('BROADCAST_CONCURRENCY', 4))  # Sending threads/connections
+    BROADCAST_RATE_LIMIT = float(os.getenv('BROADCAST_RATE_LIMIT', 10))  # Messages per second, 0 = unlimited
+    BROADCAST_PROGRESS_INTERVAL = 2  # Seconds between progress updates
 
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -39,6 +140,7 @@ class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///test_wisepair.db'
+    STORAGE_BACKEND = 'memory'
 
 # Configuration dictionary to easily select environment
 config_by_name = {
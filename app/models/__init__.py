@@ -6,4 +6,13 @@ from app.models.requests import MentorRequest, SeniorMentorRequest
 from app.models.leaderboard import Leaderboard
 from app.models.meeting import Meeting
 from app.models.idea import Idea
-from app.models.file import File 
\ No newline at end of file
+from app.models.idea_signature import IdeaSignature, IdeaLshBand
+from app.models.file import File
+from app.models.stored_object import StoredObject
+from app.models.direct_upload import DirectUpload
+from app.models.resumable_upload import ResumableUpload
+from app.models.team_storage_usage import TeamStorageUsage
+from app.models.email_outbox import EmailOutbox
+from app.models.broadcast import Broadcast
+from app.models.email_digest import EmailDigestEntry
+from app.models.notification import Notification, InboxItem, NotificationCounter
\ No newline at end of file
@@ -0,0 +1,62 @@
+import json
+from app import db
+from app.models.base import BaseModel
+
+class BroadcastStatus:
+    """Constants for broadcast status"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+
+class Broadcast(BaseModel):
+    """Bulk email campaign sent to a query-selected audience"""
+    __tablename__ = 'broadcasts'
+
+    audience = db.Column(db.String(50), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    template = db.Column(db.String(100), nullable=False)
+    context = db.Column(db.Text, nullable=False, default='{}')  # JSON encoded template variables
+    personalize = db.Column(db.Boolean, default=False)  # Add the recipient's name to the variables
+
+    status = db.Column(db.String(20), default=BroadcastStatus.QUEUED, nullable=False)
+    total_recipients = db.Column(db.Integer, default=0)
+    sent_count = db.Column(db.Integer, default=0)
+    failed_count = db.Column(db.Integer, default=0)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+
+    @property
+    def template_context(self):
+        """Decoded template variables"""
+        return json.loads(self.context or '{}')
+
+    @template_context.setter
+    def template_context(self, value):
+        self.context = json.dumps(value or {}, default=str)
+
+    @property
+    def progress(self):
+        """Fraction of recipients processed so far"""
+        if not self.total_recipients:
+            return 1.0 if self.status == BroadcastStatus.COMPLETED else 0.0
+        return ((self.sent_count or 0) + (self.failed_count or 0)) / self.total_recipients
+
+    def to_dict(self):
+        """Convert model to dictionary"""
+        return {
+            'id': self.id,
+            'audience': self.audience,
+            'subject': self.subject,
+            'template': self.template,
+            'status': self.status,
+            'total_recipients': self.total_recipients,
+            'sent_count': self.sent_count,
+            'failed_count': self.failed_count,
+            'progress': round(self.progress, 4),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat()
+        }
@@ -0,0 +1,44 @@
+from app import db
+from app.models.base import BaseModel
+
+class DirectUploadStatus:
+    """Constants for direct upload status"""
+    PENDING = 'pending'
+    COMPLETED = 'completed'
+    EXPIRED = 'expired'
+
+class DirectUpload(BaseModel):
+    """
+    An upload the client sends straight to storage with a presigned request.
+
+    Created when the presigned request is issued; the File row is only
+    created once the client reports completion and the object checks out.
+    """
+    __tablename__ = 'direct_uploads'
+
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
+    team_id = db.Column(db.Integer, db.ForeignKey('teams.id'), nullable=True)
+    idea_id = db.Column(db.Integer, db.ForeignKey('ideas.id'), nullable=True)
+    storage_path = db.Column(db.String(500), nullable=False)  # bucket/key the client uploads to
+    original_filename = db.Column(db.String(255), nullable=False)
+    content_type = db.Column(db.String(255), nullable=False)
+    declared_size = db.Column(db.BigInteger, nullable=True)
+    method = db.Column(db.String(10), nullable=False)  # 'post' or 'put'
+    status = db.Column(db.String(20), default=DirectUploadStatus.PENDING, nullable=False, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    file_id = db.Column(db.Integer, db.ForeignKey('files.id'), nullable=True)
+
+    def to_dict(self):
+        """Convert model to dictionary"""
+        return {
+            'id': self.id,
+            'team_id': self.team_id,
+            'idea_id': self.idea_id,
+            'original_filename': self.original_filename,
+            'content_type': self.content_type,
+            'declared_size': self.declared_size,
+            'method': self.method,
+            'status': self.status,
+            'expires_at': self.expires_at.isoformat(),
+            'file_id': self.file_id
+        }
@@ -0,0 +1,34 @@
+import json
+from app import db
+from app.models.base import BaseModel
+
+class EmailDigestEntry(BaseModel):
+    """Notification buffered for a recipient until their digest is sent"""
+    __tablename__ = 'email_digest_entries'
+
+    recipient = db.Column(db.String(120), nullable=False, index=True)
+    kind = db.Column(db.String(50), nullable=False)  # Notification type, e.g. 'mentor_request'
+    subject = db.Column(db.String(255), nullable=False)
+    template = db.Column(db.String(100), nullable=False)
+    context = db.Column(db.Text, nullable=False, default='{}')  # JSON encoded template variables
+    digested_at = db.Column(db.DateTime, nullable=True, index=True)  # Set once folded into a sent email
+
+    @property
+    def template_context(self):
+        """Decoded template variables"""
+        return json.loads(self.context or '{}')
+
+    @template_context.setter
+    def template_context(self, value):
+        self.context = json.dumps(value or {}, default=str)
+
+    def to_dict(self):
+        """Convert model to dictionary"""
+        return {
+            'id': self.id,
+            'recipient': self.recipient,
+            'kind': self.kind,
+            'subject': self.subject,
+            'digested_at': self.digested_at.isoformat() if self.digested_at else None,
+            'created_at': self.created_at.isoformat()
+        }
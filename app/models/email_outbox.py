@@ -0,0 +1,52 @@
+import json
+from datetime import datetime
+from app import db
+from app.models.base import BaseModel
+
+class OutboxStatus:
+    """Constants for outbox message status"""
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    DEAD = 'dead'
+
+class EmailOutbox(BaseModel):
+    """Queued email, written in the same transaction as the change that triggered it"""
+    __tablename__ = 'email_outbox'
+
+    recipient = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    template = db.Column(db.String(100), nullable=False)
+    context = db.Column(db.Text, nullable=False, default='{}')  # JSON encoded template variables
+
+    status = db.Column(db.String(20), default=OutboxStatus.PENDING, nullable=False, index=True)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    locked_until = db.Column(db.DateTime, nullable=True)  # Lease held by the worker sending it
+    last_error = db.Column(db.Text, nullable=True)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    @property
+    def template_context(self):
+        """Decoded template variables"""
+        return json.loads(self.context or '{}')
+
+    @template_context.setter
+    def template_context(self, value):
+        """Encode template variables, stringifying values JSON can't handle (e.g. dates)"""
+        self.context = json.dumps(value or {}, default=str)
+
+    def to_dict(self):
+        """Convert model to dictionary"""
+        return {
+            'id': self.id,
+            'recipient': self.recipient,
+            'subject': self.subject,
+            'template': self.template,
+            'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'last_error': self.last_error,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None,
+            'created_at': self.created_at.isoformat()
+        }
@@ -1,6 +1,14 @@
+import json
 from app import db
 from app.models.base import BaseModel
 
+class PreviewStatus:
+    """Constants for the state of a file's thumbnail and preview"""
+    PENDING = 'pending'
+    PROCESSING = 'processing'
+    READY = 'ready'
+    FAILED = 'failed'
+
 class File(BaseModel):
     """Model for file uploads"""
     __tablename__ = 'files'
@@ -8,32 +16,77 @@ class File(BaseModel):
     filename = db.Column(db.String(255), nullable=False)
     original_filename = db.Column(db.String(255), nullable=False)
     file_type = db.Column(db.String(50), nullable=False)
-    file_size = db.Column(db.Integer, nullable=False)  # Size in bytes
+    file_size = db.Column(db.BigInteger, nullable=False)  # Size in bytes
+    checksum = db.Column(db.String(64), nullable=True)  # SHA-256 hex digest, computed while uploading
+    deduplicated = db.Column(db.Boolean, default=False, nullable=False)  # Content was already stored; no write made
     storage_path = db.Column(db.String(500), nullable=False)  # Path in MinIO/S3
-    public_url = db.Column(db.String(500), nullable=True)  # Optional public URL
     
     # Foreign Keys - can be associated with either a team or an idea
     team_id = db.Column(db.Integer, db.ForeignKey('teams.id'), nullable=True)
     idea_id = db.Column(db.Integer, db.ForeignKey('ideas.id'), nullable=True)
+    object_id = db.Column(db.Integer, db.ForeignKey('stored_objects.id'), nullable=True, index=True)
+    
+    # Derivatives (thumbnail, WebP preview) generated after upload; NULL status = not previewable
+    preview_status = db.Column(db.String(20), nullable=True, index=True)
+    preview_data = db.Column(db.Text, nullable=True)  # JSON: derivative name -> storage path, size, dimensions
+    preview_locked_until = db.Column(db.DateTime, nullable=True)  # Lease held by the worker rendering it
+    preview_error = db.Column(db.Text, nullable=True)
     
     # Relationships
     team = db.relationship('Team', back_populates='files')
     idea = db.relationship('Idea', back_populates='files')
+    stored_object = db.relationship('StoredObject', back_populates='files')
+    
+    @property
+    def previews(self):
+        """Decoded derivative metadata, by derivative name"""
+        return json.loads(self.preview_data or '{}')
     
-    def generate_public_url(self, expiry_days=7):
-        """Generate a public URL for the file (to be implemented in service layer)"""
-        # This is just a placeholder - implementation will be in file service
-        pass
+    @previews.setter
+    def previews(self, value):
+        self.preview_data = json.dumps(value) if value else None
     
-    def to_dict(self):
-        """Convert model to dictionary"""
+    def generate_public_url(self):
+        """Presigned download URL, signed on demand and cached in process (never stored)"""
+        from app.services.storage_service import presigned_url
+        return presigned_url(self.storage_path)
+    
+    def preview_paths(self):
+        """Storage paths of the derivatives that are ready"""
+        if self.preview_status != PreviewStatus.READY:
+            return {}
+        return {name: meta['path'] for name, meta in self.previews.items()}
+    
+    def to_dict(self, urls=None):
+        """
+        Convert model to dictionary.
+
+        List endpoints pass ``urls`` (storage path -> URL) signed in one
+        batch; otherwise URLs are generated here.
+        """
+        if urls is None:
+            from app.services.storage_service import presigned_urls
+            urls = presigned_urls([self.storage_path, *self.preview_paths().values()])
+        previews = {
+            name: {
+                'url': urls[meta['path']],
+                'width': meta['width'],
+                'height': meta['height'],
+                'content_type': meta['content_type']
+            }
+            for name, meta in self.previews.items()
+        } if self.preview_status == PreviewStatus.READY else {}
         return {
             'id': self.id,
             'filename': self.filename,
             'original_filename': self.original_filename,
             'file_type': self.file_type,
             'file_size': self.file_size,
-            'public_url': self.public_url,
+            'checksum': self.checksum,
+            'deduplicated': self.deduplicated,
+            'public_url': urls[self.storage_path],
+            'preview_status': self.preview_status,
+            'previews': previews,
             'team_id': self.team_id,
             'idea_id': self.idea_id,
             'created_at': self.created_at.isoformat()
@@ -17,16 +17,7 @@ class Idea(BaseModel):
     team = db.relationship('Team', back_populates='ideas')
     files = db.relationship('File', back_populates='idea', cascade='all, delete-orphan')
     
-    def to_dict(self):
-        """Convert model to dictionary"""
-        return {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'problem_statement': self.problem_statement,
-            'solution_approach': self.solution_approach,
-            'team_id': self.team_id,
-            'files': [file.to_dict() for file in self.files],
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
-        } 
\ No newline at end of file
+    def to_dict(self, include_files=True):
+        """Convert model to dictionary (list views leave out the files)"""
+        from app.schemas.serializers import idea_serializer
+        return idea_serializer.dump(self, idea_serializer.default_selection(None if include_files else []))
\ No newline at end of file
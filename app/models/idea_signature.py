@@ -0,0 +1,29 @@
+from app import db
+
+class IdeaSignature(db.Model):
+    """
+    MinHash signature of an idea's text, maintained whenever the idea is
+    created or edited.
+
+    Two signatures agree in about the same fraction of positions as the
+    Jaccard similarity of the ideas' word shingles.
+    """
+    __tablename__ = 'idea_signatures'
+
+    idea_id = db.Column(db.Integer, db.ForeignKey('ideas.id', ondelete='CASCADE'), primary_key=True)
+    signature = db.Column(db.LargeBinary, nullable=False)  # similarity_service.NUM_PERMUTATIONS little-endian uint32
+
+class IdeaLshBand(db.Model):
+    """
+    Locality-sensitive hashing index over idea signatures: one row per band
+    of an idea's signature, keyed by the hash of that band. Ideas that share
+    a (band, bucket) pair are candidate near-duplicates.
+    """
+    __tablename__ = 'idea_lsh_bands'
+    __table_args__ = (
+        db.Index('ix_idea_lsh_bands_bucket', 'band', 'bucket'),
+    )
+
+    idea_id = db.Column(db.Integer, db.ForeignKey('ideas.id', ondelete='CASCADE'), primary_key=True)
+    band = db.Column(db.SmallInteger, primary_key=True)
+    bucket = db.Column(db.BigInteger, nullable=False)  # Signed 64-bit hash of the band's values
@@ -20,24 +20,16 @@ class Leaderboard(BaseModel):
         return self.total_score
     
     def to_dict(self):
-        """Convert model to dictionary"""
-        return {
-            'id': self.id,
-            'team_id': self.team_id,
-            'team_name': self.team.name if self.team else None,
-            'meetings_done': self.meetings_done,
-            'tasks_done': self.tasks_done,
-            'mentor_feedback_count': self.mentor_feedback_count,
-            'total_score': self.total_score,
-            'updated_at': self.updated_at.isoformat()
-        }
+        """Convert model to dictionary (the default fields of its serializer)"""
+        from app.schemas.serializers import leaderboard_serializer
+        return leaderboard_serializer.dump(self)
         
     @classmethod
-    def get_top_teams(cls, limit=5):
+    def get_top_teams(cls, limit=5, options=()):
         """Get the top performing teams"""
-        return cls.query.order_by(cls.total_score.desc()).limit(limit).all()
+        return cls.query.options(*options).order_by(cls.total_score.desc()).limit(limit).all()
     
     @classmethod
-    def get_bottom_teams(cls, limit=5):
+    def get_bottom_teams(cls, limit=5, options=()):
         """Get the bottom performing teams"""
-        return cls.query.order_by(cls.total_score.asc()).limit(limit).all() 
\ No newline at end of file
+        return cls.query.options(*options).order_by(cls.total_score.asc()).limit(limit).all() 
\ No newline at end of file
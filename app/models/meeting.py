@@ -44,17 +44,6 @@ class Meeting(BaseModel):
             db.session.commit()
     
     def to_dict(self):
-        """Convert model to dictionary"""
-        return {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'scheduled_date': self.scheduled_date.isoformat(),
-            'status': self.status,
-            'feedback': self.feedback,
-            'team_id': self.team_id,
-            'professor_id': self.professor_id,
-            'mentor_id': self.mentor_id,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
-        } 
\ No newline at end of file
+        """Convert model to dictionary (the default fields of its serializer)"""
+        from app.schemas.serializers import meeting_serializer
+        return meeting_serializer.dump(self)
\ No newline at end of file
@@ -8,17 +8,13 @@ class Mentor(BaseModel):
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     year = db.Column(db.Integer, nullable=False)  # Year of study
+    expertise = db.Column(db.Text, nullable=True)  # Skills and topics, free text
     
     # Relationships
     mentored_teams = db.relationship('Team', back_populates='senior_mentor')
     senior_mentor_requests = db.relationship('SeniorMentorRequest', back_populates='mentor', cascade='all, delete-orphan')
     
     def to_dict(self):
-        """Convert model to dictionary"""
-        return {
-            'id': self.id,
-            'name': self.name,
-            'email': self.email,
-            'year': self.year,
-            'mentored_teams': [team.id for team in self.mentored_teams]
-        } 
\ No newline at end of file
+        """Convert model to dictionary (the default fields of its serializer)"""
+        from app.schemas.serializers import mentor_serializer
+        return mentor_serializer.dump(self)
\ No newline at end of file
@@ -0,0 +1,72 @@
+import json
+from app import db
+from app.models.base import BaseModel
+
+class RecipientType:
+    """Constants for the kind of user a notification is delivered to"""
+    STUDENT = 'student'
+    PROFESSOR = 'professor'
+    MENTOR = 'mentor'
+
+class Notification(BaseModel):
+    """An event that is fanned out to the inboxes of everyone it concerns"""
+    __tablename__ = 'notifications'
+
+    kind = db.Column(db.String(50), nullable=False)  # e.g. 'mentor_request', 'meeting_scheduled'
+    title = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=True)
+    data = db.Column(db.Text, nullable=False, default='{}')  # JSON encoded ids for the frontend to link to
+    team_id = db.Column(db.Integer, db.ForeignKey('teams.id'), nullable=True)
+
+    @property
+    def payload(self):
+        """Decoded notification data"""
+        return json.loads(self.data or '{}')
+
+    @payload.setter
+    def payload(self, value):
+        self.data = json.dumps(value or {}, default=str)
+
+class InboxItem(BaseModel):
+    """Per-recipient copy of a notification, written when the notification is created"""
+    __tablename__ = 'notification_inbox'
+
+    recipient_type = db.Column(db.String(20), nullable=False)
+    recipient_id = db.Column(db.Integer, nullable=False)
+    notification_id = db.Column(db.Integer, db.ForeignKey('notifications.id'), nullable=False)
+    is_read = db.Column(db.Boolean, default=False, nullable=False)
+    read_at = db.Column(db.DateTime, nullable=True)
+
+    # Relationships
+    notification = db.relationship('Notification')
+
+    __table_args__ = (
+        # Serves cursor pagination of one recipient's inbox (newest first)
+        db.Index('ix_inbox_recipient', 'recipient_type', 'recipient_id', 'id'),
+    )
+
+    def to_dict(self):
+        """Convert model to dictionary"""
+        return {
+            'id': self.id,
+            'kind': self.notification.kind,
+            'title': self.notification.title,
+            'body': self.notification.body,
+            'data': self.notification.payload,
+            'team_id': self.notification.team_id,
+            'is_read': self.is_read,
+            'read_at': self.read_at.isoformat() if self.read_at else None,
+            'created_at': self.created_at.isoformat()
+        }
+
+class NotificationCounter(db.Model):
+    """
+    Unread notification count per recipient, maintained on write.
+
+    Keyed by recipient so reading it is a single primary-key lookup.
+    """
+    __tablename__ = 'notification_counters'
+
+    recipient_type = db.Column(db.String(20), primary_key=True)
+    recipient_id = db.Column(db.Integer, primary_key=True)
+    unread_count = db.Column(db.Integer, default=0, nullable=False)
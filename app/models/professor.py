@@ -8,6 +8,7 @@ class Professor(BaseModel):
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     department = db.Column(db.String(100), nullable=False)
+    expertise = db.Column(db.Text, nullable=True)  # Research areas and topics, free text
     accepted_team_count = db.Column(db.Integer, default=0)
     
     # Relationships
@@ -20,13 +21,6 @@ class Professor(BaseModel):
         return self.accepted_team_count < 3
     
     def to_dict(self):
-        """Convert model to dictionary"""
-        return {
-            'id': self.id,
-            'name': self.name,
-            'email': self.email,
-            'department': self.department,
-            'accepted_team_count': self.accepted_team_count,
-            'can_accept_more_teams': self.can_accept_more_teams,
-            'mentored_teams': [team.id for team in self.mentored_teams]
-        } 
\ No newline at end of file
+        """Convert model to dictionary (the default fields of its serializer)"""
+        from app.schemas.serializers import professor_serializer
+        return professor_serializer.dump(self)
\ No newline at end of file
@@ -0,0 +1,57 @@
+import json
+from app import db
+from app.models.base import BaseModel
+
+class ResumableUploadStatus:
+    """Constants for resumable upload status"""
+    PENDING = 'pending'
+    COMPLETED = 'completed'
+    EXPIRED = 'expired'
+
+class ResumableUpload(BaseModel):
+    """
+    An upload sent through the app in chunks that can resume after a drop.
+
+    All state lives here, so any worker can take the next chunk: the bytes
+    received so far (``offset``) are stored as parts of a storage multipart
+    upload, listed in ``parts``.
+    """
+    __tablename__ = 'resumable_uploads'
+
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
+    team_id = db.Column(db.Integer, db.ForeignKey('teams.id'), nullable=True)
+    idea_id = db.Column(db.Integer, db.ForeignKey('ideas.id'), nullable=True)
+    storage_path = db.Column(db.String(500), nullable=False)  # bucket/key of the assembled object
+    original_filename = db.Column(db.String(255), nullable=False)
+    content_type = db.Column(db.String(255), nullable=False)
+    total_size = db.Column(db.BigInteger, nullable=False)
+    chunk_size = db.Column(db.BigInteger, nullable=False)  # Part size; every part but the last is exactly this
+    offset = db.Column(db.BigInteger, default=0, nullable=False)  # Bytes stored so far
+    multipart_upload_id = db.Column(db.String(255), nullable=False)
+    parts_data = db.Column(db.Text, nullable=True)  # JSON: [[part number, etag], ...]
+    status = db.Column(db.String(20), default=ResumableUploadStatus.PENDING, nullable=False, index=True)
+    lock_token = db.Column(db.String(32), nullable=True)  # Worker currently receiving a chunk
+    locked_until = db.Column(db.DateTime, nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)  # Extended by every chunk
+    file_id = db.Column(db.Integer, db.ForeignKey('files.id'), nullable=True)
+
+    @property
+    def parts(self):
+        """Stored parts as (part number, etag) pairs"""
+        return [tuple(part) for part in json.loads(self.parts_data or '[]')]
+
+    def to_dict(self):
+        """Convert model to dictionary"""
+        return {
+            'id': self.id,
+            'team_id': self.team_id,
+            'idea_id': self.idea_id,
+            'original_filename': self.original_filename,
+            'content_type': self.content_type,
+            'total_size': self.total_size,
+            'chunk_size': self.chunk_size,
+            'offset': self.offset,
+            'status': self.status,
+            'expires_at': self.expires_at.isoformat(),
+            'file_id': self.file_id
+        }
@@ -0,0 +1,21 @@
+from app import db
+from app.models.base import BaseModel
+
+class StoredObject(BaseModel):
+    """
+    A blob in object storage, addressed by the SHA-256 of its content.
+
+    Every File row pointing at it holds one reference. When the count drops
+    to zero the object is left for the storage garbage collector.
+    """
+    __tablename__ = 'stored_objects'
+
+    checksum = db.Column(db.String(64), unique=True, nullable=False)  # SHA-256 hex digest
+    storage_path = db.Column(db.String(500), nullable=False)  # bucket/key; keys are unique per write
+    size = db.Column(db.BigInteger, nullable=False)
+    content_type = db.Column(db.String(255), nullable=True)
+    ref_count = db.Column(db.Integer, default=0, nullable=False)
+    orphaned_at = db.Column(db.DateTime, nullable=True, index=True)  # When ref_count last dropped to zero
+
+    # Relationships
+    files = db.relationship('File', back_populates='stored_object')
@@ -14,7 +14,7 @@ class Student(BaseModel):
     
     # Relationships
     team_id = db.Column(db.Integer, db.ForeignKey('teams.id'))
-    team = db.relationship('Team', back_populates='members')
+    team = db.relationship('Team', foreign_keys=[team_id], back_populates='members')
     
     # Team leadership - backref from Team model
     leading_team = db.relationship('Team', foreign_keys='Team.leader_id', back_populates='leader', uselist=False)
@@ -34,13 +34,6 @@ class Student(BaseModel):
         return check_password_hash(self.password_hash, password)
     
     def to_dict(self):
-        """Convert model to dictionary"""
-        return {
-            'id': self.id,
-            'name': self.name,
-            'roll_no': self.roll_no,
-            'email': self.email,
-            'year': self.year,
-            'team_id': self.team_id,
-            'is_team_leader': self.leading_team is not None
-        } 
\ No newline at end of file
+        """Convert model to dictionary (the default fields of its serializer)"""
+        from app.schemas.serializers import student_serializer
+        return student_serializer.dump(self)
\ No newline at end of file
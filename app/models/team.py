@@ -40,15 +40,6 @@ class Team(BaseModel):
         return self.member_count >= 4
     
     def to_dict(self):
-        """Convert model to dictionary"""
-        return {
-            'id': self.id,
-            'name': self.name,
-            'is_locked': self.is_locked,
-            'leader_id': self.leader_id,
-            'professor_id': self.professor_id,
-            'senior_mentor_id': self.senior_mentor_id,
-            'member_count': self.member_count,
-            'members': [member.to_dict() for member in self.members],
-            'created_at': self.created_at.isoformat()
-        } 
\ No newline at end of file
+        """Convert model to dictionary (the default fields of its serializer)"""
+        from app.schemas.serializers import team_serializer
+        return team_serializer.dump(self)
\ No newline at end of file
@@ -0,0 +1,16 @@
+from app import db
+
+class TeamStorageUsage(db.Model):
+    """
+    Bytes and files a team has stored, maintained on every File insert and
+    delete in the same transaction, plus the team's quota override.
+
+    Idea files count towards the idea's team. Bytes are counted per file,
+    whether or not deduplication shares the stored content.
+    """
+    __tablename__ = 'team_storage_usage'
+
+    team_id = db.Column(db.Integer, db.ForeignKey('teams.id', ondelete='CASCADE'), primary_key=True)
+    used_bytes = db.Column(db.BigInteger, default=0, nullable=False)
+    file_count = db.Column(db.Integer, default=0, nullable=False)
+    quota_bytes = db.Column(db.BigInteger, nullable=True)  # None: TEAM_STORAGE_QUOTA applies
@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from app.models.student import Student
 from app.services.auth_service import validate_registration, validate_login
+from app.schemas.serializers import student_serializer
 from app import db
 
 auth_bp = Blueprint('auth', __name__)
@@ -73,14 +74,15 @@ def login():
 @auth_bp.route('/profile', methods=['GET'])
 @jwt_required()
 def get_profile():
-    """Get the profile of the logged-in student"""
+    """Get the profile of the logged-in student (?fields=&embed=)"""
     student_id = get_jwt_identity()
-    student = Student.query.get(student_id)
+    selection = student_serializer.select_request(request)
+    student = Student.query.options(*selection.options()).filter_by(id=student_id).first()
     
     if not student:
         return jsonify({'error': 'Student not found'}), 404
     
-    return jsonify(student.to_dict()), 200
+    return jsonify(selection.dump(student)), 200
 
 @auth_bp.route('/profile', methods=['PUT'])
 @jwt_required()
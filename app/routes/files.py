@@ -1,15 +1,98 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, send_file, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models.file import File
 from app.models.student import Student
 from app.models.team import Team
 from app.models.idea import Idea
-from app.services.file_service import validate_file_upload, upload_file_to_minio
+from app.models.direct_upload import DirectUpload, DirectUploadStatus
+from app.models.resumable_upload import ResumableUpload
+from app.services.archive_service import get_idea_archive_entries, get_team_archive_entries, stream_archive
+from app.services.file_service import (
+    cancel_resumable_upload, complete_direct_upload, complete_resumable_upload, create_direct_upload,
+    create_resumable_upload, delete_file, discard_upload, receive_resumable_chunk,
+    upload_files_batch, validate_batch_upload, validate_direct_upload, validate_file_upload,
+    validate_resumable_upload, validate_upload_quota, upload_file_to_minio
+)
+from app.services.quota_service import charge_storage, check_storage_quota, get_storage_usage
+from app.services.preview_service import initial_preview_status
+from app.services.storage_service import get_storage_client, split_storage_path
+from app.schemas.serializers import serialize_files
+from app.utils.local_storage import LocalStorage
+from app.utils.streaming import get_streamed_file, iter_streamed_files
 from app import db
+from werkzeug.utils import secure_filename
+from minio.error import S3Error
+from urllib.parse import quote
 import os
 
 files_bp = Blueprint('files', __name__)
 
+def archive_response(entries, name):
+    """Stream a ZIP of the given archive entries as a download"""
+    return Response(
+        stream_with_context(stream_archive(entries)),
+        mimetype='application/zip',
+        headers={
+            'Content-Disposition': f'attachment; filename="{secure_filename(name) or "files"}.zip"',
+            # Let proxies pass chunks through instead of buffering the archive
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+def _close_after(response):
+    """Stream a storage response, closing it when done or abandoned"""
+    try:
+        yield from response.stream()
+    finally:
+        response.close()
+
+def batch_upload_response(owner_team_id, team_id=None, idea_id=None):
+    """Store every file part of the request and report the outcome per file"""
+    validation_result = validate_batch_upload(request.content_length)
+    if not validation_result['valid']:
+        return jsonify({'error': validation_result['message']}), validation_result.get('status', 400)
+    
+    quota_result = validate_upload_quota(owner_team_id, request.content_length)
+    if not quota_result['valid']:
+        return jsonify({'error': quota_result['message']}), quota_result['status']
+    
+    all_or_nothing = request.args.get('all_or_nothing', 'false').lower() == 'true'
+    result = upload_files_batch(iter_streamed_files(request), team_id=team_id, idea_id=idea_id,
+                                all_or_nothing=all_or_nothing)
+    if not result['results']:
+        return jsonify({'error': result.get('message', 'No file part in the request')}), 400
+    
+    stored = [item['file'] for item in result['results'] if item['success']]
+    serialized = iter(serialize_files(stored))
+    results = [
+        {**item, 'file': next(serialized)} if item['success'] else
+        {'original_filename': item['original_filename'], 'success': False, 'error': item['message'],
+         'status': item['status']}
+        for item in result['results']
+    ]
+    return jsonify({
+        'stored': len(stored),
+        'failed': len(results) - len(stored),
+        'results': results
+    }), result['status']
+
+def resumable_upload_response(upload, status=200, error=None):
+    """Session state, with the offset to continue from also in the Upload-Offset header"""
+    body = {'upload': upload.to_dict()}
+    if error:
+        body['error'] = error
+    response = jsonify(body)
+    response.status_code = status
+    response.headers['Upload-Offset'] = str(upload.offset)
+    return response
+
+def get_own_resumable_upload(upload_id):
+    """The student's resumable upload, or None"""
+    upload = ResumableUpload.query.get(upload_id)
+    if not upload or upload.student_id != int(get_jwt_identity()):
+        return None
+    return upload
+
 @files_bp.route('/upload/team', methods=['POST'])
 @jwt_required()
 def upload_team_file():
@@ -25,25 +108,31 @@ def upload_team_file():
     
     team = Team.query.get(student.team_id)
     
-    # Ensure request contains a file
-    if 'file' not in request.files:
+    # Ensure request contains a file (read from the body as it arrives, not spooled)
+    uploaded_file = get_streamed_file(request)
+    if uploaded_file is None:
         return jsonify({'error': 'No file part in the request'}), 400
     
-    uploaded_file = request.files['file']
-    
     # If user does not select a file
-    if uploaded_file.filename == '':
+    if not uploaded_file.filename:
         return jsonify({'error': 'No file selected'}), 400
     
+    # Optional checksum announced by the client, so duplicates of large files skip the write
+    expected_sha256 = request.headers.get('X-Content-SHA256', '').lower() or None
+    
     # Validate file
-    validation_result = validate_file_upload(uploaded_file)
+    validation_result = validate_file_upload(uploaded_file, request.content_length, expected_sha256)
     if not validation_result['valid']:
-        return jsonify({'error': validation_result['message']}), 400
+        return jsonify({'error': validation_result['message']}), validation_result.get('status', 400)
+    
+    quota_result = validate_upload_quota(team.id, request.content_length)
+    if not quota_result['valid']:
+        return jsonify({'error': quota_result['message']}), quota_result['status']
     
     # Upload file to MinIO
-    storage_result = upload_file_to_minio(uploaded_file, f'team_{team.id}')
+    storage_result = upload_file_to_minio(uploaded_file, expected_sha256)
     if not storage_result['success']:
-        return jsonify({'error': storage_result['message']}), 500
+        return jsonify({'error': storage_result['message']}), storage_result.get('status', 500)
     
     # Create file record
     file = File(
@@ -51,11 +140,19 @@ def upload_team_file():
         original_filename=uploaded_file.filename,
         file_type=os.path.splitext(uploaded_file.filename)[1],
         file_size=storage_result['size'],
+        checksum=storage_result['checksum'],
+        object_id=storage_result['object_id'],
+        deduplicated=storage_result['deduplicated'],
         storage_path=storage_result['path'],
-        public_url=storage_result.get('public_url'),
+        preview_status=initial_preview_status(os.path.splitext(uploaded_file.filename)[1]),
         team_id=team.id
     )
     
+    # Counted against the quota in the same transaction as the insert
+    if not charge_storage(team.id, file.file_size):
+        discard_upload(storage_result)
+        return jsonify({'error': 'Team storage quota exceeded'}), 413
+    
     file.save()
     
     return jsonify({
@@ -84,25 +181,31 @@ def upload_idea_file(idea_id):
     if idea.team_id != student.team_id:
         return jsonify({'error': 'Access denied: idea does not belong to your team'}), 403
     
-    # Ensure request contains a file
-    if 'file' not in request.files:
+    # Ensure request contains a file (read from the body as it arrives, not spooled)
+    uploaded_file = get_streamed_file(request)
+    if uploaded_file is None:
         return jsonify({'error': 'No file part in the request'}), 400
     
-    uploaded_file = request.files['file']
-    
     # If user does not select a file
-    if uploaded_file.filename == '':
+    if not uploaded_file.filename:
         return jsonify({'error': 'No file selected'}), 400
     
+    # Optional checksum announced by the client, so duplicates of large files skip the write
+    expected_sha256 = request.headers.get('X-Content-SHA256', '').lower() or None
+    
     # Validate file
-    validation_result = validate_file_upload(uploaded_file)
+    validation_result = validate_file_upload(uploaded_file, request.content_length, expected_sha256)
     if not validation_result['valid']:
-        return jsonify({'error': validation_result['message']}), 400
+        return jsonify({'error': validation_result['message']}), validation_result.get('status', 400)
+    
+    quota_result = validate_upload_quota(idea.team_id, request.content_length)
+    if not quota_result['valid']:
+        return jsonify({'error': quota_result['message']}), quota_result['status']
     
     # Upload file to MinIO
-    storage_result = upload_file_to_minio(uploaded_file, f'idea_{idea.id}')
+    storage_result = upload_file_to_minio(uploaded_file, expected_sha256)
     if not storage_result['success']:
-        return jsonify({'error': storage_result['message']}), 500
+        return jsonify({'error': storage_result['message']}), storage_result.get('status', 500)
     
     # Create file record
     file = File(
@@ -110,11 +213,19 @@ def upload_idea_file(idea_id):
         original_filename=uploaded_file.filename,
         file_type=os.path.splitext(uploaded_file.filename)[1],
         file_size=storage_result['size'],
+        checksum=storage_result['checksum'],
+        object_id=storage_result['object_id'],
+        deduplicated=storage_result['deduplicated'],
         storage_path=storage_result['path'],
-        public_url=storage_result.get('public_url'),
+        preview_status=initial_preview_status(os.path.splitext(uploaded_file.filename)[1]),
         idea_id=idea.id
     )
     
+    # Counted against the quota in the same transaction as the insert
+    if not charge_storage(idea.team_id, file.file_size):
+        discard_upload(storage_result)
+        return jsonify({'error': 'Team storage quota exceeded'}), 413
+    
     file.save()
     
     return jsonify({
@@ -122,21 +233,283 @@ def upload_idea_file(idea_id):
         'file': file.to_dict()
     }), 201
 
+@files_bp.route('/upload/team/batch', methods=['POST'])
+@jwt_required()
+def upload_team_files():
+    """Upload many team files in one multipart request (?all_or_nothing=true to store all or none)"""
+    student_id = get_jwt_identity()
+    student = Student.query.get(student_id)
+    
+    if not student:
+        return jsonify({'error': 'Student not found'}), 404
+    
+    if not student.team_id:
+        return jsonify({'error': 'You are not in a team'}), 400
+    
+    return batch_upload_response(student.team_id, team_id=student.team_id)
+
+@files_bp.route('/upload/idea/<int:idea_id>/batch', methods=['POST'])
+@jwt_required()
+def upload_idea_files(idea_id):
+    """Upload many idea files in one multipart request (?all_or_nothing=true to store all or none)"""
+    student_id = get_jwt_identity()
+    student = Student.query.get(student_id)
+    
+    if not student:
+        return jsonify({'error': 'Student not found'}), 404
+    
+    if not student.team_id:
+        return jsonify({'error': 'You are not in a team'}), 400
+    
+    idea = Idea.query.get(idea_id)
+    if not idea:
+        return jsonify({'error': 'Idea not found'}), 404
+    
+    # Ensure the idea belongs to student's team
+    if idea.team_id != student.team_id:
+        return jsonify({'error': 'Access denied: idea does not belong to your team'}), 403
+    
+    return batch_upload_response(idea.team_id, idea_id=idea.id)
+
+@files_bp.route('/upload/team/direct', methods=['POST'])
+@jwt_required()
+def start_direct_team_upload():
+    """Presign an upload of a team file straight to storage"""
+    student_id = get_jwt_identity()
+    student = Student.query.get(student_id)
+    
+    if not student:
+        return jsonify({'error': 'Student not found'}), 404
+    
+    if not student.team_id:
+        return jsonify({'error': 'You are not in a team'}), 400
+    
+    data = request.get_json() or {}
+    validation_result = validate_direct_upload(data)
+    if not validation_result['valid']:
+        return jsonify({'error': validation_result['message']}), validation_result.get('status', 400)
+    
+    quota_result = check_storage_quota(student.team_id, data.get('size'))
+    if not quota_result['valid']:
+        return jsonify({'error': quota_result['message']}), quota_result['status']
+    
+    upload, presigned = create_direct_upload(student, data, team_id=student.team_id)
+    
+    return jsonify({
+        'upload': upload.to_dict(),
+        'request': presigned
+    }), 201
+
+@files_bp.route('/upload/idea/<int:idea_id>/direct', methods=['POST'])
+@jwt_required()
+def start_direct_idea_upload(idea_id):
+    """Presign an upload of an idea file straight to storage"""
+    student_id = get_jwt_identity()
+    student = Student.query.get(student_id)
+    
+    if not student:
+        return jsonify({'error': 'Student not found'}), 404
+    
+    if not student.team_id:
+        return jsonify({'error': 'You are not in a team'}), 400
+    
+    idea = Idea.query.get(idea_id)
+    if not idea:
+        return jsonify({'error': 'Idea not found'}), 404
+    
+    # Ensure the idea belongs to student's team
+    if idea.team_id != student.team_id:
+        return jsonify({'error': 'Access denied: idea does not belong to your team'}), 403
+    
+    data = request.get_json() or {}
+    validation_result = validate_direct_upload(data)
+    if not validation_result['valid']:
+        return jsonify({'error': validation_result['message']}), validation_result.get('status', 400)
+    
+    quota_result = check_storage_quota(idea.team_id, data.get('size'))
+    if not quota_result['valid']:
+        return jsonify({'error': quota_result['message']}), quota_result['status']
+    
+    upload, presigned = create_direct_upload(student, data, idea_id=idea.id)
+    
+    return jsonify({
+        'upload': upload.to_dict(),
+        'request': presigned
+    }), 201
+
+@files_bp.route('/upload/direct/<int:upload_id>/complete', methods=['POST'])
+@jwt_required()
+def complete_direct_file_upload(upload_id):
+    """Create the file record once the client has uploaded to storage"""
+    student_id = get_jwt_identity()
+    upload = DirectUpload.query.get(upload_id)
+    
+    if not upload or upload.student_id != int(student_id):
+        return jsonify({'error': 'Upload not found'}), 404
+    
+    if upload.status != DirectUploadStatus.PENDING:
+        return jsonify({'error': f'Upload is already {upload.status}'}), 400
+    
+    result = complete_direct_upload(upload)
+    if not result['success']:
+        return jsonify({'error': result['message']}), result['status']
+    
+    return jsonify({
+        'message': 'File uploaded successfully',
+        'file': result['file'].to_dict()
+    }), 201
+
+@files_bp.route('/upload/team/resumable', methods=['POST'])
+@jwt_required()
+def start_resumable_team_upload():
+    """Start a resumable, chunked upload of a team file"""
+    student_id = get_jwt_identity()
+    student = Student.query.get(student_id)
+    
+    if not student:
+        return jsonify({'error': 'Student not found'}), 404
+    
+    if not student.team_id:
+        return jsonify({'error': 'You are not in a team'}), 400
+    
+    data = request.get_json() or {}
+    validation_result = validate_resumable_upload(data)
+    if not validation_result['valid']:
+        return jsonify({'error': validation_result['message']}), validation_result.get('status', 400)
+    
+    quota_result = check_storage_quota(student.team_id, data.get('size'))
+    if not quota_result['valid']:
+        return jsonify({'error': quota_result['message']}), quota_result['status']
+    
+    upload = create_resumable_upload(student, data, team_id=student.team_id)
+    
+    return resumable_upload_response(upload, 201)
+
+@files_bp.route('/upload/idea/<int:idea_id>/resumable', methods=['POST'])
+@jwt_required()
+def start_resumable_idea_upload(idea_id):
+    """Start a resumable, chunked upload of an idea file"""
+    student_id = get_jwt_identity()
+    student = Student.query.get(student_id)
+    
+    if not student:
+        return jsonify({'error': 'Student not found'}), 404
+    
+    if not student.team_id:
+        return jsonify({'error': 'You are not in a team'}), 400
+    
+    idea = Idea.query.get(idea_id)
+    if not idea:
+        return jsonify({'error': 'Idea not found'}), 404
+    
+    # Ensure the idea belongs to student's team
+    if idea.team_id != student.team_id:
+        return jsonify({'error': 'Access denied: idea does not belong to your team'}), 403
+    
+    data = request.get_json() or {}
+    validation_result = validate_resumable_upload(data)
+    if not validation_result['valid']:
+        return jsonify({'error': validation_result['message']}), validation_result.get('status', 400)
+    
+    quota_result = check_storage_quota(idea.team_id, data.get('size'))
+    if not quota_result['valid']:
+        return jsonify({'error': quota_result['message']}), quota_result['status']
+    
+    upload = create_resumable_upload(student, data, idea_id=idea.id)
+    
+    return resumable_upload_response(upload, 201)
+
+@files_bp.route('/upload/resumable/<int:upload_id>', methods=['GET'])
+@jwt_required()
+def get_resumable_upload(upload_id):
+    """Where to resume: the number of bytes stored so far (also answers HEAD)"""
+    upload = get_own_resumable_upload(upload_id)
+    if not upload:
+        return jsonify({'error': 'Upload not found'}), 404
+    
+    return resumable_upload_response(upload)
+
+@files_bp.route('/upload/resumable/<int:upload_id>', methods=['PATCH'])
+@jwt_required()
+def upload_resumable_chunk(upload_id):
+    """Append the raw request body at the byte offset given in the Upload-Offset header"""
+    upload = get_own_resumable_upload(upload_id)
+    if not upload:
+        return jsonify({'error': 'Upload not found'}), 404
+    
+    offset = request.headers.get('Upload-Offset', type=int)
+    if offset is None:
+        return jsonify({'error': 'Upload-Offset header is required'}), 400
+    
+    result = receive_resumable_chunk(upload, offset, request.stream)
+    if not result['success']:
+        return resumable_upload_response(result['upload'], result['status'], result['message'])
+    
+    return resumable_upload_response(result['upload'])
+
+@files_bp.route('/upload/resumable/<int:upload_id>/complete', methods=['POST'])
+@jwt_required()
+def complete_resumable_file_upload(upload_id):
+    """Assemble the uploaded chunks and create the file record"""
+    upload = get_own_resumable_upload(upload_id)
+    if not upload:
+        return jsonify({'error': 'Upload not found'}), 404
+    
+    result = complete_resumable_upload(upload)
+    if not result['success']:
+        return jsonify({'error': result['message']}), result['status']
+    
+    return jsonify({
+        'message': 'File uploaded successfully',
+        'file': result['file'].to_dict()
+    }), 201
+
+@files_bp.route('/upload/resumable/<int:upload_id>', methods=['DELETE'])
+@jwt_required()
+def cancel_resumable_file_upload(upload_id):
+    """Abandon a resumable upload and discard what was received"""
+    upload = get_own_resumable_upload(upload_id)
+    if not upload:
+        return jsonify({'error': 'Upload not found'}), 404
+    
+    if not cancel_resumable_upload(upload):
+        return jsonify({'error': f'Upload is already {upload.status}'}), 400
+    
+    return jsonify({'message': 'Upload cancelled'}), 200
+
 @files_bp.route('/<int:file_id>', methods=['GET'])
 @jwt_required()
 def get_file(file_id):
-    """Get file details including a public URL"""
+    """Get file details including a freshly signed download URL"""
     file = File.query.get(file_id)
     if not file:
         return jsonify({'error': 'File not found'}), 404
     
-    # If file doesn't have a public URL, generate one
-    if not file.public_url:
-        file.generate_public_url()
-        file.save()
-    
     return jsonify(file.to_dict()), 200
 
+@files_bp.route('/<int:file_id>', methods=['DELETE'])
+@jwt_required()
+def remove_file(file_id):
+    """Delete a file of the student's team"""
+    student_id = get_jwt_identity()
+    student = Student.query.get(student_id)
+    
+    if not student:
+        return jsonify({'error': 'Student not found'}), 404
+    
+    file = File.query.get(file_id)
+    if not file:
+        return jsonify({'error': 'File not found'}), 404
+    
+    # Idea files belong to the idea's team
+    owner_team_id = file.team_id if file.team_id is not None else file.idea.team_id
+    if not student.team_id or owner_team_id != student.team_id:
+        return jsonify({'error': 'Access denied: file does not belong to your team'}), 403
+    
+    delete_file(file)
+    
+    return jsonify({'message': 'File deleted successfully'}), 200
+
 @files_bp.route('/team/<int:team_id>', methods=['GET'])
 @jwt_required()
 def get_team_files(team_id):
@@ -146,7 +519,17 @@ def get_team_files(team_id):
         return jsonify({'error': 'Team not found'}), 404
     
     files = File.query.filter_by(team_id=team_id).all()
-    return jsonify([file.to_dict() for file in files]), 200
+    return jsonify(serialize_files(files)), 200
+
+@files_bp.route('/team/<int:team_id>/archive', methods=['GET'])
+@jwt_required()
+def download_team_archive(team_id):
+    """Download a team's files and its ideas' files as one ZIP"""
+    team = Team.query.get(team_id)
+    if not team:
+        return jsonify({'error': 'Team not found'}), 404
+    
+    return archive_response(get_team_archive_entries(team), team.name)
 
 @files_bp.route('/idea/<int:idea_id>', methods=['GET'])
 @jwt_required()
@@ -157,4 +540,84 @@ def get_idea_files(idea_id):
         return jsonify({'error': 'Idea not found'}), 404
     
     files = File.query.filter_by(idea_id=idea_id).all()
-    return jsonify([file.to_dict() for file in files]), 200 
\ No newline at end of file
+    return jsonify(serialize_files(files)), 200
+
+@files_bp.route('/idea/<int:idea_id>/archive', methods=['GET'])
+@jwt_required()
+def download_idea_archive(idea_id):
+    """Download an idea's files as one ZIP"""
+    idea = Idea.query.get(idea_id)
+    if not idea:
+        return jsonify({'error': 'Idea not found'}), 404
+    
+    return archive_response(get_idea_archive_entries(idea), idea.title)
+
+@files_bp.route('/storage/usage', methods=['GET'])
+@jwt_required()
+def storage_usage():
+    """Storage used by the logged-in student's team against its quota"""
+    student_id = get_jwt_identity()
+    student = Student.query.get(student_id)
+    
+    if not student:
+        return jsonify({'error': 'Student not found'}), 404
+    
+    if not student.team_id:
+        return jsonify({'error': 'You are not in a team'}), 404
+    
+    return jsonify(get_storage_usage(student.team_id)[0]), 200
+
+@files_bp.route('/local/<path:storage_path>', methods=['GET'])
+def download_local_object(storage_path):
+    """
+    Serve an object of the local storage backend to a presigned URL.
+
+    Authorized by the URL signature rather than a token, like an S3
+    presigned URL. Behind nginx (LOCAL_STORAGE_ACCEL_REDIRECT) the transfer
+    is handed off with X-Accel-Redirect; otherwise whole files are sent with
+    the server's file wrapper (sendfile where available) and single ranges
+    are served from a memory-mapped view of the file.
+    """
+    client = get_storage_client()
+    if not isinstance(client, LocalStorage) or '/' not in storage_path:
+        return jsonify({'error': 'File not found'}), 404
+    
+    bucket_name, object_name = split_storage_path(storage_path)
+    if not client.verify_signature(bucket_name, object_name, request.args.get('expires'), request.args.get('signature')):
+        return jsonify({'error': 'Download link is invalid or has expired'}), 403
+    
+    try:
+        obj = client.stat_object(bucket_name, object_name)
+    except S3Error:
+        return jsonify({'error': 'File not found'}), 404
+    
+    accel_prefix = current_app.config['LOCAL_STORAGE_ACCEL_REDIRECT']
+    if accel_prefix:
+        # nginx serves the file (and any Range) from its internal location
+        return Response(headers={
+            'X-Accel-Redirect': f"{accel_prefix.rstrip('/')}/{bucket_name}/{quote(object_name)}",
+            'Content-Type': obj.content_type,
+            'ETag': f'"{obj.etag}"'
+        })
+    
+    if request.range and len(request.range.ranges) == 1:
+        byte_range = request.range.range_for_length(obj.size)
+        if byte_range is None:
+            return Response(status=416, headers={'Content-Range': f'bytes */{obj.size}'})
+        start, stop = byte_range
+        response = client.get_object(bucket_name, object_name, offset=start, length=stop - start)
+        return Response(
+            stream_with_context(_close_after(response)),
+            status=206,
+            mimetype=obj.content_type,
+            headers={
+                'Content-Range': f'bytes {start}-{stop - 1}/{obj.size}',
+                'Content-Length': str(stop - start),
+                'Accept-Ranges': 'bytes',
+                'ETag': f'"{obj.etag}"'
+            }
+        )
+    
+    # Multi-range requests are left to send_file
+    return send_file(client.object_path(bucket_name, object_name), mimetype=obj.content_type,
+                     etag=obj.etag, conditional=True, last_modified=obj.last_modified)
@@ -0,0 +1,141 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.models.idea import Idea
+from app.models.student import Student
+from app.services.idea_service import create_idea, delete_idea, list_ideas, update_idea, validate_idea
+from app.services.search_service import search_ideas
+from app.services.similarity_service import similar_ideas
+from app.schemas.serializers import idea_serializer
+from app.utils.decorators import team_member_required
+
+ideas_bp = Blueprint('ideas', __name__)
+
+def get_own_team_idea(idea_id):
+    """
+    The idea if it belongs to the logged-in student's team.
+
+    Returns:
+        tuple: (idea, None) or (None, error response)
+    """
+    idea = Idea.query.get(idea_id)
+    if not idea:
+        return None, (jsonify({'error': 'Idea not found'}), 404)
+
+    student = Student.query.get(get_jwt_identity())
+    if not student or student.team_id != idea.team_id:
+        return None, (jsonify({'error': 'You can only change ideas of your own team'}), 403)
+    return idea, None
+
+@ideas_bp.route('', methods=['POST'])
+@jwt_required()
+@team_member_required
+def submit_idea():
+    """Submit an idea for the current student's team"""
+    student = Student.query.get(get_jwt_identity())
+    data = request.get_json(silent=True)
+
+    validation_result = validate_idea(data)
+    if not validation_result['valid']:
+        return jsonify({'error': validation_result['message']}), 400
+
+    idea = create_idea(student.team_id, data)
+
+    return jsonify({
+        'message': 'Idea submitted successfully',
+        'idea': idea.to_dict()
+    }), 201
+
+@ideas_bp.route('', methods=['GET'])
+@jwt_required()
+def get_ideas():
+    """List ideas, newest first, optionally for one team (cursor paginated, ?fields=&embed=)"""
+    selection = idea_serializer.select_request(request, default_embeds=[])
+    ideas, next_cursor = list_ideas(
+        team_id=request.args.get('team_id', type=int),
+        cursor=request.args.get('cursor', type=int),
+        limit=request.args.get('limit', 20, type=int),
+        options=selection.options()
+    )
+
+    return jsonify({
+        'ideas': selection.dump_all(ideas),
+        'next_cursor': next_cursor
+    }), 200
+
+@ideas_bp.route('/search', methods=['GET'])
+@jwt_required()
+def search():
+    """Full-text search over ideas, ranked by relevance, with highlighted snippets"""
+    result = search_ideas(
+        request.args.get('q', ''),
+        team_id=request.args.get('team_id', type=int),
+        page=request.args.get('page', 1, type=int),
+        per_page=request.args.get('per_page', 20, type=int)
+    )
+    if not result['valid']:
+        return jsonify({'error': result['message']}), result.get('status', 400)
+
+    return jsonify({
+        'results': result['results'],
+        'total': result['total'],
+        'page': result['page'],
+        'per_page': result['per_page']
+    }), 200
+
+@ideas_bp.route('/<int:idea_id>/similar', methods=['GET'])
+@jwt_required()
+def get_similar_ideas(idea_id):
+    """Near-duplicates of an idea, most similar first"""
+    idea = Idea.query.get(idea_id)
+    if not idea:
+        return jsonify({'error': 'Idea not found'}), 404
+
+    return jsonify({
+        'idea_id': idea.id,
+        'similar': similar_ideas(idea, limit=min(request.args.get('limit', 10, type=int), 50))
+    }), 200
+
+@ideas_bp.route('/<int:idea_id>', methods=['GET'])
+@jwt_required()
+def get_idea(idea_id):
+    """Get an idea with its files (?fields=&embed=)"""
+    selection = idea_serializer.select_request(request)
+    idea = Idea.query.options(*selection.options()).filter_by(id=idea_id).first()
+    if not idea:
+        return jsonify({'error': 'Idea not found'}), 404
+
+    return jsonify(selection.dump(idea)), 200
+
+@ideas_bp.route('/<int:idea_id>', methods=['PUT'])
+@jwt_required()
+def edit_idea(idea_id):
+    """Update some or all fields of an idea of the current student's team"""
+    idea, error = get_own_team_idea(idea_id)
+    if error:
+        return error
+
+    data = request.get_json(silent=True)
+    validation_result = validate_idea(data, partial=True)
+    if not validation_result['valid']:
+        return jsonify({'error': validation_result['message']}), 400
+
+    update_idea(idea, data)
+
+    return jsonify({
+        'message': 'Idea updated successfully',
+        'idea': idea.to_dict()
+    }), 200
+
+@ideas_bp.route('/<int:idea_id>', methods=['DELETE'])
+@jwt_required()
+def remove_idea(idea_id):
+    """Delete an idea of the current student's team, with its files"""
+    idea, error = get_own_team_idea(idea_id)
+    if error:
+        return error
+
+    result = delete_idea(idea)
+    if not result['success']:
+        return jsonify({'error': result['message']}), result.get('status', 400)
+
+    return jsonify({'message': 'Idea deleted successfully'}), 200
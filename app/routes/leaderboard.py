@@ -1,36 +1,46 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 from app.models.leaderboard import Leaderboard
+from app.schemas.serializers import leaderboard_serializer
+from app.utils.serialization import stream_response, streaming_format
 
 leaderboard_bp = Blueprint('leaderboard', __name__)
 
 @leaderboard_bp.route('', methods=['GET'])
 @jwt_required()
 def get_all_leaderboard():
-    """Get all teams in the leaderboard sorted by total score"""
-    leaderboards = Leaderboard.query.order_by(Leaderboard.total_score.desc()).all()
-    return jsonify([leaderboard.to_dict() for leaderboard in leaderboards]), 200
+    """Get all teams in the leaderboard sorted by total score (?fields=&embed=, streamed with ?stream=true or Accept: application/x-ndjson)"""
+    selection = leaderboard_serializer.select_request(request)
+    query = Leaderboard.query.options(*selection.options()).order_by(Leaderboard.total_score.desc())
+    format = streaming_format(request)
+    if format:
+        return stream_response(query, selection, format)
+    leaderboards = query.all()
+    return jsonify(selection.dump_all(leaderboards)), 200
 
 @leaderboard_bp.route('/top', methods=['GET'])
 def get_top_teams():
     """Get top 5 teams in the leaderboard - public API, no auth required"""
-    leaderboards = Leaderboard.get_top_teams(limit=5)
-    return jsonify([leaderboard.to_dict() for leaderboard in leaderboards]), 200
+    selection = leaderboard_serializer.select_request(request)
+    leaderboards = Leaderboard.get_top_teams(limit=5, options=selection.options())
+    return jsonify(selection.dump_all(leaderboards)), 200
 
 @leaderboard_bp.route('/bottom', methods=['GET'])
 @jwt_required()
 def get_bottom_teams():
     """Get bottom 5 teams in the leaderboard - auth required"""
-    leaderboards = Leaderboard.get_bottom_teams(limit=5)
-    return jsonify([leaderboard.to_dict() for leaderboard in leaderboards]), 200
+    selection = leaderboard_serializer.select_request(request)
+    leaderboards = Leaderboard.get_bottom_teams(limit=5, options=selection.options())
+    return jsonify(selection.dump_all(leaderboards)), 200
 
 @leaderboard_bp.route('/team/<int:team_id>', methods=['GET'])
 @jwt_required()
 def get_team_leaderboard(team_id):
-    """Get leaderboard entry for a specific team"""
-    leaderboard = Leaderboard.query.filter_by(team_id=team_id).first()
+    """Get leaderboard entry for a specific team (?fields=&embed=)"""
+    selection = leaderboard_serializer.select_request(request)
+    leaderboard = Leaderboard.query.options(*selection.options()).filter_by(team_id=team_id).first()
     
     if not leaderboard:
         return jsonify({'error': 'Leaderboard entry not found for this team'}), 404
     
-    return jsonify(leaderboard.to_dict()), 200 
\ No newline at end of file
+    return jsonify(selection.dump(leaderboard)), 200 
@@ -4,6 +4,9 @@ from app.models.meeting import Meeting, MeetingStatus
 from app.models.student import Student
 from app.models.team import Team
 from app.services.meeting_service import validate_meeting_creation
+from app.services.email_service import send_meeting_notification
+from app.services.notification_service import notify, team_recipients
+from app.schemas.serializers import meeting_serializer
 from app import db
 from datetime import datetime
 
@@ -50,10 +53,22 @@ def create_meeting():
         professor_id=data.get('professor_id'),
         mentor_id=data.get('mentor_id')
     )
-    
-    meeting.save()
-    
-    # TODO: Implement email notification to participants
+    db.session.add(meeting)
+    db.session.flush()
+    
+    # Queue email to participants and in-app notifications to the team, committed together with the meeting
+    participants = [member.email for member in team.members]
+    if meeting.professor:
+        participants.append(meeting.professor.email)
+    if meeting.mentor:
+        participants.append(meeting.mentor.email)
+    for email in participants:
+        send_meeting_notification(email, meeting.title, team.name, meeting.scheduled_date)
+    notify('meeting_scheduled', f"Meeting scheduled: {meeting.title}", team_recipients(team),
+           body=f"{team.name} on {meeting.scheduled_date.isoformat()}",
+           team_id=team.id, meeting_id=meeting.id)
+    
+    db.session.commit()
     
     return jsonify({
         'message': 'Meeting scheduled successfully',
@@ -63,23 +78,27 @@ def create_meeting():
 @meetings_bp.route('/<int:meeting_id>', methods=['GET'])
 @jwt_required()
 def get_meeting(meeting_id):
-    """Get meeting details"""
-    meeting = Meeting.query.get(meeting_id)
+    """Get meeting details (?fields=&embed=)"""
+    selection = meeting_serializer.select_request(request)
+    meeting = Meeting.query.options(*selection.options()).filter_by(id=meeting_id).first()
     if not meeting:
         return jsonify({'error': 'Meeting not found'}), 404
     
-    return jsonify(meeting.to_dict()), 200
+    return jsonify(selection.dump(meeting)), 200
 
 @meetings_bp.route('/team/<int:team_id>', methods=['GET'])
 @jwt_required()
 def get_team_meetings(team_id):
-    """Get all meetings for a team"""
+    """Get all meetings for a team (?fields=&embed=)"""
+    selection = meeting_serializer.select_request(request)
     team = Team.query.get(team_id)
     if not team:
         return jsonify({'error': 'Team not found'}), 404
     
-    meetings = Meeting.query.filter_by(team_id=team_id).order_by(Meeting.scheduled_date).all()
-    return jsonify([meeting.to_dict() for meeting in meetings]), 200
+    meetings = Meeting.query.options(*selection.options()).filter_by(team_id=team_id).order_by(
+        Meeting.scheduled_date
+    ).all()
+    return jsonify(selection.dump_all(meetings)), 200
 
 @meetings_bp.route('/<int:meeting_id>/complete', methods=['POST'])
 @jwt_required()
@@ -139,6 +158,11 @@ def cancel_meeting(meeting_id):
         return jsonify({'error': f'Meeting is already {meeting.status}'}), 400
     
     meeting.status = MeetingStatus.CANCELED
+    
+    # In-app notification to the team, committed together with the cancellation
+    notify('meeting_canceled', f"Meeting canceled: {meeting.title}", team_recipients(team),
+           team_id=team.id, meeting_id=meeting.id)
+    
     meeting.save()
     
     # TODO: Implement email notification to participants
@@ -4,6 +4,10 @@ from app.models.mentor import Mentor
 from app.models.student import Student
 from app.models.team import Team
 from app.models.requests import SeniorMentorRequest, RequestStatus
+from app.services.email_service import send_mentor_request, send_request_response
+from app.services.notification_service import notify, team_recipients
+from app.schemas.serializers import mentor_serializer
+from app.utils.serialization import stream_response, streaming_format
 from app import db
 
 mentors_bp = Blueprint('mentors', __name__)
@@ -11,19 +15,25 @@ mentors_bp = Blueprint('mentors', __name__)
 @mentors_bp.route('', methods=['GET'])
 @jwt_required()
 def get_all_mentors():
-    """Get all available mentors"""
-    mentors = Mentor.query.all()
-    return jsonify([mentor.to_dict() for mentor in mentors]), 200
+    """Get all available mentors (?fields=&embed=, streamed with ?stream=true or Accept: application/x-ndjson)"""
+    selection = mentor_serializer.select_request(request)
+    query = Mentor.query.options(*selection.options())
+    format = streaming_format(request)
+    if format:
+        return stream_response(query, selection, format)
+    mentors = query.all()
+    return jsonify(selection.dump_all(mentors)), 200
 
 @mentors_bp.route('/<int:mentor_id>', methods=['GET'])
 @jwt_required()
 def get_mentor(mentor_id):
-    """Get mentor details"""
-    mentor = Mentor.query.get(mentor_id)
+    """Get mentor details (?fields=&embed=)"""
+    selection = mentor_serializer.select_request(request)
+    mentor = Mentor.query.options(*selection.options()).filter_by(id=mentor_id).first()
     if not mentor:
         return jsonify({'error': 'Mentor not found'}), 404
     
-    return jsonify(mentor.to_dict()), 200
+    return jsonify(selection.dump(mentor)), 200
 
 @mentors_bp.route('/request', methods=['POST'])
 @jwt_required()
@@ -72,9 +82,11 @@ def request_mentor():
         message=data.get('message')
     )
     
-    mentor_request.save()
+    # Queue email to mentor, committed together with the request
+    # (mentors cannot sign in, so they have no in-app inbox yet)
+    send_mentor_request(mentor.email, team.name, data.get('message'))
     
-    # TODO: Implement email notification to mentor
+    mentor_request.save()
     
     return jsonify({
         'message': 'Mentor request sent successfully',
@@ -97,15 +109,19 @@ def respond_to_request(request_id):
         return jsonify({'error': 'Valid status (accepted/rejected) is required'}), 400
     
     mentor_request.status = data['status']
+    team = Team.query.get(mentor_request.team_id)
     
     # If accepted, assign mentor to team
     if data['status'] == RequestStatus.ACCEPTED:
-        team = Team.query.get(mentor_request.team_id)
         team.senior_mentor_id = mentor_request.mentor_id
     
-    mentor_request.save()
+    # Queue email to team leader and in-app notifications to the team, committed together with the response
+    send_request_response(team.leader.email, team.name, data['status'], mentor_request.mentor.name)
+    notify('request_response', f"{mentor_request.mentor.name} {data['status']} your mentorship request",
+           team_recipients(team), team_id=team.id, request_id=mentor_request.id,
+           mentor_id=mentor_request.mentor_id, status=data['status'])
     
-    # TODO: Implement email notification to team
+    mentor_request.save()
     
     return jsonify({
         'message': f'Request {data["status"]}',
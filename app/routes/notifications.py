@@ -0,0 +1,53 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.models.notification import RecipientType
+from app.services.notification_service import list_notifications, mark_read, get_unread_count
+
+notifications_bp = Blueprint('notifications', __name__)
+
+@notifications_bp.route('', methods=['GET'])
+@jwt_required()
+def get_notifications():
+    """Get the logged-in student's notifications, newest first (cursor paginated)"""
+    student_id = get_jwt_identity()
+    
+    items, next_cursor = list_notifications(
+        RecipientType.STUDENT,
+        student_id,
+        cursor=request.args.get('cursor', type=int),
+        limit=request.args.get('limit', 20, type=int),
+        unread_only=request.args.get('unread', 'false').lower() == 'true'
+    )
+    
+    return jsonify({
+        'notifications': [item.to_dict() for item in items],
+        'next_cursor': next_cursor
+    }), 200
+
+@notifications_bp.route('/unread-count', methods=['GET'])
+@jwt_required()
+def get_notifications_unread_count():
+    """Get the number of unread notifications - read from a maintained counter"""
+    student_id = get_jwt_identity()
+    return jsonify({'unread_count': get_unread_count(RecipientType.STUDENT, student_id)}), 200
+
+@notifications_bp.route('/mark-read', methods=['POST'])
+@jwt_required()
+def mark_notifications_read():
+    """Mark the given notifications (or all of them) as read"""
+    student_id = get_jwt_identity()
+    data = request.get_json() or {}
+    
+    if data.get('all'):
+        ids = None
+    elif isinstance(data.get('ids'), list) and all(isinstance(i, int) for i in data['ids']):
+        ids = data['ids']
+    else:
+        return jsonify({'error': 'Provide a list of notification ids or all: true'}), 400
+    
+    updated = mark_read(RecipientType.STUDENT, student_id, ids)
+    
+    return jsonify({
+        'message': f'{updated} notifications marked as read',
+        'unread_count': get_unread_count(RecipientType.STUDENT, student_id)
+    }), 200
@@ -4,33 +4,47 @@ from app.models.professor import Professor
 from app.models.student import Student
 from app.models.team import Team
 from app.models.requests import MentorRequest, RequestStatus
-from app import db
+from app.services.email_service import send_mentor_request, send_request_response
+from app.services.notification_service import notify, team_recipients
+from app.schemas.serializers import professor_serializer
+from app.utils.serialization import stream_response, streaming_format
 
 professors_bp = Blueprint('professors', __name__)
 
 @professors_bp.route('', methods=['GET'])
 @jwt_required()
 def get_all_professors():
-    """Get all available professors"""
-    professors = Professor.query.all()
-    return jsonify([professor.to_dict() for professor in professors]), 200
+    """Get all available professors (?fields=&embed=, streamed with ?stream=true or Accept: application/x-ndjson)"""
+    selection = professor_serializer.select_request(request)
+    query = Professor.query.options(*selection.options())
+    format = streaming_format(request)
+    if format:
+        return stream_response(query, selection, format)
+    professors = query.all()
+    return jsonify(selection.dump_all(professors)), 200
 
 @professors_bp.route('/<int:professor_id>', methods=['GET'])
 @jwt_required()
 def get_professor(professor_id):
-    """Get professor details"""
-    professor = Professor.query.get(professor_id)
+    """Get professor details (?fields=&embed=)"""
+    selection = professor_serializer.select_request(request)
+    professor = Professor.query.options(*selection.options()).filter_by(id=professor_id).first()
     if not professor:
         return jsonify({'error': 'Professor not found'}), 404
     
-    return jsonify(professor.to_dict()), 200
+    return jsonify(selection.dump(professor)), 200
 
 @professors_bp.route('/available', methods=['GET'])
 @jwt_required()
 def get_available_professors():
-    """Get professors who can still accept more teams"""
-    professors = Professor.query.filter(Professor.accepted_team_count < 3).all()
-    return jsonify([professor.to_dict() for professor in professors]), 200
+    """Get professors who can still accept more teams (?fields=&embed=, streamed like the full list)"""
+    selection = professor_serializer.select_request(request)
+    query = Professor.query.options(*selection.options()).filter(Professor.accepted_team_count < 3)
+    format = streaming_format(request)
+    if format:
+        return stream_response(query, selection, format)
+    professors = query.all()
+    return jsonify(selection.dump_all(professors)), 200
 
 @professors_bp.route('/request', methods=['POST'])
 @jwt_required()
@@ -83,9 +97,11 @@ def request_professor():
         message=data.get('message')
     )
     
-    mentor_request.save()
+    # Queue email to professor, committed together with the request
+    # (professors cannot sign in, so they have no in-app inbox yet)
+    send_mentor_request(professor.email, team.name, data.get('message'))
     
-    # TODO: Implement email notification to professor
+    mentor_request.save()
     
     return jsonify({
         'message': 'Professor mentorship request sent successfully',
@@ -108,25 +124,27 @@ def respond_to_request(request_id):
         return jsonify({'error': 'Valid status (accepted/rejected) is required'}), 400
     
     mentor_request.status = data['status']
+    professor = Professor.query.get(mentor_request.professor_id)
+    team = Team.query.get(mentor_request.team_id)
     
     # If accepted, assign professor to team and increment count
     if data['status'] == RequestStatus.ACCEPTED:
-        professor = Professor.query.get(mentor_request.professor_id)
-        
         # Double-check if professor can accept more teams
         if not professor.can_accept_more_teams:
             return jsonify({'error': 'Professor cannot accept more teams'}), 400
         
-        team = Team.query.get(mentor_request.team_id)
         team.professor_id = mentor_request.professor_id
         
         # Increment accepted team count
         professor.accepted_team_count += 1
-        db.session.commit()
     
-    mentor_request.save()
+    # Queue email to team leader and in-app notifications to the team, committed together with the response
+    send_request_response(team.leader.email, team.name, data['status'], professor.name)
+    notify('request_response', f"{professor.name} {data['status']} your mentorship request",
+           team_recipients(team), team_id=team.id, request_id=mentor_request.id,
+           professor_id=professor.id, status=data['status'])
     
-    # TODO: Implement email notification to team
+    mentor_request.save()
     
     return jsonify({
         'message': f'Request {data["status"]}',
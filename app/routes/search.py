@@ -0,0 +1,20 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from app.services.typeahead_service import typeahead
+
+search_bp = Blueprint('search', __name__)
+
+@search_bp.route('/typeahead', methods=['GET'])
+@jwt_required()
+def get_typeahead():
+    """Students, teams, professors and mentors starting with what has been typed (?q=&types=&limit=)"""
+    types = [kind.strip() for kind in request.args.get('types', '').split(',') if kind.strip()]
+    result = typeahead(
+        request.args.get('q', ''),
+        types=types,
+        limit=request.args.get('limit', 10, type=int)
+    )
+    if not result['valid']:
+        return jsonify({'error': result['message']}), 400
+
+    return jsonify({'results': result['results']}), 200
@@ -3,7 +3,13 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models.team import Team
 from app.models.student import Student
 from app.models.leaderboard import Leaderboard
+from app.models.notification import RecipientType
 from app.services.team_service import validate_team_creation, can_join_team
+from app.services.email_service import send_team_invitation
+from app.services.notification_service import notify
+from app.services.recommendation_service import recommend_mentors
+from app.schemas.serializers import team_serializer
+from app.utils.serialization import stream_response, streaming_format
 from app import db
 
 teams_bp = Blueprint('teams', __name__)
@@ -107,7 +113,7 @@ def join_team(team_id):
 @teams_bp.route('/<int:team_id>/invite', methods=['POST'])
 @jwt_required()
 def invite_to_team(team_id):
-    """Invite a student to join the team (placeholder for email functionality)"""
+    """Invite a student to join the team by email or student id (e.g. picked from typeahead search)"""
     student_id = get_jwt_identity()
     student = Student.query.get(student_id)
     
@@ -128,22 +134,31 @@ def invite_to_team(team_id):
         return jsonify({'error': 'Team is already full'}), 400
     
     data = request.get_json()
-    if 'email' not in data:
-        return jsonify({'error': 'Email is required'}), 400
-    
-    # Find student by email
-    invite_student = Student.query.filter_by(email=data['email']).first()
-    if not invite_student:
-        return jsonify({'error': 'Student not found with this email'}), 404
+    if 'email' not in data and 'student_id' not in data:
+        return jsonify({'error': 'Email or student_id is required'}), 400
+    
+    # Find student by email or id
+    if 'email' in data:
+        invite_student = Student.query.filter_by(email=data['email']).first()
+        if not invite_student:
+            return jsonify({'error': 'Student not found with this email'}), 404
+    else:
+        invite_student = Student.query.get(data['student_id'])
+        if not invite_student:
+            return jsonify({'error': 'Student not found'}), 404
     
     # Check if student is already in a team
     if invite_student.team_id:
         return jsonify({'error': 'Student is already in a team'}), 400
     
-    # TODO: Implement actual email sending logic in a service
-    # For now, just return success
+    # Queue the invitation email and in-app notification; delivery happens in the background
+    send_team_invitation(invite_student.email, team.name, student.name)
+    notify('team_invitation', f"{student.name} invited you to join {team.name}",
+           [(RecipientType.STUDENT, invite_student.id)], team_id=team.id, inviter_id=student.id)
+    db.session.commit()
+    
     return jsonify({
-        'message': f'Invitation sent to {data["email"]}',
+        'message': f'Invitation sent to {invite_student.name}',
         'team': team.to_dict()
     }), 200
 
@@ -174,19 +189,43 @@ def lock_team(team_id):
 @teams_bp.route('/<int:team_id>', methods=['GET'])
 @jwt_required()
 def get_team(team_id):
-    """Get team details"""
-    team = Team.query.get(team_id)
+    """Get team details (?fields=&embed=)"""
+    selection = team_serializer.select_request(request)
+    team = Team.query.options(*selection.options()).filter_by(id=team_id).first()
     if not team:
         return jsonify({'error': 'Team not found'}), 404
     
-    return jsonify(team.to_dict()), 200
+    return jsonify(selection.dump(team)), 200
+
+@teams_bp.route('/<int:team_id>/recommendations', methods=['GET'])
+@jwt_required()
+def get_recommendations(team_id):
+    """Professors and senior mentors best matching the team's ideas (?limit=)"""
+    team = Team.query.get(team_id)
+    if not team:
+        return jsonify({'error': 'Team not found'}), 404
+
+    result = recommend_mentors(team, limit=request.args.get('limit', 5, type=int))
+    if not result['valid']:
+        return jsonify({'error': result['message']}), 400
+
+    return jsonify({
+        'team_id': team.id,
+        'professors': result['professors'],
+        'mentors': result['mentors']
+    }), 200
 
 @teams_bp.route('', methods=['GET'])
 @jwt_required()
 def get_all_teams():
-    """Get all teams"""
-    teams = Team.query.all()
-    return jsonify([team.to_dict() for team in teams]), 200
+    """Get all teams (?fields=&embed=, streamed with ?stream=true or Accept: application/x-ndjson)"""
+    selection = team_serializer.select_request(request)
+    query = Team.query.options(*selection.options())
+    format = streaming_format(request)
+    if format:
+        return stream_response(query, selection, format)
+    teams = query.all()
+    return jsonify(selection.dump_all(teams)), 200
 
 @teams_bp.route('/my-team', methods=['GET'])
 @jwt_required()
@@ -201,5 +240,6 @@ def get_my_team():
     if not student.team_id:
         return jsonify({'error': 'You are not in a team'}), 404
     
-    team = Team.query.get(student.team_id)
-    return jsonify(team.to_dict()), 200 
\ No newline at end of file
+    selection = team_serializer.select_request(request)
+    team = Team.query.options(*selection.options()).filter_by(id=student.team_id).first()
+    return jsonify(selection.dump(team)), 200 
\ No newline at end of file
@@ -0,0 +1,101 @@
+"""
+Response serializers of the models, with their default fields and the
+relationships requests can embed (see app/utils/serialization.py).
+"""
+
+from app.models.idea import Idea
+from app.models.leaderboard import Leaderboard
+from app.models.meeting import Meeting
+from app.models.mentor import Mentor
+from app.models.professor import Professor
+from app.models.student import Student
+from app.models.team import Team
+from app.utils.serialization import Embed, Field, Serializer
+
+def _ids(related):
+    return [item.id for item in related]
+
+def serialize_files(files):
+    """Files with their URLs signed in one batch"""
+    from app.services.storage_service import presigned_urls
+
+    paths = []
+    for file in files:
+        paths.append(file.storage_path)
+        paths.extend(file.preview_paths().values())
+    urls = presigned_urls(paths) if paths else {}
+    return [file.to_dict(urls=urls) for file in files]
+
+student_serializer = Serializer(
+    Student,
+    default=['id', 'name', 'roll_no', 'email', 'year', 'team_id', 'is_team_leader'],
+    exclude=['password_hash'],
+    computed={
+        'is_team_leader': Field(lambda student: student.leading_team is not None, relationships={'leading_team': []})
+    },
+    embeds={'team': Embed('team')}
+)
+
+team_serializer = Serializer(
+    Team,
+    default=['id', 'name', 'is_locked', 'leader_id', 'professor_id', 'senior_mentor_id', 'member_count', 'created_at'],
+    computed={
+        'member_count': Field(lambda team: len(team.members), relationships={'members': []})
+    },
+    embeds={
+        'members': Embed('members'),
+        'leader': Embed('leader'),
+        'professor': Embed('professor'),
+        'senior_mentor': Embed('senior_mentor'),
+        'ideas': Embed('ideas'),
+        'leaderboard': Embed('leaderboard')
+    },
+    default_embeds=['members']
+)
+
+professor_serializer = Serializer(
+    Professor,
+    default=['id', 'name', 'email', 'department', 'expertise', 'accepted_team_count', 'can_accept_more_teams',
+             'mentored_teams'],
+    computed={
+        'can_accept_more_teams': Field(lambda professor: professor.can_accept_more_teams,
+                                       columns=['accepted_team_count']),
+        'mentored_teams': Field(lambda professor: _ids(professor.mentored_teams),
+                                relationships={'mentored_teams': []})
+    },
+    embeds={'teams': Embed('mentored_teams')}
+)
+
+mentor_serializer = Serializer(
+    Mentor,
+    default=['id', 'name', 'email', 'year', 'expertise', 'mentored_teams'],
+    computed={
+        'mentored_teams': Field(lambda mentor: _ids(mentor.mentored_teams), relationships={'mentored_teams': []})
+    },
+    embeds={'teams': Embed('mentored_teams')}
+)
+
+leaderboard_serializer = Serializer(
+    Leaderboard,
+    default=['id', 'team_id', 'team_name', 'meetings_done', 'tasks_done', 'mentor_feedback_count', 'total_score',
+             'updated_at'],
+    computed={
+        'team_name': Field(lambda entry: entry.team.name if entry.team else None, relationships={'team': ['name']})
+    },
+    embeds={'team': Embed('team')}
+)
+
+meeting_serializer = Serializer(
+    Meeting,
+    default=['id', 'title', 'description', 'scheduled_date', 'status', 'feedback', 'team_id', 'professor_id',
+             'mentor_id', 'created_at', 'updated_at'],
+    embeds={'team': Embed('team'), 'professor': Embed('professor'), 'mentor': Embed('mentor')}
+)
+
+idea_serializer = Serializer(
+    Idea,
+    default=['id', 'title', 'description', 'problem_statement', 'solution_approach', 'team_id', 'created_at',
+             'updated_at'],
+    embeds={'team': Embed('team'), 'files': Embed('files', dump=serialize_files)},
+    default_embeds=['files']
+)
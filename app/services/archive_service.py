@@ -0,0 +1,224 @@
+import posixpath
+import queue
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from sqlalchemy.orm import joinedload
+import logging
+from app.models.file import File
+from app.models.idea import Idea
+from app.models.team import Team
+from app.services.storage_service import get_storage_client, split_storage_path, timed
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Bytes requested from storage per read
+ARCHIVE_CHUNK_SIZE = 64 * 1024
+
+# Marks the end of an object in a prefetch queue
+_END = object()
+
+class ArchiveEntry:
+    """A stored file and the path it gets inside the archive"""
+
+    def __init__(self, arcname, storage_path, size, created_at):
+        self.arcname = arcname
+        self.storage_path = storage_path
+        self.size = size
+        self.created_at = created_at
+
+class _ChunkSink:
+    """
+    Write-only, non-seekable file object collecting what ZipFile writes.
+
+    Because it cannot seek, ZipFile writes sizes and CRCs in data
+    descriptors after each entry instead of going back to patch headers,
+    which is what allows the archive to be streamed.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def take(self):
+        """Everything written since the last call, as a list of at most one chunk"""
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return [data] if data else []
+
+def _safe_name(name):
+    """
+    Turn a team, idea or file name into a single archive path component.
+
+    Separators become underscores, and names that are empty or only dots
+    ('.', '..') become 'untitled', so no component can climb out of its
+    folder when the archive is extracted.
+    """
+    name = (name or '').replace('/', '_').replace('\\', '_').replace('\0', '').strip()
+    return name if name.strip('.') else 'untitled'
+
+def _arcname(*components):
+    """Relative archive path of sanitized components, never leaving the archive root"""
+    return '/'.join(_safe_name(component) for component in components)
+
+def _unique_arcnames(entries):
+    """Suffix duplicate paths ('deck (2).pdf') so every entry stays reachable"""
+    seen = {}
+    for entry in entries:
+        count = seen.get(entry.arcname, 0) + 1
+        seen[entry.arcname] = count
+        if count > 1:
+            root, ext = posixpath.splitext(entry.arcname)
+            entry.arcname = f"{root} ({count}){ext}"
+    return entries
+
+def _entries_for_files(files, folder):
+    return [
+        ArchiveEntry(_arcname(folder, file.original_filename), file.storage_path, file.file_size, file.created_at)
+        for file in files
+    ]
+
+def get_idea_archive_entries(idea, folder=None):
+    """Archive entries for the files of one idea"""
+    folder = folder or idea.title
+    files = File.query.filter_by(idea_id=idea.id).order_by(File.id).all()
+    return _unique_arcnames(_entries_for_files(files, folder))
+
+def get_team_archive_entries(team, folder=None):
+    """
+    Archive entries for a team's files and the files of all its ideas.
+
+    Loaded with two queries, so building the entry list does not depend on
+    the number of ideas.
+    """
+    folder = folder or team.name
+    team_files = File.query.filter_by(team_id=team.id).order_by(File.id).all()
+    idea_files = File.query.join(Idea, File.idea_id == Idea.id).options(
+        joinedload(File.idea)
+    ).filter(Idea.team_id == team.id).order_by(Idea.id, File.id).all()
+
+    entries = _entries_for_files(team_files, folder)
+    for file in idea_files:
+        entries.append(ArchiveEntry(
+            _arcname(folder, 'ideas', file.idea.title, file.original_filename),
+            file.storage_path, file.file_size, file.created_at
+        ))
+    return _unique_arcnames(entries)
+
+def get_all_teams_archive_entries():
+    """Archive entries for every team, one top-level folder per team"""
+    entries = []
+    for team in Team.query.order_by(Team.id).all():
+        entries.extend(get_team_archive_entries(team, f"{team.id}-{_safe_name(team.name)}"))
+    return entries
+
+def _put(chunks, item, stop):
+    """Block while the queue is full (this bounds memory), unless the archive was abandoned"""
+    while not stop.is_set():
+        try:
+            chunks.put(item, timeout=1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+def _fetch_object(app, entry, chunks, stop):
+    """Worker: copy one object from storage into its bounded queue"""
+    with app.app_context():
+        response = None
+        try:
+            bucket_name, object_name = split_storage_path(entry.storage_path)
+            with timed('get_object'):
+                response = get_storage_client().get_object(bucket_name, object_name)
+            for data in response.stream(ARCHIVE_CHUNK_SIZE):
+                if not _put(chunks, data, stop):
+                    return
+            _put(chunks, _END, stop)
+        except Exception as e:
+            _put(chunks, e, stop)
+        finally:
+            if response is not None:
+                response.close()
+                response.release_conn()
+
+def stream_archive(entries, prefetch=None):
+    """
+    Generate a ZIP archive of stored objects, chunk by chunk.
+
+    Up to ``prefetch`` objects are downloaded ahead in parallel, each into a
+    queue of at most ARCHIVE_PREFETCH_CHUNKS chunks, so memory use is
+    bounded no matter how large the archive gets and nothing touches disk.
+    Objects missing from storage are skipped and listed in MISSING_FILES.txt
+    at the end of the archive; a storage error in the middle of an object
+    ends the stream.
+
+    Args:
+        entries (list): ArchiveEntry objects, in archive order
+        prefetch (int): Objects fetched ahead (default ARCHIVE_PREFETCH)
+    """
+    app = current_app._get_current_object()
+    config = app.config
+    prefetch = prefetch or config['ARCHIVE_PREFETCH']
+    compression = zipfile.ZIP_DEFLATED if config['ARCHIVE_COMPRESS'] else zipfile.ZIP_STORED
+
+    sink = _ChunkSink()
+    stop = threading.Event()
+    pending = []
+    missing = []
+    executor = ThreadPoolExecutor(max_workers=prefetch, thread_name_prefix='archive-fetch')
+
+    def schedule(index):
+        if index < len(entries):
+            chunks = queue.Queue(maxsize=config['ARCHIVE_PREFETCH_CHUNKS'])
+            executor.submit(_fetch_object, app, entries[index], chunks, stop)
+            pending.append(chunks)
+
+    try:
+        with zipfile.ZipFile(sink, mode='w', compression=compression, allowZip64=True) as archive:
+            for index in range(prefetch):
+                schedule(index)
+
+            for index, entry in enumerate(entries):
+                chunks = pending.pop(0)
+                schedule(index + prefetch)
+
+                first = chunks.get()
+                if isinstance(first, Exception):
+                    logger.error(f"Skipping {entry.storage_path} in archive: {str(first)}")
+                    missing.append(entry.arcname)
+                    continue
+
+                info = zipfile.ZipInfo(entry.arcname, date_time=entry.created_at.timetuple()[:6])
+                info.compress_type = compression
+                info.file_size = entry.size
+                with archive.open(info, mode='w') as member:
+                    data = first
+                    while data is not _END:
+                        if isinstance(data, Exception):
+                            raise data
+                        member.write(data)
+                        yield from sink.take()
+                        data = chunks.get()
+                yield from sink.take()
+
+            if missing:
+                archive.writestr('MISSING_FILES.txt', '\n'.join(missing) + '\n')
+        yield from sink.take()
+    finally:
+        # Also reached when the client disconnects and the generator is closed
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
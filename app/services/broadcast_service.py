@@ -0,0 +1,212 @@
+import json
+import queue
+import threading
+import time
+from datetime import datetime
+from email import policy
+from flask import current_app
+import logging
+from app import db
+from app.models.broadcast import Broadcast, BroadcastStatus
+from app.models.mentor import Mentor
+from app.models.professor import Professor
+from app.models.student import Student
+from app.models.team import Team
+from app.services.email_service import SMTPConnectionPool, build_email_message
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Recipient selectors: each returns a query of (email, name) rows
+AUDIENCES = {
+    'all_students': lambda: db.session.query(Student.email, Student.name),
+    'unteamed_students': lambda: db.session.query(Student.email, Student.name).filter(Student.team_id.is_(None)),
+    'team_leaders': lambda: db.session.query(Student.email, Student.name).join(Team, Team.leader_id == Student.id),
+    'teams_without_professor': lambda: db.session.query(Student.email, Student.name)
+        .join(Team, Student.team_id == Team.id).filter(Team.professor_id.is_(None)),
+    'teams_without_mentor': lambda: db.session.query(Student.email, Student.name)
+        .join(Team, Student.team_id == Team.id).filter(Team.senior_mentor_id.is_(None)),
+    'professors': lambda: db.session.query(Professor.email, Professor.name),
+    'mentors': lambda: db.session.query(Mentor.email, Mentor.name),
+}
+
+# Rendered bodies kept per broadcast; bounded for personalized campaigns
+RENDER_CACHE_SIZE = 1024
+
+def validate_broadcast(data):
+    """Validate broadcast creation data"""
+    required_fields = ['audience', 'subject', 'message']
+
+    # Check if all required fields are present
+    for field in required_fields:
+        if not data.get(field):
+            return {
+                'valid': False,
+                'message': f'Missing required field: {field}'
+            }
+
+    if data['audience'] not in AUDIENCES:
+        return {
+            'valid': False,
+            'message': f'Unknown audience. Allowed audiences: {", ".join(sorted(AUDIENCES))}'
+        }
+
+    return {
+        'valid': True
+    }
+
+class RateLimiter:
+    """Token bucket shared by the sending threads; a rate of 0 disables limiting"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1, rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a send is allowed"""
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+def create_broadcast(audience, subject, message, template='broadcast.html', personalize=False, **kwargs):
+    """Create a queued broadcast; extra keyword arguments become template variables"""
+    broadcast = Broadcast(
+        audience=audience,
+        subject=subject,
+        template=template,
+        personalize=personalize,
+        total_recipients=AUDIENCES[audience]().count()
+    )
+    broadcast.template_context = dict(kwargs, message=message)
+    return broadcast.save()
+
+def render_broadcast_body(broadcast, from_email, variables):
+    """
+    Render a broadcast message once, without a To header.
+
+    The result is sent to every recipient sharing the same variables; only
+    the To header is prepended per recipient.
+    """
+    msg = build_email_message(None, broadcast.subject, broadcast.template, from_email, **variables)
+    return msg.as_bytes(policy=policy.SMTP)
+
+def run_broadcast(broadcast, concurrency=None, rate_limit=None, progress=None):
+    """
+    Send a broadcast over pooled SMTP connections.
+
+    Args:
+        broadcast (Broadcast): The broadcast to send
+        concurrency (int): Number of sending threads, each with its own connection
+        rate_limit (float): Maximum messages per second across all threads (0 = unlimited)
+        progress (callable): Called with the broadcast whenever progress is saved
+
+    Returns:
+        Broadcast: The broadcast with final counts and status
+    """
+    config = current_app.config
+    concurrency = concurrency or config['BROADCAST_CONCURRENCY']
+    rate_limit = config['BROADCAST_RATE_LIMIT'] if rate_limit is None else rate_limit
+    from_email = config['SMTP_FROM_EMAIL']
+
+    # Load recipients up front so progress commits never interrupt an open cursor
+    recipients = AUDIENCES[broadcast.audience]().all()
+    context = broadcast.template_context
+
+    broadcast.status = BroadcastStatus.RUNNING
+    broadcast.started_at = datetime.utcnow()
+    broadcast.total_recipients = len(recipients)
+    broadcast.sent_count = 0
+    broadcast.failed_count = 0
+    db.session.commit()
+
+    smtp_pool = SMTPConnectionPool(config, size=concurrency)
+    limiter = RateLimiter(rate_limit)
+    work = queue.Queue(maxsize=concurrency * 100)
+    counts = {'sent': 0, 'failed': 0, 'error': None, 'aborted': False}
+    counts_lock = threading.Lock()
+
+    def sender():
+        while True:
+            item = work.get()
+            if item is None:
+                return
+            email, body = item
+            limiter.acquire()
+            try:
+                with smtp_pool.connection() as server:
+                    server.sendmail(from_email, [email], f'To: {email}\r\n'.encode() + body)
+            except Exception as e:
+                logger.warning(f"Broadcast {broadcast.id} failed for {email}: {str(e)}")
+                with counts_lock:
+                    counts['failed'] += 1
+                    counts['error'] = str(e)
+            else:
+                with counts_lock:
+                    counts['sent'] += 1
+
+    def save_progress():
+        with counts_lock:
+            broadcast.sent_count = counts['sent']
+            broadcast.failed_count = counts['failed']
+            broadcast.last_error = counts['error']
+        db.session.commit()
+        if progress:
+            progress(broadcast)
+
+    threads = [threading.Thread(target=sender, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+
+    rendered = {}
+    last_saved = time.monotonic()
+    try:
+        for email, name in recipients:
+            variables = dict(context, name=name) if broadcast.personalize else context
+            key = json.dumps(variables, sort_keys=True, default=str)
+            body = rendered.get(key)
+            if body is None:
+                if len(rendered) >= RENDER_CACHE_SIZE:
+                    rendered.clear()
+                body = rendered[key] = render_broadcast_body(broadcast, from_email, variables)
+            work.put((email, body))
+
+            if time.monotonic() - last_saved >= config['BROADCAST_PROGRESS_INTERVAL']:
+                save_progress()
+                last_saved = time.monotonic()
+    except Exception as e:
+        with counts_lock:
+            counts['error'] = str(e)
+            counts['aborted'] = True
+        raise
+    finally:
+        # Let the senders drain what was queued, reporting progress meanwhile
+        for _ in threads:
+            work.put(None)
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(config['BROADCAST_PROGRESS_INTERVAL'])
+                save_progress()
+        smtp_pool.close()
+
+        if counts['aborted'] or (counts['failed'] and not counts['sent']):
+            broadcast.status = BroadcastStatus.FAILED
+        else:
+            broadcast.status = BroadcastStatus.COMPLETED
+        broadcast.finished_at = datetime.utcnow()
+        save_progress()
+
+    logger.info(f"Broadcast {broadcast.id} finished: {counts['sent']} sent, {counts['failed']} failed")
+    return broadcast
@@ -0,0 +1,102 @@
+import json
+from datetime import datetime, timedelta
+from itertools import groupby
+from flask import current_app
+from sqlalchemy import func
+import logging
+from app import db
+from app.models.email_digest import EmailDigestEntry
+from app.services.email_service import queue_email
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Section headings in a digest, per notification kind
+DIGEST_SECTION_TITLES = {
+    'mentor_request': 'Mentorship requests',
+    'request_response': 'Responses to your requests',
+    'team_invitation': 'Team invitations',
+    'meeting_notification': 'Meetings',
+}
+
+def get_due_digest_recipients(cutoff, limit):
+    """Recipients whose oldest buffered notification is older than the cutoff"""
+    rows = db.session.query(EmailDigestEntry.recipient).filter(
+        EmailDigestEntry.digested_at.is_(None)
+    ).group_by(EmailDigestEntry.recipient).having(
+        func.min(EmailDigestEntry.created_at) <= cutoff
+    ).limit(limit).all()
+    return [recipient for recipient, in rows]
+
+def build_digest(recipient, entries):
+    """Queue one email summarizing a recipient's buffered notifications"""
+    sections = []
+    lines = []
+    for kind, items in groupby(sorted(entries, key=lambda e: e.kind), key=lambda e: e.kind):
+        items = [{'subject': e.subject, 'message': json.loads(e.context).get('message', '')} for e in items]
+        title = DIGEST_SECTION_TITLES.get(kind, kind.replace('_', ' ').capitalize())
+        sections.append({'kind': kind, 'title': title, 'count': len(items), 'items': items})
+        lines.append(f"{title} ({len(items)}):")
+        lines.extend(f"- {item['message'] or item['subject']}" for item in items)
+
+    return queue_email(
+        recipient=recipient,
+        subject=f"WisePair: {len(entries)} new notifications",
+        template='digest.html',
+        message='\n'.join(lines),
+        sections=sections
+    )
+
+def flush_due_digests(now=None):
+    """
+    Send digests for every recipient whose buffering window has elapsed.
+
+    Due recipients are found with one aggregate query and all their buffered
+    entries are loaded (and locked) with one more, regardless of how many
+    notifications each recipient has. A recipient with a single buffered
+    notification gets the original email instead of a one-item digest.
+
+    Returns:
+        int: Number of emails queued
+    """
+    config = current_app.config
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(seconds=config['EMAIL_DIGEST_WINDOW_SECONDS'])
+
+    recipients = get_due_digest_recipients(cutoff, config['EMAIL_DIGEST_BATCH_SIZE'])
+    if not recipients:
+        return 0
+
+    entries = db.session.query(
+        EmailDigestEntry.id,
+        EmailDigestEntry.recipient,
+        EmailDigestEntry.kind,
+        EmailDigestEntry.subject,
+        EmailDigestEntry.template,
+        EmailDigestEntry.context
+    ).filter(
+        EmailDigestEntry.recipient.in_(recipients),
+        EmailDigestEntry.digested_at.is_(None)
+    ).order_by(
+        EmailDigestEntry.recipient, EmailDigestEntry.created_at
+    ).with_for_update(skip_locked=True).all()
+
+    queued = 0
+    for recipient, group in groupby(entries, key=lambda e: e.recipient):
+        group = list(group)
+        if len(group) == 1:
+            entry = group[0]
+            queue_email(recipient, entry.subject, entry.template, **json.loads(entry.context))
+        else:
+            build_digest(recipient, group)
+        queued += 1
+
+    # Marked in the same transaction as the queued emails
+    EmailDigestEntry.query.filter(
+        EmailDigestEntry.id.in_([entry.id for entry in entries])
+    ).update({'digested_at': now}, synchronize_session=False)
+    db.session.commit()
+
+    logger.info(f"Queued {queued} digest emails for {len(entries)} notifications")
+    return queued
@@ -1,59 +1,340 @@
+import os
+import queue
+import re
 import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from flask import current_app, render_template
+from functools import lru_cache
+from html import unescape
+from html.parser import HTMLParser
+from flask import current_app
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import Markup, escape
 import logging
+from app import db
+from app.models.email_outbox import EmailOutbox
+from app.models.email_digest import EmailDigestEntry
+from app.utils.circuit_breaker import CircuitBreaker, CircuitOpenError, retry_call
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Email templates live outside Flask's template folder so they can be
+# rendered without an app or request context (e.g. in background workers)
+EMAIL_TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'templates', 'email')
+
+# Breaker failing SMTP sends fast while the server is down (one per process)
+_smtp_breaker = None
+_smtp_breaker_pid = None
+_smtp_breaker_lock = threading.Lock()
+
+# Errors worth another connection attempt: the server was unreachable or hung up
+SMTP_CONNECT_ERRORS = (ConnectionError, TimeoutError, smtplib.SMTPConnectError, smtplib.SMTPServerDisconnected)
+
+def nl2br(value):
+    """Escape text and turn newlines into <br> tags"""
+    return Markup('<br>\n').join(escape(value or '').split('\n'))
+
+@lru_cache(maxsize=None)
+def get_email_environment():
+    """
+    Jinja environment for email templates, created once per process.
+
+    auto_reload is off, so each template is compiled on first use and then
+    served from the environment's cache without checking the file again.
+    """
+    env = Environment(
+        loader=FileSystemLoader(EMAIL_TEMPLATE_DIR),
+        autoescape=select_autoescape(['html']),
+        auto_reload=False,
+        cache_size=-1,
+        trim_blocks=True,
+        lstrip_blocks=True
+    )
+    env.filters['nl2br'] = nl2br
+    return env
+
+def precompile_email_templates():
+    """Compile every email template up front (e.g. when a worker starts)"""
+    env = get_email_environment()
+    for name in env.list_templates(extensions=['html']):
+        env.get_template(name)
+
+class _TextExtractor(HTMLParser):
+    """Collects the readable text of an HTML email for its plain-text part"""
+    BLOCK_TAGS = {'p', 'div', 'br', 'h1', 'h2', 'h3', 'h4', 'tr', 'ul', 'ol', 'blockquote', 'hr'}
+    SKIP_TAGS = {'head', 'style', 'script', 'title'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skip = 0
+        self._href = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip += 1
+        elif tag == 'li':
+            self.parts.append('\n- ')
+        elif tag == 'a':
+            self._href = dict(attrs).get('href')
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip -= 1
+        elif tag == 'a' and self._href:
+            self.parts.append(f' ({self._href})')
+            self._href = None
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(re.sub(r'\s+', ' ', data))
+
+def html_to_text(html):
+    """Derive the plain-text alternative of an HTML email"""
+    extractor = _TextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    lines = (line.strip() for line in unescape(''.join(extractor.parts)).split('\n'))
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip() + '\n'
+
+def render_email(subject, template, **kwargs):
+    """
+    Render an email template.
+
+    Returns:
+        tuple: (html, text) bodies
+    """
+    html = get_email_environment().get_template(template).render(subject=subject, **kwargs)
+    return html, html_to_text(html)
+
+def build_email_message(recipient, subject, template, from_email, **kwargs):
+    """
+    Build the MIME message for an email.
+
+    Args:
+        recipient (str): Recipient email address, or None to leave the To header unset
+        subject (str): Email subject
+        template (str): Name of the HTML template to use
+        from_email (str): Sender address
+        **kwargs: Template variables
+
+    Returns:
+        MIMEMultipart: The message, ready to be handed to an SMTP connection
+    """
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = subject
+    msg['From'] = from_email
+    if recipient:
+        msg['To'] = recipient
+
+    # Plain text first: clients show the last alternative they support
+    html_content, text_content = render_email(subject, template, **kwargs)
+    msg.attach(MIMEText(text_content, 'plain'))
+    msg.attach(MIMEText(html_content, 'html'))
+    return msg
+
+def _connect_smtp(config):
+    server = smtplib.SMTP(config['SMTP_HOST'], config['SMTP_PORT'], timeout=config['SMTP_TIMEOUT'])
+    try:
+        if config['SMTP_USE_TLS']:
+            server.starttls()
+        if config['SMTP_USER']:
+            server.login(config['SMTP_USER'], config['SMTP_PASS'])
+    except Exception:
+        server.close()
+        raise
+    return server
+
+def open_smtp_connection(config):
+    """
+    Open an SMTP connection, upgrading to TLS and logging in when configured.
+
+    Every socket operation times out after SMTP_TIMEOUT seconds, and failed
+    connection attempts are retried up to SMTP_CONNECT_ATTEMPTS times in
+    all with jittered backoff. Messages themselves are never resent here,
+    since a send that timed out may still have been delivered.
+    """
+    return retry_call(
+        lambda: _connect_smtp(config),
+        attempts=config['SMTP_CONNECT_ATTEMPTS'],
+        base_seconds=config['SMTP_RETRY_BASE_SECONDS'],
+        max_seconds=config['SMTP_TIMEOUT'],
+        retry_on=SMTP_CONNECT_ERRORS
+    )
+
+def is_smtp_failure(error):
+    """Whether an error means the SMTP server is unusable, rather than refusing one message"""
+    if isinstance(error, (smtplib.SMTPConnectError, smtplib.SMTPServerDisconnected, smtplib.SMTPAuthenticationError)):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code == 421  # Service not available
+    if isinstance(error, smtplib.SMTPException):
+        return False
+    return isinstance(error, OSError)
+
+def get_smtp_breaker(config):
+    """
+    Circuit breaker guarding SMTP in this process.
+
+    While it is open, sends raise CircuitOpenError at once and a background
+    thread tries to log in every CIRCUIT_RESET_SECONDS.
+    """
+    global _smtp_breaker, _smtp_breaker_pid
+    pid = os.getpid()
+    if _smtp_breaker is None or _smtp_breaker_pid != pid:
+        with _smtp_breaker_lock:
+            if _smtp_breaker is None or _smtp_breaker_pid != pid:
+                probe_config = dict(config)
+
+                def probe():
+                    _connect_smtp(probe_config).quit()
+
+                _smtp_breaker = CircuitBreaker(
+                    'Email delivery',
+                    failure_threshold=config['CIRCUIT_FAILURE_THRESHOLD'],
+                    reset_seconds=config['CIRCUIT_RESET_SECONDS'],
+                    is_failure=is_smtp_failure,
+                    probe=probe
+                )
+                _smtp_breaker_pid = pid
+    return _smtp_breaker
+
+class SMTPConnectionPool:
+    """
+    Small pool of long-lived SMTP connections.
+
+    Connections are opened lazily, kept logged in between messages and
+    checked with NOOP when they have been idle for a while, so the TLS
+    handshake and login are paid once per connection instead of once per email.
+    """
+
+    def __init__(self, config, size=2):
+        self.config = {key: config[key] for key in (
+            'SMTP_HOST', 'SMTP_PORT', 'SMTP_USER', 'SMTP_PASS', 'SMTP_USE_TLS', 'SMTP_TIMEOUT',
+            'SMTP_IDLE_CHECK_SECONDS', 'SMTP_CONNECT_ATTEMPTS', 'SMTP_RETRY_BASE_SECONDS',
+            'CIRCUIT_FAILURE_THRESHOLD', 'CIRCUIT_RESET_SECONDS'
+        )}
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _checkout(self):
+        """Reuse an idle connection if it is still alive, otherwise open a new one"""
+        while True:
+            try:
+                server, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return open_smtp_connection(self.config)
+
+            if time.monotonic() - last_used < self.config['SMTP_IDLE_CHECK_SECONDS']:
+                return server
+            try:
+                if server.noop()[0] == 250:
+                    return server
+            except smtplib.SMTPException:
+                pass
+            self._discard(server)
+
+    @staticmethod
+    def _discard(server):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection for the duration of the block, which counts as
+        one call through the SMTP circuit breaker
+        """
+        breaker = get_smtp_breaker(self.config)
+        breaker.check()  # Fail fast rather than wait for a slot
+        self._slots.acquire()
+        server = None
+        try:
+            with breaker.guard():
+                server = self._checkout()
+                yield server
+        except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+            # The server answered, so the session is still usable once reset
+            if server is not None:
+                try:
+                    server.rset()
+                    self._idle.put((server, time.monotonic()))
+                except smtplib.SMTPException:
+                    self._discard(server)
+                server = None
+            raise
+        except Exception:
+            if server is not None:
+                self._discard(server)
+                server = None
+            raise
+        finally:
+            if server is not None:
+                self._idle.put((server, time.monotonic()))
+            self._slots.release()
+
+    def close(self):
+        """Close all idle connections"""
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(server)
+
 def send_email(recipient, subject, template, **kwargs):
     """
-    Send an email using the configured SMTP server.
-    
+    Send an email immediately using the configured SMTP server.
+
+    This blocks on SMTP, so request handlers should use queue_email instead.
+
     Args:
         recipient (str): Recipient email address
         subject (str): Email subject
         template (str): Name of the HTML template to use
         **kwargs: Template variables
-    
+
     Returns:
         dict: {'success': bool, 'message': str}
     """
     try:
-        # Get SMTP configuration from app config
-        smtp_host = current_app.config['SMTP_HOST']
-        smtp_port = current_app.config['SMTP_PORT']
-        smtp_user = current_app.config['SMTP_USER']
-        smtp_pass = current_app.config['SMTP_PASS']
-        from_email = current_app.config['SMTP_FROM_EMAIL']
-        
-        # Create message
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = subject
-        msg['From'] = from_email
-        msg['To'] = recipient
-        
-        # Create the HTML content (normally would render a template)
-        # Since we haven't implemented templates yet, we'll use a simple HTML message
-        html_content = f"<html><body><h2>{subject}</h2><p>{kwargs.get('message', '')}</p></body></html>"
-        
-        # Attach HTML content
-        msg.attach(MIMEText(html_content, 'html'))
-        
+        msg = build_email_message(
+            recipient, subject, template, current_app.config['SMTP_FROM_EMAIL'], **kwargs
+        )
+
         # Send email
-        with smtplib.SMTP(smtp_host, smtp_port) as server:
-            server.starttls()
-            server.login(smtp_user, smtp_pass)
-            server.send_message(msg)
-        
+        with get_smtp_breaker(current_app.config).guard():
+            server = open_smtp_connection(current_app.config)
+            try:
+                server.send_message(msg)
+            finally:
+                server.quit()
+
         logger.info(f"Email sent to {recipient} with subject: {subject}")
         return {
             'success': True,
             'message': 'Email sent successfully'
         }
-    
+
+    except CircuitOpenError as e:
+        return {
+            'success': False,
+            'status': 503,
+            'message': str(e)
+        }
     except Exception as e:
         logger.error(f"Error sending email: {str(e)}")
         return {
@@ -61,45 +342,95 @@ def send_email(recipient, subject, template, **kwargs):
             'message': f"Failed to send email: {str(e)}"
         }
 
+def queue_email(recipient, subject, template, **kwargs):
+    """
+    Queue an email in the outbox for background delivery.
+
+    The entry is only added to the session; it is committed together with
+    the caller's own changes, so the email goes out if and only if the
+    triggering change is saved.
+
+    Returns:
+        EmailOutbox: The queued entry
+    """
+    entry = EmailOutbox(
+        recipient=recipient,
+        subject=subject,
+        template=template,
+        next_attempt_at=datetime.utcnow()
+    )
+    entry.template_context = kwargs
+    db.session.add(entry)
+    return entry
+
+def queue_notification(kind, recipient, subject, template, **kwargs):
+    """
+    Queue a notification email, coalescing bursts into a per-recipient digest.
+
+    Notifications are buffered for EMAIL_DIGEST_WINDOW_SECONDS after the first
+    one a recipient receives and then sent as a single digest. Urgent kinds
+    (EMAIL_DIGEST_URGENT_KINDS) skip the buffer and go straight to the outbox.
+
+    Returns:
+        EmailOutbox or EmailDigestEntry: The queued entry
+    """
+    config = current_app.config
+    if not config['EMAIL_DIGEST_WINDOW_SECONDS'] or kind in config['EMAIL_DIGEST_URGENT_KINDS']:
+        return queue_email(recipient, subject, template, **kwargs)
+
+    entry = EmailDigestEntry(
+        recipient=recipient,
+        kind=kind,
+        subject=subject,
+        template=template
+    )
+    entry.template_context = kwargs
+    db.session.add(entry)
+    return entry
+
 def send_team_invitation(recipient_email, team_name, inviter_name):
-    """Send an email invitation to join a team"""
+    """Queue a notification inviting a student to join a team"""
     subject = f"Invitation to join team {team_name}"
     message = f"You've been invited by {inviter_name} to join the team '{team_name}' on WisePair."
-    
-    return send_email(
+
+    return queue_notification(
+        'team_invitation',
         recipient=recipient_email,
         subject=subject,
-        template='team_invitation.html',  # This would be the template if implemented
+        template='team_invitation.html',
         message=message,
         team_name=team_name,
         inviter_name=inviter_name
     )
 
 def send_mentor_request(recipient_email, team_name, message=None):
-    """Send an email to a professor/mentor for mentorship request"""
+    """Queue a mentorship request notification to a professor/mentor"""
     subject = f"Mentorship Request from team {team_name}"
     email_message = f"Team '{team_name}' has requested your mentorship on WisePair."
-    
+
     if message:
         email_message += f"\n\nMessage from team: {message}"
-    
-    return send_email(
+
+    return queue_notification(
+        'mentor_request',
         recipient=recipient_email,
         subject=subject,
-        template='mentor_request.html',  # This would be the template if implemented
+        template='mentor_request.html',
         message=email_message,
-        team_name=team_name
+        team_name=team_name,
+        team_message=message
     )
 
 def send_request_response(recipient_email, team_name, status, responder_name):
-    """Send an email about mentor/professor response to request"""
+    """Queue a notification about the mentor/professor response to a request"""
     subject = f"Mentorship Request {status.capitalize()}"
     message = f"Your mentorship request to {responder_name} for team '{team_name}' has been {status}."
-    
-    return send_email(
+
+    return queue_notification(
+        'request_response',
         recipient=recipient_email,
         subject=subject,
-        template='request_response.html',  # This would be the template if implemented
+        template='request_response.html',
         message=message,
         team_name=team_name,
         status=status,
@@ -107,16 +438,17 @@ def send_request_response(recipient_email, team_name, status, responder_name):
     )
 
 def send_meeting_notification(recipient_email, meeting_title, team_name, scheduled_date):
-    """Send a meeting notification email"""
+    """Queue a meeting notification (urgent by default, never digested)"""
     subject = f"Meeting Scheduled: {meeting_title}"
     message = f"A meeting '{meeting_title}' has been scheduled for team '{team_name}' on {scheduled_date}."
-    
-    return send_email(
+
+    return queue_notification(
+        'meeting_notification',
         recipient=recipient_email,
         subject=subject,
-        template='meeting_notification.html',  # This would be the template if implemented
+        template='meeting_notification.html',
         message=message,
         meeting_title=meeting_title,
         team_name=team_name,
         scheduled_date=scheduled_date
-    ) 
\ No newline at end of file
+    )
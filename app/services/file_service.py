@@ -1,61 +1,210 @@
+import atexit
+import json
 import os
+import re
+import tempfile
+import threading
+import time
 import uuid
-from minio import Minio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from minio.error import S3Error
+from sqlalchemy import case, func
+from sqlalchemy.dialects import postgresql, sqlite
 from werkzeug.utils import secure_filename
 from flask import current_app
 import logging
+from app import db
+from app.models.direct_upload import DirectUpload, DirectUploadStatus
+from app.models.file import File
+from app.models.idea import Idea
+from app.models.resumable_upload import ResumableUpload, ResumableUploadStatus
+from app.models.stored_object import StoredObject
+from app.services.preview_service import DERIVATIVES, derivative_path, initial_preview_status
+from app.services.quota_service import (
+    charge_storage, check_storage_quota, file_owner_team_id, reconcile_storage_usage, release_storage
+)
+from app.services.storage_service import (
+    abort_multipart_upload, check_storage_available, complete_multipart_upload, create_multipart_upload,
+    ensure_bucket, get_storage_client, presigned_upload, split_storage_path, stat_stored_object, supports_presigned_uploads,
+    timed, upload_part
+)
+from app.utils.circuit_breaker import CircuitOpenError
+from app.utils.streaming import READ_CHUNK_SIZE, ChecksumMismatch, HashingReader, UploadTooLarge
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Allowed file extensions
-ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg', 'doc', 'docx', 'ppt', 'pptx', 'xls', 'xlsx', 'txt', 'zip'}
+ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg', 'doc', 'docx', 'ppt', 'pptx', 'xls', 'xlsx', 'txt', 'zip',
+                      'mp4', 'mov', 'webm'}
+
+# Allowance for multipart boundaries and headers when comparing a request's
+# Content-Length against the upload size limit
+MULTIPART_OVERHEAD = 64 * 1024
+
+# Checksums clients may announce in the X-Content-SHA256 header
+SHA256_PATTERN = re.compile(r'^[0-9a-f]{64}$')
 
 def allowed_file(filename):
     """Check if file extension is allowed"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def validate_file_upload(file):
-    """Validate file upload"""
+def format_size_limit(size):
+    """Human readable upload size limit, e.g. '10MB'"""
+    return f"{size // (1024 * 1024)}MB"
+
+def validate_file_upload(file, content_length=None, expected_sha256=None):
+    """
+    Validate file upload before any of it is read.
+
+    The file's own size is only known once it has been streamed, so the size
+    limit is enforced during the upload; a request whose Content-Length is
+    already over the limit is rejected here without reading the body.
+    """
     # Check if file is allowed
     if not allowed_file(file.filename):
         return {
             'valid': False,
-            'message': f'File type not allowed. Allowed types: {", ".join(ALLOWED_EXTENSIONS)}'
+            'message': f'File type not allowed. Allowed types: {", ".join(sorted(ALLOWED_EXTENSIONS))}'
         }
     
-    # Check file size (limit to 10MB)
-    file.seek(0, os.SEEK_END)
-    file_size = file.tell()
-    file.seek(0)  # Reset file pointer to beginning
+    max_size = current_app.config['MAX_UPLOAD_SIZE']
+    if content_length and content_length > max_size + MULTIPART_OVERHEAD:
+        return {
+            'valid': False,
+            'status': 413,
+            'message': f'File size exceeds the {format_size_limit(max_size)} limit'
+        }
     
-    if file_size > 10 * 1024 * 1024:  # 10MB in bytes
+    if expected_sha256 is not None and not SHA256_PATTERN.match(expected_sha256):
         return {
             'valid': False,
-            'message': 'File size exceeds the 10MB limit'
+            'message': 'X-Content-SHA256 must be a hex encoded SHA-256 digest'
         }
     
     return {
         'valid': True
     }
 
+def validate_upload_quota(team_id, content_length=None):
+    """
+    Reject an upload up front when the team's quota has no room for it.
+
+    The request's Content-Length minus multipart overhead is a lower bound
+    on the file size; the exact size is charged once the file is stored.
+    """
+    incoming = max((content_length or 0) - MULTIPART_OVERHEAD, 0)
+    return check_storage_quota(team_id, incoming)
+
 def get_minio_client():
-    """Get MinIO client from configuration"""
+    """Get the shared MinIO client of this process"""
     try:
-        return Minio(
-            current_app.config['MINIO_ENDPOINT'],
-            access_key=current_app.config['MINIO_ACCESS_KEY'],
-            secret_key=current_app.config['MINIO_SECRET_KEY'],
-            secure=False  # Set to True for HTTPS
-        )
+        return get_storage_client()
     except Exception as e:
         logger.error(f"Error creating MinIO client: {str(e)}")
         return None
 
-def upload_file_to_minio(file, prefix='general'):
-    """Upload file to MinIO and return storage information"""
+def acquire_object(checksum):
+    """
+    Take a reference on already stored content, if there is any.
+
+    The increment is a single conditional UPDATE, so it cannot interleave
+    with the garbage collector deleting the same zero-reference object.
+
+    Returns:
+        StoredObject: The object now referenced once more, or None
+    """
+    updated = StoredObject.query.filter_by(checksum=checksum).update(
+        {'ref_count': StoredObject.ref_count + 1, 'orphaned_at': None},
+        synchronize_session=False
+    )
+    if not updated:
+        return None
+    return StoredObject.query.filter_by(checksum=checksum).populate_existing().first()
+
+def register_object(checksum, storage_path, size, content_type):
+    """
+    Record newly written content with one reference.
+
+    If the same content was registered concurrently, that row wins and gets
+    the reference instead (INSERT ... ON CONFLICT DO UPDATE); the caller can
+    tell by comparing storage paths.
+    """
+    row = {'checksum': checksum, 'storage_path': storage_path, 'size': size,
+           'content_type': content_type, 'ref_count': 1}
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        now = datetime.utcnow()
+        upsert = (postgresql if dialect == 'postgresql' else sqlite).insert(StoredObject)
+        db.session.execute(upsert.values(created_at=now, updated_at=now, **row).on_conflict_do_update(
+            index_elements=['checksum'],
+            set_={'ref_count': StoredObject.ref_count + 1, 'orphaned_at': None, 'updated_at': now}
+        ))
+    elif not acquire_object(checksum):
+        db.session.add(StoredObject(**row))
+        db.session.flush()
+    return StoredObject.query.filter_by(checksum=checksum).populate_existing().first()
+
+def release_object(object_id):
+    """Drop one reference; objects reaching zero are left for the garbage collector"""
+    StoredObject.query.filter_by(id=object_id).update({
+        'ref_count': StoredObject.ref_count - 1,
+        'orphaned_at': case((StoredObject.ref_count <= 1, datetime.utcnow()), else_=StoredObject.orphaned_at)
+    }, synchronize_session=False)
+
+def remove_stored_file(storage_path, derivatives=False):
+    """Best-effort removal of an object (and optionally its previews) from storage"""
+    if derivatives:
+        for name in DERIVATIVES:
+            remove_stored_file(derivative_path(storage_path, name))
+    bucket_name, object_name = split_storage_path(storage_path)
+    try:
+        with timed('remove_object'):
+            get_storage_client().remove_object(bucket_name, object_name)
+        return True
+    except Exception as e:
+        logger.error(f"Error removing {storage_path} from storage: {str(e)}")
+        return False
+
+def _stored_result(stored, original_filename, deduplicated):
+    bucket_name, object_name = split_storage_path(stored.storage_path)
+    return {
+        'success': True,
+        'filename': object_name,
+        'original_filename': original_filename,
+        'size': stored.size,
+        'checksum': stored.checksum,
+        'path': stored.storage_path,
+        'object_id': stored.id,
+        'deduplicated': deduplicated
+    }
+
+def upload_file_to_minio(file, expected_sha256=None):
+    """
+    Stream a file to content-addressed storage and return storage information.
+
+    ``file`` is either a StreamedFile read straight from the request body or
+    any object with ``filename``, ``content_type`` and ``read``. Size and
+    SHA-256 are computed as the bytes go past, and content that is already
+    stored is not written again: the new file just takes a reference on the
+    existing object.
+
+    A duplicate is detected before writing when the file fits in one part
+    (it is hashed in memory first), or when the client announced the
+    checksum as ``expected_sha256`` (verified as the body is read). Larger
+    files without one are streamed as a multipart upload of UPLOAD_PART_SIZE
+    parts, up to UPLOAD_PARALLEL_PARTS in flight, and deduplicated
+    afterwards, so memory use is bounded by those settings whatever the
+    file size.
+
+    Reference counts are changed in the current session; the caller commits
+    them together with the File row. While storage is down CircuitOpenError
+    is raised before the body is read.
+    """
+    config = current_app.config
+    check_storage_available()
     try:
         minio_client = get_minio_client()
         if not minio_client:
@@ -67,55 +216,870 @@ def upload_file_to_minio(file, prefix='general'):
         # Get bucket name from config
         bucket_name = current_app.config['MINIO_BUCKET_NAME']
         
-        # Check if bucket exists, if not create it
-        if not minio_client.bucket_exists(bucket_name):
-            minio_client.make_bucket(bucket_name)
-            logger.info(f"Created bucket: {bucket_name}")
+        # No-op after startup: the bucket is checked once per process
+        ensure_bucket(bucket_name)
         
-        # Secure the filename and add UUID to avoid collisions
         original_filename = secure_filename(file.filename)
-        file_extension = os.path.splitext(original_filename)[1]
-        unique_filename = f"{prefix}/{str(uuid.uuid4())}{file_extension}"
         
-        # Get file size
-        file.seek(0, os.SEEK_END)
-        file_size = file.tell()
-        file.seek(0)  # Reset file pointer
+        # Read through a wrapper that enforces the size limit and hashes on the fly
+        chunks = file.iter_chunks() if hasattr(file, 'iter_chunks') else iter(lambda: file.read(64 * 1024), b'')
+        reader = HashingReader(chunks, max_size=config['MAX_UPLOAD_SIZE'], expected_sha256=expected_sha256)
         
-        # Upload file
-        minio_client.put_object(
-            bucket_name,
-            unique_filename,
-            file,
-            file_size,
-            content_type=file.content_type
-        )
+        # Announced content we already have: read (and verify) the body, write nothing
+        if expected_sha256:
+            stored = acquire_object(expected_sha256)
+            if stored:
+                while reader.read(READ_CHUNK_SIZE):
+                    pass
+                return _stored_result(stored, original_filename, deduplicated=True)
         
-        # Generate public URL (valid for 7 days)
-        url = minio_client.presigned_get_object(
-            bucket_name,
-            unique_filename,
-            expires=7*24*60*60  # 7 days in seconds
-        )
+        # Small files are hashed before anything is written
+        part_size = config['UPLOAD_PART_SIZE']
+        if reader.prefetch(part_size):
+            stored = acquire_object(reader.sha256)
+            if stored:
+                return _stored_result(stored, original_filename, deduplicated=True)
+        
+        # Keys are unique per write, so collecting an old copy of some content
+        # can never remove a newer copy of it
+        object_name = f"objects/{uuid.uuid4().hex}"
+        storage_path = f"{bucket_name}/{object_name}"
         
+        # Small files go up in one request; larger ones as a parallel multipart
+        # upload of unknown length, which MinIO aborts on failure
+        with timed('put_object'):
+            minio_client.put_object(
+                bucket_name,
+                object_name,
+                reader,
+                length=reader.size if reader.exhausted else -1,
+                content_type=file.content_type,
+                part_size=part_size,
+                num_parallel_uploads=config['UPLOAD_PARALLEL_PARTS']
+            )
+        
+        stored = register_object(reader.sha256, storage_path, reader.size, file.content_type)
+        if stored.storage_path != storage_path:
+            # Same content was already stored (or registered while we streamed)
+            remove_stored_file(storage_path)
+            return _stored_result(stored, original_filename, deduplicated=True)
+        
+        return _stored_result(stored, original_filename, deduplicated=False)
+    
+    except UploadTooLarge:
+        db.session.rollback()
         return {
-            'success': True,
-            'filename': unique_filename,
-            'original_filename': original_filename,
-            'size': file_size,
-            'path': f"{bucket_name}/{unique_filename}",
-            'public_url': url
+            'success': False,
+            'status': 413,
+            'message': f"File size exceeds the {format_size_limit(config['MAX_UPLOAD_SIZE'])} limit"
         }
-    
+    except ChecksumMismatch as e:
+        db.session.rollback()
+        return {
+            'success': False,
+            'status': 400,
+            'message': str(e)
+        }
+    except CircuitOpenError:
+        db.session.rollback()
+        raise
     except S3Error as e:
+        db.session.rollback()
         logger.error(f"S3 Error uploading file: {str(e)}")
         return {
             'success': False,
             'message': f"Storage error: {str(e)}"
         }
     except Exception as e:
+        db.session.rollback()
         logger.error(f"Error uploading file: {str(e)}")
         return {
             'success': False,
             'message': f"Unexpected error: {str(e)}"
-        } 
\ No newline at end of file
+        }
+
+def discard_upload(storage_result):
+    """
+    Undo an upload whose File will not be created (e.g. over quota).
+
+    Rolls back the reference taken in the session and removes the object if
+    this upload wrote it.
+    """
+    db.session.rollback()
+    if not storage_result['deduplicated']:
+        remove_stored_file(storage_result['path'])
+
+def _owner_team_id(team_id, idea_id):
+    return team_id if team_id is not None else db.session.get(Idea, idea_id).team_id
+
+def validate_batch_upload(content_length=None):
+    """Reject a multi-file upload whose Content-Length is over the combined limit, before reading it"""
+    config = current_app.config
+    max_size = config['MAX_UPLOAD_SIZE'] * config['BATCH_UPLOAD_MAX_FILES']
+    if content_length and content_length > max_size + MULTIPART_OVERHEAD:
+        return {
+            'valid': False,
+            'status': 413,
+            'message': f'Upload exceeds the {format_size_limit(max_size)} limit for one request'
+        }
+    
+    return {
+        'valid': True
+    }
+
+def _spool_file(file, max_size, memory_size):
+    """Copy a streamed file into a temporary file (in memory up to ``memory_size``), hashing it on the way"""
+    reader = HashingReader(file.iter_chunks(), max_size=max_size)
+    spool = tempfile.SpooledTemporaryFile(max_size=memory_size)
+    try:
+        while True:
+            data = reader.read(READ_CHUNK_SIZE)
+            if not data:
+                break
+            spool.write(data)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool, reader.sha256, reader.size
+
+def _write_spooled_file(app, spool, storage_path, size, content_type, slots):
+    """Worker: write one spooled file to storage; touches no database state"""
+    try:
+        with app.app_context():
+            bucket_name, object_name = split_storage_path(storage_path)
+            with timed('put_object'):
+                get_storage_client().put_object(
+                    bucket_name, object_name, spool, length=size, content_type=content_type,
+                    part_size=app.config['UPLOAD_PART_SIZE'],
+                    num_parallel_uploads=app.config['UPLOAD_PARALLEL_PARTS']
+                )
+    finally:
+        spool.close()
+        slots.release()
+
+def _batch_error(status, message):
+    return {'success': False, 'status': status, 'message': message}
+
+def upload_files_batch(files, team_id=None, idea_id=None, all_or_nothing=False):
+    """
+    Store the files of one multipart request and create all their File rows
+    in a single transaction.
+
+    Files arrive one after another on the connection. Each is spooled to a
+    temporary file while it is hashed, then written to storage by a pool of
+    BATCH_UPLOAD_CONCURRENCY threads while the next one is read; at most
+    that many files are held at once, so a slow storage write holds back
+    reading rather than piling up data. Content that is already stored is
+    deduplicated as in upload_file_to_minio. Storage writes touch no
+    database state: reference counts and File rows are all added from this
+    thread and committed together. Each file is charged to the team's
+    storage quota; files that do not fit fail with 413.
+
+    With ``all_or_nothing`` a failure of any file rolls back the transaction
+    and removes everything written, so either every file is stored or none.
+
+    Args:
+        files (iterable): StreamedFile objects (e.g. from iter_streamed_files)
+        team_id (int): Team the files belong to
+        idea_id (int): Idea the files belong to
+        all_or_nothing (bool): Store no file unless all of them succeed
+
+    Returns:
+        dict: 'success' (True if any file was stored), 'status' (201 when all
+        were stored, 207 when some failed, else the first failure's status)
+        and 'results', one per file part in request order, each with
+        'original_filename', 'success' and either 'file' (File) or
+        'status' and 'message'. If the body could not be read to the end,
+        nothing is stored and 'message' says why.
+    """
+    app = current_app._get_current_object()
+    config = app.config
+    bucket_name = config['MINIO_BUCKET_NAME']
+    concurrency = config['BATCH_UPLOAD_CONCURRENCY']
+    check_storage_available()
+    ensure_bucket(bucket_name)
+    
+    entries = []
+    written = []  # Storage paths written by this request
+    failed = False
+    slots = threading.BoundedSemaphore(concurrency)
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='batch-upload')
+    try:
+        for file in files:
+            entry = {'original_filename': secure_filename(file.filename or ''), 'content_type': file.content_type}
+            entries.append(entry)
+            if len(entries) > config['BATCH_UPLOAD_MAX_FILES']:
+                entry['result'] = _batch_error(400, f"At most {config['BATCH_UPLOAD_MAX_FILES']} files per request")
+            elif not file.filename:
+                entry['result'] = _batch_error(400, 'No file selected')
+            elif not allowed_file(file.filename):
+                entry['result'] = _batch_error(
+                    400, f'File type not allowed. Allowed types: {", ".join(sorted(ALLOWED_EXTENSIONS))}'
+                )
+            elif failed and all_or_nothing:
+                entry['result'] = _batch_error(424, 'Not stored because another file failed')
+            if 'result' in entry:
+                failed = True
+                continue
+            
+            slots.acquire()
+            try:
+                spool, entry['checksum'], entry['size'] = _spool_file(
+                    file, config['MAX_UPLOAD_SIZE'], config['UPLOAD_PART_SIZE']
+                )
+            except UploadTooLarge:
+                slots.release()
+                entry['result'] = _batch_error(
+                    413, f"File size exceeds the {format_size_limit(config['MAX_UPLOAD_SIZE'])} limit"
+                )
+                failed = True
+                continue
+            
+            entry['stored'] = acquire_object(entry['checksum'])
+            if entry['stored']:
+                spool.close()
+                slots.release()
+                continue
+            
+            entry['path'] = f"{bucket_name}/objects/{uuid.uuid4().hex}"
+            entry['future'] = executor.submit(
+                _write_spooled_file, app, spool, entry['path'], entry['size'], file.content_type, slots
+            )
+        
+        for entry in entries:
+            future = entry.get('future')
+            if future is None:
+                continue
+            try:
+                future.result()
+            except CircuitOpenError as e:
+                entry['result'] = _batch_error(503, str(e))
+                failed = True
+                continue
+            except Exception as e:
+                logger.error(f"Storage error in batch upload: {str(e)}")
+                entry['result'] = _batch_error(500, f"Storage error: {str(e)}")
+                failed = True
+                continue
+            written.append(entry['path'])
+            entry['stored'] = register_object(entry['checksum'], entry['path'], entry['size'], entry['content_type'])
+    except Exception as e:
+        # The request body could not be read to the end: nothing is kept
+        db.session.rollback()
+        executor.shutdown(wait=True)
+        for entry in entries:
+            if entry.get('future') is not None and entry['future'].exception() is None:
+                remove_stored_file(entry['path'])
+        logger.error(f"Batch upload failed: {str(e)}")
+        return {'success': False, 'status': 400, 'message': f'Could not read the upload: {str(e)}', 'results': []}
+    finally:
+        executor.shutdown(wait=True)
+    
+    # Charged in request order, each against the quota left by the ones before
+    owner_team_id = _owner_team_id(team_id, idea_id)
+    for entry in entries:
+        if 'result' in entry or (failed and all_or_nothing):
+            continue
+        if not charge_storage(owner_team_id, entry['stored'].size):
+            release_object(entry['stored'].id)
+            entry['result'] = _batch_error(413, 'Team storage quota exceeded')
+            failed = True
+    
+    if failed and all_or_nothing:
+        db.session.rollback()
+        for path in written:
+            remove_stored_file(path)
+        for entry in entries:
+            entry.setdefault('result', _batch_error(424, 'Not stored because another file failed'))
+    else:
+        for entry in entries:
+            if 'result' in entry:
+                continue
+            stored = entry['stored']
+            file_type = os.path.splitext(entry['original_filename'])[1]
+            entry['file'] = File(
+                filename=split_storage_path(stored.storage_path)[1],
+                original_filename=entry['original_filename'],
+                file_type=file_type,
+                file_size=stored.size,
+                checksum=stored.checksum,
+                object_id=stored.id,
+                deduplicated=stored.storage_path != entry.get('path'),
+                storage_path=stored.storage_path,
+                preview_status=initial_preview_status(file_type),
+                team_id=team_id,
+                idea_id=idea_id
+            )
+            db.session.add(entry['file'])
+            entry['result'] = {'success': True, 'file': entry['file']}
+        db.session.commit()
+        
+        # Copies that lost a race to register the same content
+        for entry in entries:
+            if entry.get('path') in written and entry['stored'].storage_path != entry['path']:
+                remove_stored_file(entry['path'])
+    
+    results = [{'original_filename': entry['original_filename'], **entry['result']} for entry in entries]
+    stored_count = sum(1 for result in results if result['success'])
+    if stored_count == len(results):
+        status = 201
+    elif stored_count:
+        status = 207
+    else:
+        status = next((result['status'] for result in results if result['status'] != 424), 400)
+    return {'success': bool(stored_count), 'status': status, 'results': results}
+
+def validate_direct_upload(data):
+    """Validate a request for a presigned direct upload"""
+    if not supports_presigned_uploads():
+        return {
+            'valid': False,
+            'status': 501,
+            'message': 'Direct uploads are not available with this storage backend; upload through the API instead'
+        }
+    
+    filename = data.get('filename')
+    if not filename or not allowed_file(filename):
+        return {
+            'valid': False,
+            'message': f'File type not allowed. Allowed types: {", ".join(sorted(ALLOWED_EXTENSIONS))}'
+        }
+    
+    if not data.get('content_type'):
+        return {
+            'valid': False,
+            'message': 'content_type is required'
+        }
+    
+    if data.get('method', 'post') not in ('post', 'put'):
+        return {
+            'valid': False,
+            'message': "method must be 'post' or 'put'"
+        }
+    
+    size = data.get('size')
+    max_size = current_app.config['MAX_UPLOAD_SIZE']
+    if size is not None and (not isinstance(size, int) or size < 1):
+        return {
+            'valid': False,
+            'message': 'size must be a positive number of bytes'
+        }
+    if size is not None and size > max_size:
+        return {
+            'valid': False,
+            'status': 413,
+            'message': f'File size exceeds the {format_size_limit(max_size)} limit'
+        }
+    
+    return {
+        'valid': True
+    }
+
+def create_direct_upload(student, data, team_id=None, idea_id=None):
+    """
+    Record a pending direct upload and presign the request for it.
+
+    The client sends the bytes straight to storage; nothing passes through
+    the app until complete_direct_upload is called.
+
+    Returns:
+        tuple: (DirectUpload, presigned request dict)
+    """
+    config = current_app.config
+    ensure_bucket()
+    expires = timedelta(seconds=config['DIRECT_UPLOAD_EXPIRY_SECONDS'])
+    method = data.get('method', 'post')
+    
+    upload = DirectUpload(
+        student_id=student.id,
+        team_id=team_id,
+        idea_id=idea_id,
+        storage_path=f"{config['MINIO_BUCKET_NAME']}/objects/{uuid.uuid4().hex}",
+        original_filename=secure_filename(data['filename']),
+        content_type=data['content_type'],
+        declared_size=data.get('size'),
+        method=method,
+        expires_at=datetime.utcnow() + expires
+    )
+    max_size = upload.declared_size or config['MAX_UPLOAD_SIZE']
+    request = presigned_upload(upload.storage_path, upload.content_type, max_size, expires, method)
+    upload.save()
+    return upload, request
+
+def complete_direct_upload(upload):
+    """
+    Verify a directly uploaded object with a HEAD request and create its File.
+
+    Objects that break the limits a presigned PUT could not enforce are
+    removed. Their content is never read here, so direct uploads are not
+    deduplicated and each File owns its object.
+
+    Returns:
+        dict: {'success': True, 'file': File} or {'success': False, 'status', 'message'}
+    """
+    config = current_app.config
+    try:
+        stat = stat_stored_object(upload.storage_path)
+    except S3Error as e:
+        if e.code in ('NoSuchKey', 'NoSuchObject'):
+            return {'success': False, 'status': 400, 'message': 'File has not been uploaded yet'}
+        logger.error(f"S3 Error checking upload: {str(e)}")
+        return {'success': False, 'status': 500, 'message': f"Storage error: {str(e)}"}
+    
+    problem = None
+    if stat.size > config['MAX_UPLOAD_SIZE']:
+        problem = (413, f"File size exceeds the {format_size_limit(config['MAX_UPLOAD_SIZE'])} limit")
+    elif upload.declared_size is not None and stat.size != upload.declared_size:
+        problem = (400, 'Uploaded size does not match the declared size')
+    elif (stat.content_type or '').split(';')[0] != upload.content_type.split(';')[0]:
+        problem = (400, 'Uploaded content type does not match the declared type')
+    if problem:
+        remove_stored_file(upload.storage_path)
+        upload.status = DirectUploadStatus.EXPIRED
+        db.session.commit()
+        return {'success': False, 'status': problem[0], 'message': problem[1]}
+    
+    # Claimed with a conditional UPDATE so a repeated completion cannot create a second File
+    claimed = DirectUpload.query.filter_by(id=upload.id, status=DirectUploadStatus.PENDING).update(
+        {'status': DirectUploadStatus.COMPLETED}, synchronize_session=False
+    )
+    if not claimed:
+        db.session.rollback()
+        return {'success': False, 'status': 400, 'message': 'Upload is already completed'}
+    
+    if not charge_storage(_owner_team_id(upload.team_id, upload.idea_id), stat.size):
+        db.session.rollback()
+        remove_stored_file(upload.storage_path)
+        upload.status = DirectUploadStatus.EXPIRED
+        db.session.commit()
+        return {'success': False, 'status': 413, 'message': 'Team storage quota exceeded'}
+    
+    file = _file_for_upload(upload, stat.size)
+    upload.status = DirectUploadStatus.COMPLETED
+    upload.file_id = file.id
+    db.session.commit()
+    return {'success': True, 'file': file}
+
+def _file_for_upload(upload, size):
+    """Add the File for a finished direct or resumable upload, which owns its object"""
+    file_type = os.path.splitext(upload.original_filename)[1]
+    file = File(
+        filename=split_storage_path(upload.storage_path)[1],
+        original_filename=upload.original_filename,
+        file_type=file_type,
+        file_size=size,
+        storage_path=upload.storage_path,
+        preview_status=initial_preview_status(file_type),
+        team_id=upload.team_id,
+        idea_id=upload.idea_id
+    )
+    db.session.add(file)
+    db.session.flush()
+    return file
+
+def expire_direct_uploads(limit=None):
+    """
+    Expire direct uploads that were never completed and remove whatever the
+    client may have stored for them.
+
+    Returns:
+        int: Number of uploads expired
+    """
+    config = current_app.config
+    # The grace period lets a transfer that started just before expiry finish
+    cutoff = datetime.utcnow() - timedelta(seconds=config['STORAGE_GC_GRACE_SECONDS'])
+    uploads = DirectUpload.query.filter(
+        DirectUpload.status == DirectUploadStatus.PENDING,
+        DirectUpload.expires_at <= cutoff
+    ).limit(limit or config['STORAGE_GC_BATCH_SIZE']).all()
+    
+    for upload in uploads:
+        remove_stored_file(upload.storage_path)
+        upload.status = DirectUploadStatus.EXPIRED
+    db.session.commit()
+    return len(uploads)
+
+def validate_resumable_upload(data):
+    """Validate a request to start a resumable upload"""
+    filename = data.get('filename')
+    if not filename or not allowed_file(filename):
+        return {
+            'valid': False,
+            'message': f'File type not allowed. Allowed types: {", ".join(sorted(ALLOWED_EXTENSIONS))}'
+        }
+    
+    if not data.get('content_type'):
+        return {
+            'valid': False,
+            'message': 'content_type is required'
+        }
+    
+    size = data.get('size')
+    max_size = current_app.config['MAX_UPLOAD_SIZE']
+    if not isinstance(size, int) or isinstance(size, bool) or size < 1:
+        return {
+            'valid': False,
+            'message': 'size must be a positive number of bytes'
+        }
+    if size > max_size:
+        return {
+            'valid': False,
+            'status': 413,
+            'message': f'File size exceeds the {format_size_limit(max_size)} limit'
+        }
+    
+    return {
+        'valid': True
+    }
+
+def create_resumable_upload(student, data, team_id=None, idea_id=None):
+    """
+    Start a resumable upload session backed by a storage multipart upload.
+
+    Chunks must be sent in multiples of the session's ``chunk_size`` (the
+    upload part size, at least the 5MB storage minimum); only the final
+    chunk may end on any byte.
+    """
+    config = current_app.config
+    ensure_bucket()
+    storage_path = f"{config['MINIO_BUCKET_NAME']}/objects/{uuid.uuid4().hex}"
+    upload = ResumableUpload(
+        student_id=student.id,
+        team_id=team_id,
+        idea_id=idea_id,
+        storage_path=storage_path,
+        original_filename=secure_filename(data['filename']),
+        content_type=data['content_type'],
+        total_size=data['size'],
+        chunk_size=config['UPLOAD_PART_SIZE'],
+        offset=0,
+        multipart_upload_id=create_multipart_upload(storage_path, data['content_type']),
+        expires_at=datetime.utcnow() + timedelta(seconds=config['RESUMABLE_UPLOAD_EXPIRY_SECONDS'])
+    )
+    return upload.save()
+
+def _read_part(stream, size):
+    """Read up to ``size`` bytes, fewer only at the end of the stream"""
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = stream.read(min(READ_CHUNK_SIZE, size - len(buffer)))
+        if not chunk:
+            break
+        buffer.extend(chunk)
+    return bytes(buffer)
+
+def receive_resumable_chunk(upload, offset, stream):
+    """
+    Append a chunk of a resumable upload, starting at byte ``offset``.
+
+    The session is leased to this worker with a conditional UPDATE, so two
+    requests cannot write the same session at once. The body is stored as
+    multipart parts of ``chunk_size`` bytes; progress is committed after
+    every part, so when the connection drops everything up to the last
+    complete part is kept and the client resumes from the returned offset.
+    Bytes after the last complete part of an interrupted chunk are dropped.
+
+    Returns:
+        dict: {'success', 'upload', optional 'status' and 'message'}
+    """
+    config = current_app.config
+    lease = timedelta(seconds=config['RESUMABLE_CHUNK_LEASE_SECONDS'])
+    if upload.status != ResumableUploadStatus.PENDING:
+        return {'success': False, 'status': 409, 'upload': upload, 'message': f'Upload is already {upload.status}'}
+    if offset != upload.offset:
+        return {'success': False, 'status': 409, 'upload': upload,
+                'message': f'Chunk must start at offset {upload.offset}'}
+    check_storage_available()
+    
+    upload_id = upload.id
+    now = datetime.utcnow()
+    token = uuid.uuid4().hex
+    claimed = ResumableUpload.query.filter(
+        ResumableUpload.id == upload_id,
+        ResumableUpload.status == ResumableUploadStatus.PENDING,
+        ResumableUpload.offset == offset,
+        db.or_(ResumableUpload.locked_until.is_(None), ResumableUpload.locked_until < now)
+    ).update({'lock_token': token, 'locked_until': now + lease}, synchronize_session=False)
+    db.session.commit()
+    if not claimed:
+        return {'success': False, 'status': 409, 'upload': upload,
+                'message': 'Another chunk of this upload is being received'}
+    
+    # Read once: every commit below expires the instance
+    total_size, chunk_size = upload.total_size, upload.chunk_size
+    storage_path, multipart_upload_id = upload.storage_path, upload.multipart_upload_id
+    parts = upload.parts
+    result = {'success': True, 'upload': upload}
+    try:
+        while offset < total_size:
+            data = _read_part(stream, min(chunk_size, total_size - offset))
+            if offset + len(data) < total_size and len(data) < chunk_size:
+                break  # Chunk ended (or the connection dropped) inside a part
+            
+            part_number = offset // chunk_size + 1
+            etag = upload_part(storage_path, multipart_upload_id, part_number, data)
+            parts.append((part_number, etag))
+            now = datetime.utcnow()
+            kept = ResumableUpload.query.filter_by(id=upload_id, lock_token=token).update({
+                'offset': offset + len(data),
+                'parts_data': json.dumps(parts),
+                'locked_until': now + lease,
+                'expires_at': now + timedelta(seconds=config['RESUMABLE_UPLOAD_EXPIRY_SECONDS'])
+            }, synchronize_session=False)
+            db.session.commit()
+            if not kept:
+                return {'success': False, 'status': 409, 'upload': upload,
+                        'message': 'Upload session was taken over by another request'}
+            offset += len(data)
+        
+        if offset >= total_size and stream.read(1):
+            result = {'success': False, 'status': 413, 'upload': upload,
+                      'message': 'Chunk extends past the declared file size'}
+    except CircuitOpenError:
+        # Storage went down mid-chunk: the parts stored so far are kept
+        db.session.rollback()
+        raise
+    except S3Error as e:
+        logger.error(f"S3 Error storing upload chunk: {str(e)}")
+        result = {'success': False, 'status': 500, 'upload': upload, 'message': f"Storage error: {str(e)}"}
+    except Exception as e:
+        # Typically the client disconnecting; the parts stored so far are kept
+        logger.info(f"Resumable upload {upload_id} interrupted at offset {offset}: {str(e)}")
+        db.session.rollback()
+    finally:
+        ResumableUpload.query.filter_by(id=upload_id, lock_token=token).update(
+            {'lock_token': None, 'locked_until': None}, synchronize_session=False
+        )
+        db.session.commit()
+    return result
+
+def complete_resumable_upload(upload):
+    """
+    Assemble a fully received resumable upload and create its File.
+
+    Returns:
+        dict: {'success': True, 'file': File} or {'success': False, 'status', 'message'}
+    """
+    if upload.offset != upload.total_size:
+        return {'success': False, 'status': 400,
+                'message': f'Upload is incomplete: {upload.offset} of {upload.total_size} bytes received'}
+    
+    # Claimed with a conditional UPDATE so a repeated completion cannot create a second File
+    claimed = ResumableUpload.query.filter(
+        ResumableUpload.id == upload.id,
+        ResumableUpload.status == ResumableUploadStatus.PENDING,
+        ResumableUpload.lock_token.is_(None)
+    ).update({'status': ResumableUploadStatus.COMPLETED}, synchronize_session=False)
+    if not claimed:
+        db.session.rollback()
+        return {'success': False, 'status': 409, 'message': 'Upload is already completed or still receiving data'}
+    
+    # The received parts are kept, so the upload can be completed once space is freed
+    if not charge_storage(_owner_team_id(upload.team_id, upload.idea_id), upload.total_size):
+        db.session.rollback()
+        return {'success': False, 'status': 413, 'message': 'Team storage quota exceeded'}
+    
+    try:
+        complete_multipart_upload(upload.storage_path, upload.multipart_upload_id, upload.parts)
+    except S3Error as e:
+        db.session.rollback()
+        logger.error(f"S3 Error completing upload: {str(e)}")
+        return {'success': False, 'status': 500, 'message': f"Storage error: {str(e)}"}
+    
+    file = _file_for_upload(upload, upload.total_size)
+    upload.status = ResumableUploadStatus.COMPLETED
+    upload.file_id = file.id
+    db.session.commit()
+    return {'success': True, 'file': file}
+
+def _abort_resumable_upload(upload):
+    try:
+        abort_multipart_upload(upload.storage_path, upload.multipart_upload_id)
+    except S3Error as e:
+        if e.code != 'NoSuchUpload':
+            raise
+
+def cancel_resumable_upload(upload):
+    """Discard a pending resumable upload and the parts received for it"""
+    cancelled = ResumableUpload.query.filter_by(
+        id=upload.id, status=ResumableUploadStatus.PENDING
+    ).update({'status': ResumableUploadStatus.EXPIRED}, synchronize_session=False)
+    db.session.commit()
+    if cancelled:
+        _abort_resumable_upload(upload)
+    return bool(cancelled)
+
+def expire_resumable_uploads(limit=None):
+    """
+    Expire resumable uploads left idle past RESUMABLE_UPLOAD_EXPIRY_SECONDS
+    and abort their multipart uploads, freeing the stored parts.
+
+    Returns:
+        int: Number of uploads expired
+    """
+    config = current_app.config
+    now = datetime.utcnow()
+    uploads = ResumableUpload.query.filter(
+        ResumableUpload.status == ResumableUploadStatus.PENDING,
+        ResumableUpload.expires_at <= now
+    ).limit(limit or config['STORAGE_GC_BATCH_SIZE']).all()
+    
+    expired = 0
+    for upload in uploads:
+        # Skipped if a chunk arrived (and extended the session) meanwhile
+        claimed = ResumableUpload.query.filter(
+            ResumableUpload.id == upload.id,
+            ResumableUpload.status == ResumableUploadStatus.PENDING,
+            ResumableUpload.expires_at <= now,
+            db.or_(ResumableUpload.locked_until.is_(None), ResumableUpload.locked_until < now)
+        ).update({'status': ResumableUploadStatus.EXPIRED}, synchronize_session=False)
+        db.session.commit()
+        if claimed:
+            _abort_resumable_upload(upload)
+            expired += 1
+    return expired
+
+def release_file(file):
+    """
+    Delete a file record, release its stored content and take it off the
+    team's storage usage, in the current transaction (not committed).
+
+    Returns:
+        str: Storage path of an object the file owned itself (stored before
+        deduplication), to remove once the transaction is committed, or None
+    """
+    legacy_path = file.storage_path if file.object_id is None else None
+    if file.object_id is not None:
+        release_object(file.object_id)
+    release_storage(file_owner_team_id(file), file.file_size)
+    db.session.delete(file)
+    return legacy_path
+
+def delete_file(file):
+    """
+    Delete a file record, release its stored content and take it off the
+    team's storage usage, in one transaction.
+
+    The object itself is removed by the garbage collector once nothing
+    references it; files stored before deduplication own their object and
+    have it removed right away.
+    """
+    legacy_path = release_file(file)
+    db.session.commit()
+    if legacy_path:
+        remove_stored_file(legacy_path, derivatives=True)
+
+def collect_garbage(limit=None):
+    """
+    Remove stored objects that have had no references for the grace period.
+
+    Each row is deleted only if it is still unreferenced, and the object is
+    removed after that commit, so a concurrent upload either revives the row
+    first or no longer finds it and writes a fresh copy under a new key.
+
+    Returns:
+        int: Number of objects removed
+    """
+    config = current_app.config
+    # Rows are deleted before their objects, so nothing is collected while storage is down
+    check_storage_available()
+    cutoff = datetime.utcnow() - timedelta(seconds=config['STORAGE_GC_GRACE_SECONDS'])
+    candidates = db.session.query(StoredObject.id, StoredObject.storage_path).filter(
+        StoredObject.ref_count <= 0,
+        StoredObject.orphaned_at <= cutoff
+    ).order_by(StoredObject.orphaned_at).limit(limit or config['STORAGE_GC_BATCH_SIZE']).all()
+
+    removed = 0
+    for object_id, storage_path in candidates:
+        deleted = StoredObject.query.filter(
+            StoredObject.id == object_id,
+            StoredObject.ref_count <= 0
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        if deleted and remove_stored_file(storage_path, derivatives=True):
+            removed += 1
+
+    if removed:
+        logger.info(f"Garbage collected {removed} unreferenced objects")
+    return removed
+
+class StorageGarbageCollector:
+    """
+    Background thread removing unreferenced objects and abandoned uploads
+    from storage, and reconciling team usage counters now and then.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='storage-gc', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=10):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        config = self.app.config
+        last_reconcile = time.monotonic()
+        with self.app.app_context():
+            while not self._stop.wait(config['STORAGE_GC_INTERVAL']):
+                try:
+                    try:
+                        collect_garbage()
+                        expire_direct_uploads()
+                        expire_resumable_uploads()
+                    except CircuitOpenError as e:
+                        logger.warning(f"Skipping storage garbage collection: {str(e)}")
+                    if time.monotonic() - last_reconcile >= config['STORAGE_RECONCILE_INTERVAL']:
+                        last_reconcile = time.monotonic()
+                        reconcile_storage_usage()
+                except Exception as e:
+                    logger.error(f"Storage garbage collection error: {str(e)}")
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+
+def start_storage_gc(app):
+    """Start the storage garbage collector for this process (once)"""
+    if 'storage_gc' in app.extensions:
+        return app.extensions['storage_gc']
+
+    collector = StorageGarbageCollector(app)
+    collector.start()
+    app.extensions['storage_gc'] = collector
+    atexit.register(collector.stop)
+    return collector
+
+def get_storage_savings(team_id=None):
+    """
+    Bytes uploaded per team and how many of them deduplication saved.
+
+    Idea files count towards the idea's team. One aggregate query.
+    """
+    owner = func.coalesce(File.team_id, Idea.team_id)
+    query = db.session.query(
+        owner.label('team_id'),
+        func.count(File.id),
+        func.coalesce(func.sum(File.file_size), 0),
+        func.coalesce(func.sum(case((File.deduplicated.is_(True), File.file_size), else_=0)), 0)
+    ).outerjoin(Idea, File.idea_id == Idea.id).group_by(owner)
+    if team_id is not None:
+        query = query.filter(owner == team_id)
+
+    return [
+        {
+            'team_id': owner_id,
+            'file_count': count,
+            'uploaded_bytes': int(uploaded),
+            'saved_bytes': int(saved),
+            'stored_bytes': int(uploaded) - int(saved)
+        }
+        for owner_id, count, uploaded, saved in query.order_by(owner).all()
+        if owner_id is not None
+    ]
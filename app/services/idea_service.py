@@ -0,0 +1,147 @@
+import logging
+from app import db
+from app.models.direct_upload import DirectUpload, DirectUploadStatus
+from app.models.idea import Idea
+from app.models.resumable_upload import ResumableUpload, ResumableUploadStatus
+from app.services.file_service import release_file, remove_stored_file
+from app.services.similarity_service import index_idea, remove_idea_index
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Largest page of ideas returned at once
+MAX_PAGE_SIZE = 100
+
+# Editable fields: (name, required on create, maximum length)
+IDEA_FIELDS = [
+    ('title', True, 100),
+    ('description', True, 10000),
+    ('problem_statement', False, 10000),
+    ('solution_approach', False, 10000)
+]
+
+def validate_idea(data, partial=False):
+    """
+    Validate idea data.
+
+    With ``partial`` (updates) only the fields present are checked.
+    """
+    if not isinstance(data, dict):
+        return {
+            'valid': False,
+            'message': 'Request body must be a JSON object'
+        }
+
+    for field, required, max_length in IDEA_FIELDS:
+        if field not in data:
+            if required and not partial:
+                return {
+                    'valid': False,
+                    'message': f'Missing required field: {field}'
+                }
+            continue
+
+        value = data[field]
+        if value is None and not required:
+            continue
+        if not isinstance(value, str) or (required and not value.strip()):
+            return {
+                'valid': False,
+                'message': f'{field} must be a non-empty string' if required else f'{field} must be a string'
+            }
+        if len(value) > max_length:
+            return {
+                'valid': False,
+                'message': f'{field} must be at most {max_length} characters long'
+            }
+
+    return {
+        'valid': True
+    }
+
+def create_idea(team_id, data):
+    """Create an idea for a team from validated data, indexed for duplicate detection"""
+    idea = Idea(team_id=team_id)
+    for field, _, _ in IDEA_FIELDS:
+        setattr(idea, field, data[field].strip() if data.get(field) else data.get(field))
+    db.session.add(idea)
+    db.session.flush()
+    index_idea(idea)
+    db.session.commit()
+    return idea
+
+def update_idea(idea, data):
+    """Apply the validated fields present in ``data`` to an idea, reindexing it if its text changed"""
+    changed = False
+    for field, _, _ in IDEA_FIELDS:
+        if field in data:
+            value = data[field].strip() if data[field] else data[field]
+            changed = changed or value != getattr(idea, field)
+            setattr(idea, field, value)
+    if changed:
+        index_idea(idea)
+    return idea.save()
+
+def delete_idea(idea):
+    """
+    Delete an idea and its files.
+
+    Files are deleted through the file service so their stored content and
+    the team's storage usage are released. Uploads still in progress for the
+    idea must be finished or cancelled first.
+
+    Returns:
+        dict: {'success': bool, optional 'status' and 'message'}
+    """
+    pending = db.session.query(DirectUpload.id).filter(
+        DirectUpload.idea_id == idea.id, DirectUpload.status == DirectUploadStatus.PENDING
+    ).first() or db.session.query(ResumableUpload.id).filter(
+        ResumableUpload.idea_id == idea.id, ResumableUpload.status == ResumableUploadStatus.PENDING
+    ).first()
+    if pending:
+        return {
+            'success': False,
+            'status': 409,
+            'message': 'Finish or cancel the uploads in progress for this idea first'
+        }
+
+    # The files go in the idea's transaction, so a failure leaves both intact
+    legacy_paths = [release_file(file) for file in list(idea.files)]
+    # Already deleted; keep the idea's cascade from deleting them again
+    db.session.flush()
+    db.session.expire(idea, ['files'])
+
+    # Finished upload sessions are kept for the record, detached from the idea
+    DirectUpload.query.filter_by(idea_id=idea.id).update({'idea_id': None}, synchronize_session=False)
+    ResumableUpload.query.filter_by(idea_id=idea.id).update({'idea_id': None}, synchronize_session=False)
+    remove_idea_index(idea.id)
+    idea.delete()
+
+    # Objects only these files owned can go once nothing refers to them any more
+    for path in filter(None, legacy_paths):
+        remove_stored_file(path, derivatives=True)
+    return {
+        'success': True
+    }
+
+def list_ideas(team_id=None, cursor=None, limit=20, options=()):
+    """
+    Page through ideas, newest first (optionally one team's).
+
+    The cursor is the id of the last idea of the previous page; ``options``
+    are loader options for the query (e.g. of a serializer selection).
+
+    Returns:
+        tuple: (ideas, next_cursor) where next_cursor is None on the last page
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    query = Idea.query.options(*options)
+    if team_id is not None:
+        query = query.filter(Idea.team_id == team_id)
+    if cursor:
+        query = query.filter(Idea.id < cursor)
+
+    ideas = query.order_by(Idea.id.desc()).limit(limit + 1).all()
+    next_cursor = ideas[limit - 1].id if len(ideas) > limit else None
+    return ideas[:limit], next_cursor
@@ -0,0 +1,149 @@
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import func, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import joinedload
+from app import db
+from app.models.notification import InboxItem, Notification, NotificationCounter, RecipientType
+
+# Largest page a client can ask for
+MAX_PAGE_SIZE = 100
+
+# Recipients who can sign in and read an inbox; professors and mentors are
+# only emailed until they can authenticate
+INBOX_RECIPIENT_TYPES = (RecipientType.STUDENT,)
+
+def team_recipients(team):
+    """Inbox recipients for every member of a team"""
+    return [(RecipientType.STUDENT, member.id) for member in team.members]
+
+def _increment_unread(deltas):
+    """
+    Atomically add to the unread counters of several recipients.
+
+    Uses INSERT ... ON CONFLICT DO UPDATE so a recipient's first notification
+    creates their counter without racing concurrent writers.
+    """
+    rows = [
+        {'recipient_type': recipient_type, 'recipient_id': recipient_id, 'unread_count': delta}
+        for (recipient_type, recipient_id), delta in deltas.items()
+    ]
+    if not rows:
+        return
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        upsert = (postgresql if dialect == 'postgresql' else sqlite).insert(NotificationCounter)
+        db.session.execute(upsert.on_conflict_do_update(
+            index_elements=['recipient_type', 'recipient_id'],
+            set_={'unread_count': NotificationCounter.unread_count + upsert.excluded.unread_count}
+        ), rows)
+        return
+
+    for row in rows:
+        updated = NotificationCounter.query.filter_by(
+            recipient_type=row['recipient_type'], recipient_id=row['recipient_id']
+        ).update({'unread_count': NotificationCounter.unread_count + row['unread_count']},
+                 synchronize_session=False)
+        if not updated:
+            db.session.add(NotificationCounter(**row))
+
+def notify(kind, title, recipients, body=None, team_id=None, **data):
+    """
+    Create a notification and fan it out to each recipient's inbox.
+
+    Like queue_email, this only adds to the session: the notification is
+    committed together with the change that caused it.
+
+    Args:
+        kind (str): Notification type
+        title (str): Short text shown in the inbox
+        recipients (list): (RecipientType, id) pairs; duplicates are delivered
+            once, and types outside INBOX_RECIPIENT_TYPES are skipped
+        body (str): Optional longer text
+        team_id (int): Team the notification is about, if any
+        **data: Ids the frontend can use to link to the subject
+
+    Returns:
+        Notification: The created notification, or None when nobody has an inbox to receive it
+    """
+    recipients = [
+        recipient for recipient in dict.fromkeys(recipients) if recipient[0] in INBOX_RECIPIENT_TYPES
+    ]
+    if not recipients:
+        return None
+
+    notification = Notification(kind=kind, title=title, body=body, team_id=team_id)
+    notification.payload = data
+    db.session.add(notification)
+    db.session.flush()
+
+    now = datetime.utcnow()
+    db.session.execute(insert(InboxItem), [
+        {'recipient_type': recipient_type, 'recipient_id': recipient_id,
+         'notification_id': notification.id, 'is_read': False,
+         'created_at': now, 'updated_at': now}
+        for recipient_type, recipient_id in recipients
+    ])
+    _increment_unread(Counter(recipients))
+
+    return notification
+
+def list_notifications(recipient_type, recipient_id, cursor=None, limit=20, unread_only=False):
+    """
+    Page through a recipient's inbox, newest first.
+
+    The cursor is the id of the last item of the previous page, so each page
+    is an index range scan no matter how deep the client has scrolled.
+
+    Returns:
+        tuple: (items, next_cursor) where next_cursor is None on the last page
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    query = InboxItem.query.options(joinedload(InboxItem.notification)).filter(
+        InboxItem.recipient_type == recipient_type,
+        InboxItem.recipient_id == recipient_id
+    )
+    if cursor:
+        query = query.filter(InboxItem.id < cursor)
+    if unread_only:
+        query = query.filter(InboxItem.is_read.is_(False))
+
+    items = query.order_by(InboxItem.id.desc()).limit(limit + 1).all()
+    next_cursor = items[limit - 1].id if len(items) > limit else None
+    return items[:limit], next_cursor
+
+def mark_read(recipient_type, recipient_id, ids=None):
+    """
+    Mark inbox items as read (the given ids, or everything) and commit.
+
+    The counter is decremented by the number of rows that actually changed,
+    in the same transaction, so it cannot drift from the inbox.
+
+    Returns:
+        int: Number of items marked read
+    """
+    query = InboxItem.query.filter(
+        InboxItem.recipient_type == recipient_type,
+        InboxItem.recipient_id == recipient_id,
+        InboxItem.is_read.is_(False)
+    )
+    if ids is not None:
+        query = query.filter(InboxItem.id.in_(ids))
+
+    now = datetime.utcnow()
+    updated = query.update({'is_read': True, 'read_at': now, 'updated_at': now}, synchronize_session=False)
+    if updated:
+        # SQLite spells GREATEST as a two-argument MAX
+        greatest = func.max if db.session.get_bind().dialect.name == 'sqlite' else func.greatest
+        NotificationCounter.query.filter_by(
+            recipient_type=recipient_type, recipient_id=recipient_id
+        ).update({'unread_count': greatest(NotificationCounter.unread_count - updated, 0)},
+                 synchronize_session=False)
+    db.session.commit()
+    return updated
+
+def get_unread_count(recipient_type, recipient_id):
+    """Unread count from the maintained counter (a primary-key lookup)"""
+    counter = db.session.get(NotificationCounter, (recipient_type, recipient_id), populate_existing=True)
+    return counter.unread_count if counter else 0
@@ -0,0 +1,205 @@
+import atexit
+import random
+import smtplib
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import and_, func, or_
+from jinja2 import TemplateError
+import logging
+from app import db
+from app.models.email_outbox import EmailOutbox, OutboxStatus
+from app.services.email_service import (
+    SMTPConnectionPool, build_email_message, get_smtp_breaker, precompile_email_templates
+)
+from app.utils.circuit_breaker import CircuitOpenError
+from app.services.digest_service import flush_due_digests
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Serializes claims between worker threads of this process; other processes
+# are kept apart by SELECT ... FOR UPDATE SKIP LOCKED where the database supports it
+_claim_lock = threading.Lock()
+
+def retry_delay(attempts, base_seconds, max_seconds):
+    """Exponential backoff with jitter for the given number of failed attempts"""
+    delay = min(max_seconds, base_seconds * 2 ** max(attempts - 1, 0))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+def is_permanent_failure(error):
+    """Whether retrying the message can never succeed (rejected recipient, 5xx reply, broken template)"""
+    if isinstance(error, (smtplib.SMTPRecipientsRefused, TemplateError)):
+        return True
+    # Bad credentials are our problem, not the message's; keep retrying until fixed
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return False
+    return isinstance(error, smtplib.SMTPResponseException) and 500 <= error.smtp_code < 600
+
+def claim_due_emails(limit, lease_seconds):
+    """
+    Claim a batch of emails that are due for delivery.
+
+    Pending entries whose retry time has passed are claimed, as well as
+    entries stuck in 'sending' whose lease expired (their worker died).
+    """
+    now = datetime.utcnow()
+    with _claim_lock:
+        entries = EmailOutbox.query.filter(or_(
+            and_(EmailOutbox.status == OutboxStatus.PENDING, EmailOutbox.next_attempt_at <= now),
+            and_(EmailOutbox.status == OutboxStatus.SENDING, EmailOutbox.locked_until < now)
+        )).order_by(EmailOutbox.next_attempt_at).limit(limit).with_for_update(skip_locked=True).all()
+
+        for entry in entries:
+            entry.status = OutboxStatus.SENDING
+            entry.attempts += 1
+            entry.locked_until = now + timedelta(seconds=lease_seconds)
+        db.session.commit()
+    return entries
+
+def record_delivery_failure(entry, error, config):
+    """Schedule a retry with backoff, or dead-letter the entry once retries are exhausted"""
+    entry.last_error = str(error)[:1000]
+    entry.locked_until = None
+
+    if is_permanent_failure(error) or entry.attempts >= config['EMAIL_MAX_ATTEMPTS']:
+        entry.status = OutboxStatus.DEAD
+        logger.error(f"Email {entry.id} to {entry.recipient} dead-lettered after {entry.attempts} attempts: {error}")
+    else:
+        delay = retry_delay(entry.attempts, config['EMAIL_RETRY_BASE_SECONDS'], config['EMAIL_RETRY_MAX_SECONDS'])
+        entry.status = OutboxStatus.PENDING
+        entry.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+        logger.warning(f"Email {entry.id} to {entry.recipient} failed, retrying in {delay:.0f}s: {error}")
+
+def defer_delivery(entry, seconds):
+    """Put a claimed entry back without counting the attempt (SMTP is down, not the message's fault)"""
+    entry.status = OutboxStatus.PENDING
+    entry.attempts = max(entry.attempts - 1, 0)
+    entry.locked_until = None
+    entry.next_attempt_at = datetime.utcnow() + timedelta(seconds=seconds)
+
+def deliver_email(entry, smtp_pool, config):
+    """Send one claimed outbox entry over a pooled connection and record the outcome"""
+    try:
+        msg = build_email_message(
+            entry.recipient, entry.subject, entry.template, config['SMTP_FROM_EMAIL'],
+            **entry.template_context
+        )
+        with smtp_pool.connection() as server:
+            server.send_message(msg)
+    except CircuitOpenError as e:
+        defer_delivery(entry, e.retry_after)
+    except Exception as e:
+        record_delivery_failure(entry, e, config)
+    else:
+        entry.status = OutboxStatus.SENT
+        entry.sent_at = datetime.utcnow()
+        entry.locked_until = None
+        entry.last_error = None
+        logger.info(f"Email sent to {entry.recipient} with subject: {entry.subject}")
+    db.session.commit()
+    return entry.status == OutboxStatus.SENT
+
+def process_outbox_batch(smtp_pool, config):
+    """
+    Claim and deliver one batch of due emails; returns the number processed.
+
+    Nothing is claimed while the SMTP circuit breaker is open (CircuitOpenError).
+    """
+    get_smtp_breaker(smtp_pool.config).check()
+    entries = claim_due_emails(config['EMAIL_WORKER_BATCH_SIZE'], config['EMAIL_SENDING_LEASE_SECONDS'])
+    for entry in entries:
+        deliver_email(entry, smtp_pool, config)
+    return len(entries)
+
+class OutboxWorkerPool:
+    """Background threads draining the email outbox over a shared SMTP connection pool"""
+
+    def __init__(self, app, threads=None):
+        self.app = app
+        self.threads = threads or app.config['EMAIL_WORKER_THREADS']
+        self.smtp_pool = SMTPConnectionPool(app.config, size=app.config['SMTP_POOL_SIZE'])
+        self._stop = threading.Event()
+        self._workers = []
+
+    def start(self):
+        """Start the worker threads and the digest flusher"""
+        precompile_email_templates()
+        for i in range(self.threads):
+            worker = threading.Thread(target=self._run, name=f'outbox-worker-{i}', daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+        flusher = threading.Thread(target=self._flush_digests, name='digest-flusher', daemon=True)
+        flusher.start()
+        self._workers.append(flusher)
+        logger.info(f"Started {self.threads} outbox workers")
+
+    def stop(self, timeout=10):
+        """Signal the workers to stop, wait for them and close SMTP connections"""
+        self._stop.set()
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+        self.smtp_pool.close()
+
+    def _run(self):
+        config = self.app.config
+        with self.app.app_context():
+            while not self._stop.is_set():
+                try:
+                    processed = process_outbox_batch(self.smtp_pool, config)
+                except CircuitOpenError as e:
+                    self._stop.wait(e.retry_after)
+                    continue
+                except Exception as e:
+                    logger.error(f"Outbox worker error: {str(e)}")
+                    db.session.rollback()
+                    processed = 0
+                finally:
+                    db.session.remove()
+
+                if not processed:
+                    self._stop.wait(config['EMAIL_WORKER_POLL_INTERVAL'])
+
+    def _flush_digests(self):
+        config = self.app.config
+        with self.app.app_context():
+            while not self._stop.wait(config['EMAIL_DIGEST_FLUSH_INTERVAL']):
+                try:
+                    flush_due_digests()
+                except Exception as e:
+                    logger.error(f"Digest flush error: {str(e)}")
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+
+def start_outbox_workers(app, threads=None):
+    """Start the outbox worker pool for this process (once)"""
+    if 'outbox_workers' in app.extensions:
+        return app.extensions['outbox_workers']
+
+    pool = OutboxWorkerPool(app, threads)
+    pool.start()
+    app.extensions['outbox_workers'] = pool
+    atexit.register(pool.stop)
+    return pool
+
+def get_outbox_stats():
+    """Count outbox entries per status"""
+    rows = db.session.query(EmailOutbox.status, func.count(EmailOutbox.id)).group_by(EmailOutbox.status).all()
+    return {status: count for status, count in rows}
+
+def requeue_dead_emails(ids=None):
+    """Move dead-lettered emails back to pending; returns the number requeued"""
+    query = EmailOutbox.query.filter_by(status=OutboxStatus.DEAD)
+    if ids:
+        query = query.filter(EmailOutbox.id.in_(ids))
+
+    count = query.update({
+        'status': OutboxStatus.PENDING,
+        'attempts': 0,
+        'next_attempt_at': datetime.utcnow()
+    }, synchronize_session=False)
+    db.session.commit()
+    return count
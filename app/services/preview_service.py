@@ -0,0 +1,276 @@
+import atexit
+import io
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from PIL import Image, ImageOps
+from sqlalchemy import and_, func, or_
+import logging
+from app import db
+from app.models.file import File, PreviewStatus
+from app.services.storage_service import check_storage_available, get_storage_client, split_storage_path, timed
+from app.utils.circuit_breaker import CircuitOpenError
+
+# PDF rendering is optional; without pypdfium2 only images get previews
+try:
+    import pypdfium2
+except ImportError:
+    pypdfium2 = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+IMAGE_TYPES = {'.png', '.jpg', '.jpeg'}
+PDF_TYPES = {'.pdf'}
+
+# Derivative name -> longest side in pixels (config key)
+DERIVATIVES = {
+    'thumbnail': 'PREVIEW_THUMBNAIL_SIZE',
+    'preview': 'PREVIEW_IMAGE_SIZE',
+}
+
+# Serializes claims between worker threads of this process
+_claim_lock = threading.Lock()
+
+def preview_kind(file_type):
+    """'image', 'pdf' or None for a file extension such as '.pdf'"""
+    file_type = (file_type or '').lower()
+    if file_type in IMAGE_TYPES:
+        return 'image'
+    if file_type in PDF_TYPES and pypdfium2 is not None:
+        return 'pdf'
+    return None
+
+def initial_preview_status(file_type):
+    """Preview status for a new file: pending if derivatives can be made for it"""
+    return PreviewStatus.PENDING if preview_kind(file_type) else None
+
+def derivative_path(storage_path, name):
+    """
+    Where a derivative of an object is stored: next to the original.
+
+    Derived from the original's path alone, so files sharing deduplicated
+    content share derivatives and re-rendering overwrites instead of adding.
+    """
+    return f"{storage_path}.{name}.webp"
+
+def _load_first_page(data, kind, max_size):
+    if kind == 'pdf':
+        pdf = pypdfium2.PdfDocument(data)
+        try:
+            page = pdf[0]
+            width, height = page.get_size()
+            # Render just large enough for the biggest derivative
+            scale = max_size / max(width, height)
+            return page.render(scale=scale).to_pil()
+        finally:
+            pdf.close()
+
+    image = Image.open(io.BytesIO(data))
+    image.seek(0)  # First frame of animated images
+    return ImageOps.exif_transpose(image)
+
+def render_derivatives(data, kind, sizes, quality):
+    """
+    Render WebP derivatives of an image or the first page of a PDF.
+
+    Runs in a worker process, so it only takes and returns plain values.
+
+    Args:
+        data (bytes): Original file content
+        kind (str): 'image' or 'pdf'
+        sizes (dict): Derivative name -> longest side in pixels
+        quality (int): WebP quality
+
+    Returns:
+        dict: name -> (webp bytes, width, height)
+    """
+    image = _load_first_page(data, kind, max(sizes.values()))
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+    rendered = {}
+    for name, size in sorted(sizes.items(), key=lambda item: -item[1]):
+        derivative = image.copy()
+        derivative.thumbnail((size, size), Image.LANCZOS)
+        out = io.BytesIO()
+        derivative.save(out, 'WEBP', quality=quality, method=4)
+        rendered[name] = (out.getvalue(), derivative.width, derivative.height)
+    return rendered
+
+def claim_pending_previews(limit, lease_seconds):
+    """
+    Claim a batch of files waiting for previews.
+
+    Pending files are claimed, as well as files stuck in 'processing' whose
+    lease expired (their worker died).
+    """
+    now = datetime.utcnow()
+    with _claim_lock:
+        files = File.query.filter(or_(
+            File.preview_status == PreviewStatus.PENDING,
+            and_(File.preview_status == PreviewStatus.PROCESSING, File.preview_locked_until < now)
+        )).order_by(File.id).limit(limit).with_for_update(skip_locked=True).all()
+
+        for file in files:
+            file.preview_status = PreviewStatus.PROCESSING
+            file.preview_locked_until = now + timedelta(seconds=lease_seconds)
+        db.session.commit()
+    return files
+
+def _reuse_existing_previews(file):
+    """Copy derivative metadata from another file with the same content, if it has them"""
+    twin = File.query.filter(
+        File.storage_path == file.storage_path,
+        File.id != file.id,
+        File.preview_status == PreviewStatus.READY
+    ).first()
+    if twin is None:
+        return False
+    file.preview_data = twin.preview_data
+    return True
+
+def _download(storage_path, max_size):
+    bucket_name, object_name = split_storage_path(storage_path)
+    response = None
+    try:
+        with timed('get_object'):
+            response = get_storage_client().get_object(bucket_name, object_name, length=max_size + 1)
+            data = response.read()
+    finally:
+        if response is not None:
+            response.close()
+            response.release_conn()
+    if len(data) > max_size:
+        raise ValueError('File is too large to preview')
+    return data
+
+def _store_derivatives(storage_path, rendered):
+    bucket_name = split_storage_path(storage_path)[0]
+    client = get_storage_client()
+    previews = {}
+    for name, (data, width, height) in rendered.items():
+        path = derivative_path(storage_path, name)
+        with timed('put_object'):
+            client.put_object(bucket_name, split_storage_path(path)[1], io.BytesIO(data), len(data),
+                              content_type='image/webp')
+        previews[name] = {'path': path, 'size': len(data), 'width': width,
+                          'height': height, 'content_type': 'image/webp'}
+    return previews
+
+def process_preview_batch(executor, config):
+    """
+    Generate derivatives for one batch of claimed files.
+
+    Originals are downloaded here and rendered in the process pool, all
+    files of the batch in parallel. Returns the number of files processed.
+    """
+    check_storage_available()
+    files = claim_pending_previews(config['PREVIEW_BATCH_SIZE'], config['PREVIEW_LEASE_SECONDS'])
+    sizes = {name: config[key] for name, key in DERIVATIVES.items()}
+
+    # Files sharing content within the batch are rendered once
+    jobs = {}
+    for file in files:
+        try:
+            if _reuse_existing_previews(file):
+                file.preview_status = PreviewStatus.READY
+                continue
+            if file.storage_path not in jobs:
+                data = _download(file.storage_path, config['PREVIEW_MAX_SOURCE_SIZE'])
+                future = executor.submit(render_derivatives, data, preview_kind(file.file_type),
+                                         sizes, config['PREVIEW_QUALITY'])
+                jobs[file.storage_path] = (future, [])
+            jobs[file.storage_path][1].append(file)
+        except Exception as e:
+            _record_failure(file, e)
+
+    for storage_path, (future, job_files) in jobs.items():
+        try:
+            previews = _store_derivatives(storage_path, future.result())
+        except Exception as e:
+            for file in job_files:
+                _record_failure(file, e)
+            continue
+        for file in job_files:
+            file.previews = previews
+            file.preview_status = PreviewStatus.READY
+            file.preview_error = None
+
+    for file in files:
+        file.preview_locked_until = None
+    db.session.commit()
+    return len(files)
+
+def _record_failure(file, error):
+    if isinstance(error, CircuitOpenError):
+        # Storage is down, not the file's fault: try again once it is back
+        file.preview_status = PreviewStatus.PENDING
+        return
+    # Rendering is deterministic, so a failed file is not retried automatically
+    file.preview_status = PreviewStatus.FAILED
+    file.preview_error = str(error)[:1000]
+    logger.warning(f"Preview generation failed for file {file.id}: {error}")
+
+def requeue_previews(failed_only=False):
+    """Mark previewable files for (re)generation; returns the number marked"""
+    types = IMAGE_TYPES | (PDF_TYPES if pypdfium2 is not None else set())
+    query = File.query.filter(func.lower(File.file_type).in_(types))
+    if failed_only:
+        query = query.filter(File.preview_status == PreviewStatus.FAILED)
+    count = query.update({'preview_status': PreviewStatus.PENDING, 'preview_error': None},
+                         synchronize_session=False)
+    db.session.commit()
+    return count
+
+class PreviewWorker:
+    """Background thread feeding claimed files to a pool of rendering processes"""
+
+    def __init__(self, app, processes=None):
+        self.app = app
+        self.processes = processes or app.config['PREVIEW_PROCESSES']
+        self.executor = ProcessPoolExecutor(max_workers=self.processes)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='preview-worker', daemon=True)
+        self._thread.start()
+        logger.info(f"Started preview worker with {self.processes} processes")
+
+    def stop(self, timeout=10):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self):
+        config = self.app.config
+        with self.app.app_context():
+            while not self._stop.is_set():
+                try:
+                    processed = process_preview_batch(self.executor, config)
+                except CircuitOpenError as e:
+                    self._stop.wait(e.retry_after)
+                    continue
+                except Exception as e:
+                    logger.error(f"Preview worker error: {str(e)}")
+                    db.session.rollback()
+                    processed = 0
+                finally:
+                    db.session.remove()
+
+                if not processed:
+                    self._stop.wait(config['PREVIEW_POLL_INTERVAL'])
+
+def start_preview_worker(app, processes=None):
+    """Start the preview worker for this process (once)"""
+    if 'preview_worker' in app.extensions:
+        return app.extensions['preview_worker']
+
+    worker = PreviewWorker(app, processes)
+    worker.start()
+    app.extensions['preview_worker'] = worker
+    atexit.register(worker.stop)
+    return worker
@@ -0,0 +1,189 @@
+from flask import current_app
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+import logging
+from app import db
+from app.models.file import File
+from app.models.idea import Idea
+from app.models.team import Team
+from app.models.team_storage_usage import TeamStorageUsage
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def format_bytes(size):
+    """Human readable size in MB, e.g. '500.0MB'"""
+    return f"{size / (1024 * 1024):.1f}MB"
+
+def _ensure_usage_rows(team_ids):
+    """Create missing usage counters; INSERT ... ON CONFLICT DO NOTHING so concurrent creators cannot clash"""
+    rows = [{'team_id': team_id, 'used_bytes': 0, 'file_count': 0} for team_id in team_ids]
+    if not rows:
+        return
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        upsert = (postgresql if dialect == 'postgresql' else sqlite).insert(TeamStorageUsage)
+        db.session.execute(upsert.on_conflict_do_nothing(index_elements=['team_id']), rows)
+        return
+
+    for row in rows:
+        if db.session.get(TeamStorageUsage, row['team_id']) is None:
+            db.session.add(TeamStorageUsage(**row))
+    db.session.flush()
+
+def _effective_quota():
+    """SQL expression for a counter's quota: its override, else TEAM_STORAGE_QUOTA (<= 0 means unlimited)"""
+    return func.coalesce(TeamStorageUsage.quota_bytes, current_app.config['TEAM_STORAGE_QUOTA'])
+
+def get_team_quota(team_id):
+    """Quota in bytes for a team, or None if it has no limit"""
+    usage = db.session.get(TeamStorageUsage, team_id)
+    quota = usage.quota_bytes if usage and usage.quota_bytes is not None else current_app.config['TEAM_STORAGE_QUOTA']
+    return quota if quota > 0 else None
+
+def check_storage_quota(team_id, incoming_bytes=0):
+    """
+    Cheap check before an upload is read: is there room for ``incoming_bytes``?
+
+    Only a primary-key lookup; the authoritative check is charge_storage,
+    made when the size is final.
+    """
+    quota = get_team_quota(team_id)
+    if quota is None:
+        return {
+            'valid': True
+        }
+
+    usage = db.session.get(TeamStorageUsage, team_id)
+    used = usage.used_bytes if usage else 0
+    if used + (incoming_bytes or 0) > quota:
+        return {
+            'valid': False,
+            'status': 413,
+            'message': f'Team storage quota of {format_bytes(quota)} exceeded ({format_bytes(used)} used)'
+        }
+
+    return {
+        'valid': True
+    }
+
+def charge_storage(team_id, size, files=1):
+    """
+    Add a stored file to a team's usage, if the quota allows it.
+
+    The check and the increment are a single conditional UPDATE, so
+    concurrent uploads cannot together overshoot the quota. Like the File
+    insert it accompanies, it is only added to the current transaction.
+
+    Returns:
+        bool: False if the file does not fit (nothing was changed)
+    """
+    _ensure_usage_rows([team_id])
+    quota = _effective_quota()
+    charged = TeamStorageUsage.query.filter(
+        TeamStorageUsage.team_id == team_id,
+        or_(quota <= 0, TeamStorageUsage.used_bytes + size <= quota)
+    ).update({
+        'used_bytes': TeamStorageUsage.used_bytes + size,
+        'file_count': TeamStorageUsage.file_count + files
+    }, synchronize_session=False)
+    return bool(charged)
+
+def release_storage(team_id, size, files=1):
+    """Remove a deleted file from a team's usage (in the current transaction)"""
+    greatest = func.max if db.session.get_bind().dialect.name == 'sqlite' else func.greatest
+    TeamStorageUsage.query.filter_by(team_id=team_id).update({
+        'used_bytes': greatest(TeamStorageUsage.used_bytes - size, 0),
+        'file_count': greatest(TeamStorageUsage.file_count - files, 0)
+    }, synchronize_session=False)
+
+def file_owner_team_id(file):
+    """Team a file counts towards: its own, or its idea's"""
+    return file.team_id if file.team_id is not None else file.idea.team_id
+
+def set_team_quota(team_id, quota_bytes):
+    """Override a team's quota (None restores TEAM_STORAGE_QUOTA, 0 removes the limit)"""
+    _ensure_usage_rows([team_id])
+    TeamStorageUsage.query.filter_by(team_id=team_id).update(
+        {'quota_bytes': quota_bytes}, synchronize_session=False
+    )
+    db.session.commit()
+
+def get_storage_usage(team_id=None):
+    """
+    Storage used by every team (or one) against its quota.
+
+    Reads the maintained counters with a single query; teams that never
+    uploaded have no counter and report zero.
+    """
+    default_quota = current_app.config['TEAM_STORAGE_QUOTA']
+    query = db.session.query(
+        Team.id, Team.name, TeamStorageUsage.used_bytes, TeamStorageUsage.file_count, TeamStorageUsage.quota_bytes
+    ).outerjoin(TeamStorageUsage, TeamStorageUsage.team_id == Team.id)
+    if team_id is not None:
+        query = query.filter(Team.id == team_id)
+
+    usage = []
+    for team_id, name, used, count, quota in query.order_by(Team.id).all():
+        quota = quota if quota is not None else default_quota
+        usage.append({
+            'team_id': team_id,
+            'team_name': name,
+            'used_bytes': used or 0,
+            'file_count': count or 0,
+            'quota_bytes': quota if quota > 0 else None,
+            'remaining_bytes': max(quota - (used or 0), 0) if quota > 0 else None
+        })
+    return usage
+
+def reconcile_storage_usage():
+    """
+    Recompute every team's counter from its files and fix any drift.
+
+    Drifting teams are found with one aggregate query and corrected with one
+    UPDATE whose values are computed from the files by the database in the
+    same statement, so uploads committed in between are not lost.
+
+    Returns:
+        list: {'team_id', 'used_bytes', 'file_count'} for each corrected team,
+        with the counter values before correction
+    """
+    owner = func.coalesce(File.team_id, Idea.team_id)
+    actual = db.session.query(
+        owner.label('team_id'),
+        func.coalesce(func.sum(File.file_size), 0).label('used_bytes'),
+        func.count(File.id).label('file_count')
+    ).outerjoin(Idea, File.idea_id == Idea.id).group_by(owner).subquery()
+
+    _ensure_usage_rows([team_id for (team_id,) in db.session.query(Team.id).outerjoin(
+        TeamStorageUsage, TeamStorageUsage.team_id == Team.id
+    ).filter(TeamStorageUsage.team_id.is_(None)).all()])
+
+    drifted = db.session.query(
+        TeamStorageUsage.team_id, TeamStorageUsage.used_bytes, TeamStorageUsage.file_count
+    ).outerjoin(actual, actual.c.team_id == TeamStorageUsage.team_id).filter(or_(
+        TeamStorageUsage.used_bytes != func.coalesce(actual.c.used_bytes, 0),
+        TeamStorageUsage.file_count != func.coalesce(actual.c.file_count, 0)
+    )).all()
+
+    if drifted:
+        # Same ownership rule as the aggregate: a file's own team first, else its idea's
+        team_files = File.team_id == TeamStorageUsage.team_id
+        idea_files = and_(File.team_id.is_(None),
+                          File.idea_id.in_(select(Idea.id).where(Idea.team_id == TeamStorageUsage.team_id)))
+        owned = or_(team_files, idea_files)
+        TeamStorageUsage.query.filter(
+            TeamStorageUsage.team_id.in_([row.team_id for row in drifted])
+        ).update({
+            'used_bytes': select(func.coalesce(func.sum(File.file_size), 0)).where(owned).scalar_subquery(),
+            'file_count': select(func.count(File.id)).where(owned).scalar_subquery()
+        }, synchronize_session=False)
+        logger.warning(f"Corrected storage usage drift for {len(drifted)} teams")
+    db.session.commit()
+
+    return [
+        {'team_id': row.team_id, 'used_bytes': row.used_bytes, 'file_count': row.file_count}
+        for row in drifted
+    ]
@@ -0,0 +1,270 @@
+"""
+Professor and senior mentor recommendations for a team's ideas.
+
+Every professor and mentor is described by a profile: their department and
+expertise, plus the text of the ideas of the teams they already mentor. A
+profile becomes a TF-IDF vector over hashed word unigrams and bigrams, so
+there is no vocabulary to maintain and a profile can be recomputed on its
+own. The vectors of all professors (and, separately, all mentors) are the
+rows of one NumPy matrix kept in memory per process; ranking them against a
+team's ideas is a single matrix-vector product.
+
+The matrices are refreshed incrementally: at most every
+RECOMMENDATION_REFRESH_SECONDS only the profiles whose professor, teams or
+ideas changed since the last refresh are recomputed. A full rebuild every
+RECOMMENDATION_REBUILD_SECONDS also picks up what leaves no timestamp
+behind, such as deleted ideas.
+"""
+
+import re
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+import numpy as np
+from flask import current_app
+import logging
+from app import db
+from app.models.idea import Idea
+from app.models.mentor import Mentor
+from app.models.professor import Professor
+from app.models.team import Team
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Width of the hashed feature space. Collisions only blur scores a little;
+# the matrices take rows * VECTOR_DIMENSIONS * 4 bytes.
+VECTOR_DIMENSIONS = 1 << 13
+
+# Most recommendations returned at once
+MAX_RECOMMENDATIONS = 20
+
+# Overlap when looking for changes since the last refresh, for writes
+# committed while it ran and clock differences between app servers
+CHANGE_OVERLAP = timedelta(seconds=5)
+
+STOP_WORDS = frozenset("""
+    a an and are as at be by for from has have in into is it its of on or our that the their this
+    to was we were will with which who using use based can more also how what
+""".split())
+
+def tokens(text):
+    """Lower-cased words of a text without stop words"""
+    return [word for word in re.findall(r'[a-z0-9]+', (text or '').lower()) if word not in STOP_WORDS]
+
+def term_vector(text):
+    """
+    L2-normalised, sublinear term frequencies of a text's hashed unigrams and
+    bigrams. Each feature also hashes to a sign, so collisions cancel out
+    instead of piling up.
+    """
+    words = tokens(text)
+    vector = np.zeros(VECTOR_DIMENSIONS, dtype=np.float32)
+    if not words:
+        return vector
+
+    hashes = np.fromiter(
+        (zlib.crc32(feature.encode()) for feature in
+         words + [f'{first} {second}' for first, second in zip(words, words[1:])]),
+        dtype=np.uint32
+    )
+    columns = hashes % VECTOR_DIMENSIONS
+    np.add.at(vector, columns, np.where(hashes >> 31, -1.0, 1.0).astype(np.float32))
+    # Sublinear frequency, keeping each column's sign
+    used = np.unique(columns)
+    vector[used] = np.sign(vector[used]) * np.log1p(np.abs(vector[used]))
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+def _idea_columns():
+    return [Idea.title, Idea.problem_statement, Idea.description, Idea.solution_approach]
+
+class ProfileIndex:
+    """
+    In-memory TF-IDF matrix of professor or mentor profiles.
+
+    Args:
+        model: Professor or Mentor
+        profile_columns: Columns of the model describing the person
+        team_column: Team column pointing at the person mentoring the team
+    """
+
+    def __init__(self, model, profile_columns, team_column):
+        self.model = model
+        self.profile_columns = profile_columns
+        self.team_column = team_column
+        self.ids = []
+        self.rows = {}
+        self.term_matrix = np.zeros((0, VECTOR_DIMENSIONS), dtype=np.float32)
+        self.matrix = self.term_matrix
+        self.idf = np.ones(VECTOR_DIMENSIONS, dtype=np.float32)
+        self.synced_at = None
+        self.checked_at = 0
+        self.rebuilt_at = 0
+        self._lock = threading.Lock()
+
+    def _profiles(self, ids=None):
+        """id -> profile text of the given people (everyone if ``ids`` is None)"""
+        query = db.session.query(self.model.id, *self.profile_columns)
+        if ids is not None:
+            query = query.filter(self.model.id.in_(ids))
+        profiles = {row[0]: [text for text in row[1:] if text] for row in query.all()}
+        if not profiles:
+            return {}
+
+        ideas = db.session.query(self.team_column, *_idea_columns()).join(
+            Idea, Idea.team_id == Team.id
+        ).filter(self.team_column.in_(list(profiles)))
+        for person_id, *texts in ideas.all():
+            profiles[person_id].extend(text for text in texts if text)
+        return {person_id: ' '.join(texts) for person_id, texts in profiles.items()}
+
+    def _changed_ids(self, since):
+        """Ids of people whose profile may have changed since ``since``"""
+        changed = {person_id for person_id, in db.session.query(self.model.id).filter(
+            self.model.updated_at >= since
+        )}
+        changed.update(person_id for person_id, in db.session.query(self.team_column).filter(
+            self.team_column.isnot(None), Team.updated_at >= since
+        ))
+        changed.update(person_id for person_id, in db.session.query(self.team_column).join(
+            Idea, Idea.team_id == Team.id
+        ).filter(self.team_column.isnot(None), Idea.updated_at >= since))
+        return changed
+
+    def _reweight(self):
+        # Inverse document frequency of every column over all profiles, then
+        # rows re-normalised so scores are cosine similarities
+        documents = len(self.ids)
+        frequencies = np.count_nonzero(self.term_matrix, axis=0)
+        self.idf = (np.log((1 + documents) / (1 + frequencies)) + 1).astype(np.float32)
+        weighted = self.term_matrix * self.idf
+        norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+        self.matrix = np.divide(weighted, norms, out=np.zeros_like(weighted), where=norms > 0)
+
+    def _rebuild(self):
+        profiles = self._profiles()
+        self.ids = sorted(profiles)
+        self.rows = {person_id: row for row, person_id in enumerate(self.ids)}
+        self.term_matrix = np.vstack([term_vector(profiles[person_id]) for person_id in self.ids]) \
+            if self.ids else np.zeros((0, VECTOR_DIMENSIONS), dtype=np.float32)
+
+    def _update(self, changed):
+        profiles = self._profiles(changed)
+        new_ids = [person_id for person_id in sorted(profiles) if person_id not in self.rows]
+        for person_id in new_ids:
+            self.rows[person_id] = len(self.ids)
+            self.ids.append(person_id)
+        if new_ids:
+            self.term_matrix = np.vstack([
+                self.term_matrix, np.zeros((len(new_ids), VECTOR_DIMENSIONS), dtype=np.float32)
+            ])
+        for person_id, text in profiles.items():
+            self.term_matrix[self.rows[person_id]] = term_vector(text)
+
+    def refresh(self, force=False):
+        """Bring the matrix up to date with the database, at most every RECOMMENDATION_REFRESH_SECONDS"""
+        config = current_app.config
+        now = time.monotonic()
+        if not force and now - self.checked_at < config['RECOMMENDATION_REFRESH_SECONDS']:
+            return
+
+        with self._lock:
+            if not force and now - self.checked_at < config['RECOMMENDATION_REFRESH_SECONDS']:
+                return
+            started = datetime.utcnow()
+            if force or self.synced_at is None or now - self.rebuilt_at >= config['RECOMMENDATION_REBUILD_SECONDS']:
+                self._rebuild()
+                self.rebuilt_at = now
+                logger.info(f"Built {self.model.__tablename__} recommendation matrix with {len(self.ids)} profiles")
+            else:
+                changed = self._changed_ids(self.synced_at - CHANGE_OVERLAP)
+                if not changed:
+                    self.checked_at = now
+                    self.synced_at = started
+                    return
+                self._update(changed)
+            self._reweight()
+            self.synced_at = started
+            self.checked_at = now
+
+    def rank(self, query_vector, eligible_ids, limit):
+        """(id, score) of the best matching eligible profiles, best first"""
+        self.refresh()
+        with self._lock:
+            if not self.ids:
+                return []
+            query = query_vector * self.idf
+            norm = np.linalg.norm(query)
+            if not norm:
+                return []
+            scores = self.matrix @ (query / norm)
+            ids = self.ids
+            mask = np.fromiter((person_id in eligible_ids for person_id in ids), dtype=bool, count=len(ids))
+
+        scores = np.where(mask & (scores > 0), scores, -np.inf)
+        limit = min(limit, int(np.isfinite(scores).sum()))
+        if limit <= 0:
+            return []
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(ids[i], float(scores[i])) for i in top]
+
+# Per-process indexes, keyed by database URL
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_profile_index(kind):
+    """The professor or mentor index of the current database"""
+    key = (str(db.session.get_bind().url), kind)
+    with _indexes_lock:
+        if key not in _indexes:
+            if kind == 'professors':
+                _indexes[key] = ProfileIndex(Professor, [Professor.department, Professor.expertise], Team.professor_id)
+            else:
+                _indexes[key] = ProfileIndex(Mentor, [Mentor.expertise], Team.senior_mentor_id)
+        return _indexes[key]
+
+def team_vector(team_id):
+    """Term vector of all of a team's ideas"""
+    rows = db.session.query(*_idea_columns()).filter(Idea.team_id == team_id).all()
+    return term_vector(' '.join(text for row in rows for text in row if text))
+
+def recommend_mentors(team, limit=5):
+    """
+    Professors and senior mentors whose profiles best match a team's ideas.
+
+    Professors who cannot accept more teams are left out. Mentors have no
+    team limit, so all of them are ranked.
+
+    Returns:
+        dict: {'valid': False, 'message'} if the team has no ideas yet,
+        otherwise {'valid': True, 'professors', 'mentors'}, each a list of
+        people with a 'score' (cosine similarity), best first
+    """
+    query_vector = team_vector(team.id)
+    if not query_vector.any():
+        return {
+            'valid': False,
+            'message': 'Submit an idea first to get recommendations'
+        }
+
+    limit = max(1, min(limit, MAX_RECOMMENDATIONS))
+    available = {professor_id for professor_id, in db.session.query(Professor.id).filter(
+        Professor.accepted_team_count < 3
+    )}
+    mentor_ids = {mentor_id for mentor_id, in db.session.query(Mentor.id)}
+
+    result = {'valid': True}
+    for kind, model, eligible in [('professors', Professor, available), ('mentors', Mentor, mentor_ids)]:
+        ranked = get_profile_index(kind).rank(query_vector, eligible, limit)
+        people = {person.id: person for person in model.query.filter(
+            model.id.in_([person_id for person_id, _ in ranked])
+        )} if ranked else {}
+        result[kind] = [
+            dict(people[person_id].to_dict(), score=round(score, 4))
+            for person_id, score in ranked if person_id in people
+        ]
+    return result
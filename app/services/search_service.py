@@ -0,0 +1,271 @@
+"""
+Full-text search over ideas.
+
+The index lives in the database and is kept in sync on every write by the
+database itself:
+
+- SQLite: an FTS5 table (``ideas_fts``) over the idea text, with the Porter
+  stemmer, filled by triggers on ``ideas`` and ranked with BM25.
+- PostgreSQL: a stored generated ``tsvector`` column (``ideas.search_vector``)
+  with a GIN index, ranked with ``ts_rank_cd``.
+
+Titles weigh most, then the problem statement, then description and
+solution approach. The index is created (and filled from existing ideas) by
+``flask search-index``, a deploy step run after migrations: on PostgreSQL
+adding the generated column rewrites the ideas table under an exclusive
+lock, which must not happen inside a request. Searches only check that the
+index exists.
+"""
+
+import re
+from html import escape
+from sqlalchemy import case, or_, text
+import logging
+from app import db
+from app.models.idea import Idea
+from app.models.team import Team
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Largest page of search results
+MAX_PAGE_SIZE = 50
+
+# Search terms used from a query; the rest are ignored
+MAX_QUERY_TERMS = 12
+
+# Words of context around matches in a snippet
+SNIPPET_WORDS = 24
+
+# Control characters marking matches in the database's snippets; replaced by
+# <mark> tags after the idea text itself is HTML-escaped
+MATCH_START, MATCH_END = '\x02', '\x03'
+
+# Databases whose index this process has already found
+_ready = set()
+
+class SearchIndexMissing(Exception):
+    """Raised when searching a database whose search index has not been created"""
+
+SQLITE_INDEX = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS ideas_fts USING fts5(
+        title, description, problem_statement, solution_approach,
+        content='ideas', content_rowid='id', tokenize='porter unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS ideas_fts_insert AFTER INSERT ON ideas BEGIN
+        INSERT INTO ideas_fts(rowid, title, description, problem_statement, solution_approach)
+        VALUES (new.id, new.title, new.description, new.problem_statement, new.solution_approach);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS ideas_fts_delete AFTER DELETE ON ideas BEGIN
+        INSERT INTO ideas_fts(ideas_fts, rowid, title, description, problem_statement, solution_approach)
+        VALUES ('delete', old.id, old.title, old.description, old.problem_statement, old.solution_approach);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS ideas_fts_update
+    AFTER UPDATE OF title, description, problem_statement, solution_approach ON ideas BEGIN
+        INSERT INTO ideas_fts(ideas_fts, rowid, title, description, problem_statement, solution_approach)
+        VALUES ('delete', old.id, old.title, old.description, old.problem_statement, old.solution_approach);
+        INSERT INTO ideas_fts(rowid, title, description, problem_statement, solution_approach)
+        VALUES (new.id, new.title, new.description, new.problem_statement, new.solution_approach);
+    END"""
+]
+
+POSTGRES_INDEX = [
+    """ALTER TABLE ideas ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(problem_statement, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(solution_approach, '')), 'C')
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_ideas_search_vector ON ideas USING GIN (search_vector)"
+]
+
+def _dialect():
+    return db.session.get_bind().dialect.name
+
+def _index_exists(dialect):
+    if dialect == 'sqlite':
+        return db.session.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ideas_fts'"
+        )).first() is not None
+    if dialect == 'postgresql':
+        return db.session.execute(text(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = 'ideas' AND column_name = 'search_vector'"
+        )).first() is not None
+    # Other databases search without an index
+    return True
+
+def check_search_index():
+    """
+    Make sure the idea search index exists, with one catalog query per
+    process and database.
+
+    Raises:
+        SearchIndexMissing: The index has not been created (``flask search-index``)
+    """
+    bind = db.session.get_bind()
+    key = str(bind.url)
+    if key in _ready:
+        return
+    if not _index_exists(bind.dialect.name):
+        raise SearchIndexMissing('Idea search index is missing; run `flask search-index`')
+    _ready.add(key)
+
+def create_search_index(rebuild=False):
+    """
+    Create the idea search index if it does not exist yet (a deploy step,
+    see the module docstring).
+
+    A new SQLite index is filled from the existing ideas (``rebuild`` forces
+    that); PostgreSQL computes the generated column for existing rows itself.
+    """
+    bind = db.session.get_bind()
+    dialect = bind.dialect.name
+    if dialect == 'sqlite':
+        exists = _index_exists(dialect)
+        for statement in SQLITE_INDEX:
+            db.session.execute(text(statement))
+        if rebuild or not exists:
+            db.session.execute(text("INSERT INTO ideas_fts(ideas_fts) VALUES ('rebuild')"))
+            logger.info("Built the idea search index")
+    elif dialect == 'postgresql':
+        for statement in POSTGRES_INDEX:
+            db.session.execute(text(statement))
+    db.session.commit()
+    _ready.add(str(bind.url))
+
+def _terms(query):
+    return re.findall(r'\w+', (query or '').lower())[:MAX_QUERY_TERMS]
+
+def _mark(snippet):
+    """HTML-escape a snippet and turn the database's match markers into <mark> tags"""
+    return escape(snippet or '').replace(MATCH_START, '<mark>').replace(MATCH_END, '</mark>')
+
+def _sqlite_search(terms, team_id, limit, offset):
+    # Every term must match (quoted, so no FTS syntax gets through)
+    match = ' '.join(f'"{term}"' for term in terms)
+    team_filter = 'AND ideas.team_id = :team_id' if team_id is not None else ''
+    params = {'match': match, 'team_id': team_id, 'limit': limit, 'offset': offset}
+
+    total = db.session.execute(text(f"""
+        SELECT count(*) FROM ideas_fts JOIN ideas ON ideas.id = ideas_fts.rowid
+        WHERE ideas_fts MATCH :match {team_filter}
+    """), params).scalar()
+    rows = db.session.execute(text(f"""
+        SELECT ideas.id, -bm25(ideas_fts, 10.0, 1.0, 4.0, 2.0) AS score,
+               highlight(ideas_fts, 0, :start, :end) AS title,
+               snippet(ideas_fts, -1, :start, :end, '…', {SNIPPET_WORDS}) AS snippet
+        FROM ideas_fts JOIN ideas ON ideas.id = ideas_fts.rowid
+        WHERE ideas_fts MATCH :match {team_filter}
+        ORDER BY bm25(ideas_fts, 10.0, 1.0, 4.0, 2.0), ideas.id
+        LIMIT :limit OFFSET :offset
+    """), dict(params, start=MATCH_START, end=MATCH_END)).all()
+    return total, rows
+
+def _postgres_search(terms, team_id, limit, offset):
+    # Only the page's rows get headlines, which are the expensive part
+    team_filter = 'AND ideas.team_id = :team_id' if team_id is not None else ''
+    params = {'query': ' '.join(terms), 'team_id': team_id, 'limit': limit, 'offset': offset}
+    options = (f'StartSel="{MATCH_START}", StopSel="{MATCH_END}", MaxWords={SNIPPET_WORDS}, '
+               f'MinWords={SNIPPET_WORDS // 3}, MaxFragments=2, FragmentDelimiter=" … "')
+
+    total = db.session.execute(text(f"""
+        SELECT count(*) FROM ideas
+        WHERE search_vector @@ plainto_tsquery('english', :query) {team_filter}
+    """), params).scalar()
+    rows = db.session.execute(text(f"""
+        SELECT page.id, page.score,
+               ts_headline('english', ideas.title, page.query, :title_options) AS title,
+               ts_headline('english', concat_ws(' ', ideas.problem_statement, ideas.description,
+                                                ideas.solution_approach), page.query, :options) AS snippet
+        FROM (
+            SELECT ideas.id, ts_rank_cd(search_vector, query) AS score, query
+            FROM ideas, plainto_tsquery('english', :query) AS query
+            WHERE search_vector @@ query {team_filter}
+            ORDER BY score DESC, ideas.id
+            LIMIT :limit OFFSET :offset
+        ) AS page JOIN ideas ON ideas.id = page.id
+        ORDER BY page.score DESC, page.id
+    """), dict(params, options=options,
+               title_options=f'StartSel="{MATCH_START}", StopSel="{MATCH_END}", HighlightAll=true')).all()
+    return total, rows
+
+def _fallback_search(terms, team_id, limit, offset):
+    # Other databases: every term must appear somewhere, titles first
+    fields = [Idea.title, Idea.description, Idea.problem_statement, Idea.solution_approach]
+    query = Idea.query.filter(*[or_(*[field.ilike(f'%{term}%') for field in fields]) for term in terms])
+    if team_id is not None:
+        query = query.filter(Idea.team_id == team_id)
+    in_title = case((or_(*[Idea.title.ilike(f'%{term}%') for term in terms]), 0), else_=1)
+    ideas = query.order_by(in_title, Idea.id).limit(limit).offset(offset).all()
+    rows = [(idea.id, None, idea.title, idea.description[:SNIPPET_WORDS * 8]) for idea in ideas]
+    return query.count(), rows
+
+def search_ideas(query, team_id=None, page=1, per_page=20):
+    """
+    Ranked full-text search over idea titles, descriptions, problem
+    statements and solution approaches.
+
+    Every word of the query must match (after stemming, so "sensors" finds
+    "sensor"). Results are ordered by relevance and paginated; each has the
+    title and a snippet of the best matching text with matches in <mark>
+    tags, everything else HTML-escaped.
+
+    Returns:
+        dict: {'valid': False, 'message'} for an empty query (with 'status'
+        503 when the search index has not been created), otherwise
+        {'valid': True, 'results', 'total', 'page', 'per_page'}
+    """
+    terms = _terms(query)
+    if not terms:
+        return {
+            'valid': False,
+            'message': 'Search query must contain at least one word'
+        }
+
+    page = max(page, 1)
+    per_page = max(1, min(per_page, MAX_PAGE_SIZE))
+    offset = (page - 1) * per_page
+
+    try:
+        check_search_index()
+    except SearchIndexMissing as e:
+        logger.error(str(e))
+        return {
+            'valid': False,
+            'message': 'Search is not available yet',
+            'status': 503
+        }
+    dialect = _dialect()
+    search = {'sqlite': _sqlite_search, 'postgresql': _postgres_search}.get(dialect, _fallback_search)
+    total, rows = search(terms, team_id, per_page, offset)
+
+    # One query for the page's ideas and team names
+    ids = [row[0] for row in rows]
+    ideas = {
+        idea.id: (idea, team_name) for idea, team_name in
+        db.session.query(Idea, Team.name).join(Team, Team.id == Idea.team_id).filter(Idea.id.in_(ids)).all()
+    } if ids else {}
+
+    results = []
+    for idea_id, score, title, snippet in rows:
+        idea, team_name = ideas[idea_id]
+        results.append({
+            'id': idea.id,
+            'title': idea.title,
+            'team_id': idea.team_id,
+            'team_name': team_name,
+            'score': score,
+            'highlighted_title': _mark(title),
+            'snippet': _mark(snippet),
+            'created_at': idea.created_at.isoformat()
+        })
+
+    return {
+        'valid': True,
+        'results': results,
+        'total': total,
+        'page': page,
+        'per_page': per_page
+    }
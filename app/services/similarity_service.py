@@ -0,0 +1,276 @@
+"""
+Near-duplicate detection for ideas with MinHash and locality-sensitive
+hashing.
+
+Each idea's text is split into overlapping word shingles and summarised by
+a MinHash signature of NUM_PERMUTATIONS values; the fraction of positions in
+which two signatures agree estimates the Jaccard similarity of the ideas'
+shingle sets. Signatures are cut into NUM_BANDS bands and every band is
+hashed into a bucket (the ``idea_lsh_bands`` table), so ideas that are
+likely similar share at least one bucket. Only ideas sharing a bucket are
+ever compared, never all pairs.
+
+With 32 bands of 4 values, pairs with a similarity of 0.5 share a bucket
+with a probability of about 87% and pairs of 0.8 almost always do; pairs
+of 0.2 rarely do.
+"""
+
+import hashlib
+import re
+from functools import lru_cache
+import numpy as np
+from flask import current_app
+from sqlalchemy import and_, func, insert, select
+from sqlalchemy.orm import aliased
+import logging
+from app import db
+from app.models.idea import Idea
+from app.models.idea_signature import IdeaLshBand, IdeaSignature
+from app.models.team import Team
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Words per shingle
+SHINGLE_SIZE = 3
+
+# Signature length and how it is cut into bands. Stored signatures depend
+# on these: after changing them run `flask idea-signatures --rebuild`.
+NUM_PERMUTATIONS = 128
+NUM_BANDS = 32
+ROWS_PER_BAND = NUM_PERMUTATIONS // NUM_BANDS
+
+# Buckets with more members than this are verified against their first
+# member only, so a flood of identical ideas stays linear
+MAX_BUCKET_PAIRWISE = 50
+
+# Ideas (re)indexed per transaction when backfilling
+INDEX_BATCH_SIZE = 1000
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+@lru_cache(maxsize=None)
+def _permutations():
+    """Coefficients of the hash functions; fixed, so signatures stay comparable across processes"""
+    rng = np.random.RandomState(1)
+    a = rng.randint(1, 1 << 31, size=NUM_PERMUTATIONS).astype(np.uint64)
+    b = rng.randint(0, 1 << 31, size=NUM_PERMUTATIONS).astype(np.uint64)
+    return a, b
+
+def idea_text(idea):
+    """All the text of an idea that counts towards similarity"""
+    return ' '.join(filter(None, [idea.title, idea.problem_statement, idea.description, idea.solution_approach]))
+
+def shingles(text):
+    """Set of overlapping SHINGLE_SIZE-word sequences of a text, case-insensitive"""
+    words = re.findall(r'\w+', text.lower())
+    if len(words) <= SHINGLE_SIZE:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+def minhash(text):
+    """MinHash signature of a text (NUM_PERMUTATIONS uint32 values)"""
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=4).digest(), 'little')
+         for shingle in shingles(text) or {''}),
+        dtype=np.uint64
+    )
+    a, b = _permutations()
+    # (a * x + b) mod p for every shingle and permutation; a < 2^31 and
+    # x < 2^32, so nothing overflows 64 bits
+    permuted = (np.outer(hashes, a) + b) % _MERSENNE_PRIME & _MAX_HASH
+    return permuted.min(axis=0).astype('<u4')
+
+def band_buckets(signature):
+    """Bucket of each band of a signature, as signed 64-bit integers"""
+    return [
+        int.from_bytes(hashlib.blake2b(band.tobytes(), digest_size=8).digest(), 'little', signed=True)
+        for band in signature.reshape(NUM_BANDS, ROWS_PER_BAND)
+    ]
+
+def _load_signature(data):
+    return np.frombuffer(data, dtype='<u4')
+
+def _store_signatures(signatures):
+    """Replace the stored signatures and buckets of the given ideas ({idea id: signature})"""
+    ids = list(signatures)
+    IdeaLshBand.query.filter(IdeaLshBand.idea_id.in_(ids)).delete(synchronize_session=False)
+    IdeaSignature.query.filter(IdeaSignature.idea_id.in_(ids)).delete(synchronize_session=False)
+    db.session.execute(insert(IdeaSignature), [
+        {'idea_id': idea_id, 'signature': signature.tobytes()} for idea_id, signature in signatures.items()
+    ])
+    db.session.execute(insert(IdeaLshBand), [
+        {'idea_id': idea_id, 'band': band, 'bucket': bucket}
+        for idea_id, signature in signatures.items()
+        for band, bucket in enumerate(band_buckets(signature))
+    ])
+
+def index_idea(idea):
+    """(Re)index an idea after its text changed, in the current transaction"""
+    _store_signatures({idea.id: minhash(idea_text(idea))})
+
+def remove_idea_index(idea_id):
+    """Drop a deleted idea from the index, in the current transaction"""
+    IdeaLshBand.query.filter_by(idea_id=idea_id).delete(synchronize_session=False)
+    IdeaSignature.query.filter_by(idea_id=idea_id).delete(synchronize_session=False)
+
+def index_missing_ideas(rebuild=False):
+    """
+    Index ideas that have no signature yet (or every idea with ``rebuild``),
+    INDEX_BATCH_SIZE per transaction.
+
+    Returns:
+        int: Number of ideas indexed
+    """
+    indexed = 0
+    last_id = 0
+    while True:
+        query = db.session.query(
+            Idea.id, Idea.title, Idea.problem_statement, Idea.description, Idea.solution_approach
+        ).filter(Idea.id > last_id)
+        if not rebuild:
+            query = query.outerjoin(IdeaSignature, IdeaSignature.idea_id == Idea.id).filter(
+                IdeaSignature.idea_id.is_(None)
+            )
+        rows = query.order_by(Idea.id).limit(INDEX_BATCH_SIZE).all()
+        if not rows:
+            break
+
+        _store_signatures({row.id: minhash(idea_text(row)) for row in rows})
+        db.session.commit()
+        indexed += len(rows)
+        last_id = rows[-1].id
+
+    if indexed:
+        logger.info(f"Indexed {indexed} ideas for duplicate detection")
+    return indexed
+
+def _summaries(idea_ids):
+    """id -> summary of each idea, with one query"""
+    rows = db.session.query(Idea.id, Idea.title, Idea.team_id, Team.name).join(
+        Team, Team.id == Idea.team_id
+    ).filter(Idea.id.in_(idea_ids)).all() if idea_ids else []
+    return {
+        idea_id: {'id': idea_id, 'title': title, 'team_id': team_id, 'team_name': team_name}
+        for idea_id, title, team_id, team_name in rows
+    }
+
+def similar_ideas(idea, limit=10, threshold=None):
+    """
+    Ideas whose estimated similarity to ``idea`` is at least ``threshold``
+    (IDEA_DUPLICATE_THRESHOLD by default), most similar first.
+
+    Only ideas sharing an LSH bucket with it are compared. Read-only: an
+    idea not indexed yet (see ``flask idea-signatures``) has no matches.
+    """
+    threshold = current_app.config['IDEA_DUPLICATE_THRESHOLD'] if threshold is None else threshold
+    own = db.session.get(IdeaSignature, idea.id)
+    if own is None:
+        return []
+
+    mine, other = aliased(IdeaLshBand), aliased(IdeaLshBand)
+    candidates = select(other.idea_id).join(
+        mine, and_(mine.band == other.band, mine.bucket == other.bucket)
+    ).where(mine.idea_id == idea.id, other.idea_id != idea.id).distinct()
+    rows = db.session.query(IdeaSignature.idea_id, IdeaSignature.signature).filter(
+        IdeaSignature.idea_id.in_(candidates)
+    ).all()
+    if not rows:
+        return []
+
+    ids = np.array([idea_id for idea_id, _ in rows])
+    matrix = np.vstack([_load_signature(data) for _, data in rows])
+    scores = (matrix == _load_signature(own.signature)).mean(axis=1)
+    order = [i for i in np.argsort(-scores, kind='stable') if scores[i] >= threshold][:limit]
+
+    summaries = _summaries([int(ids[i]) for i in order])
+    return [dict(summaries[int(ids[i])], similarity=round(float(scores[i]), 3)) for i in order]
+
+def _find(parents, i):
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+    return i
+
+def duplicate_clusters(threshold=None):
+    """
+    Groups of near-duplicate ideas across the whole cohort.
+
+    Candidate pairs come from shared LSH buckets (found by the database with
+    one GROUP BY), are verified against their signatures in bulk, and the
+    verified pairs are merged into clusters with union-find. Only indexed
+    ideas are included (``flask idea-signatures`` indexes the rest).
+
+    Returns:
+        dict: 'clusters' (largest first; each with 'ideas', 'size',
+        'team_count' and 'max_similarity'), 'indexed_ideas' and 'threshold'
+    """
+    threshold = current_app.config['IDEA_DUPLICATE_THRESHOLD'] if threshold is None else threshold
+
+    shared = db.session.query(IdeaLshBand.band, IdeaLshBand.bucket).group_by(
+        IdeaLshBand.band, IdeaLshBand.bucket
+    ).having(func.count() > 1).subquery()
+    members = db.session.query(IdeaLshBand.band, IdeaLshBand.bucket, IdeaLshBand.idea_id).join(
+        shared, and_(shared.c.band == IdeaLshBand.band, shared.c.bucket == IdeaLshBand.bucket)
+    ).order_by(IdeaLshBand.band, IdeaLshBand.bucket, IdeaLshBand.idea_id).all()
+
+    # Candidate pairs per bucket, as positions in the signature matrix
+    positions = {}
+    pairs = set()
+    bucket, bucket_members = None, []
+    for band, bucket_hash, idea_id in members + [(None, None, None)]:
+        if (band, bucket_hash) != bucket:
+            if len(bucket_members) > MAX_BUCKET_PAIRWISE:
+                pairs.update((bucket_members[0], j) for j in bucket_members[1:])
+            else:
+                pairs.update((i, j) for n, i in enumerate(bucket_members) for j in bucket_members[n + 1:])
+            bucket, bucket_members = (band, bucket_hash), []
+        if idea_id is not None:
+            bucket_members.append(positions.setdefault(idea_id, len(positions)))
+
+    indexed = db.session.query(func.count(IdeaSignature.idea_id)).scalar()
+    result = {'clusters': [], 'indexed_ideas': indexed, 'threshold': threshold}
+    if not pairs:
+        return result
+
+    ids = list(positions)
+    in_buckets = select(IdeaLshBand.idea_id).join(
+        shared, and_(shared.c.band == IdeaLshBand.band, shared.c.bucket == IdeaLshBand.bucket)
+    )
+    data = dict(db.session.query(IdeaSignature.idea_id, IdeaSignature.signature).filter(
+        IdeaSignature.idea_id.in_(in_buckets)
+    ).all())
+    matrix = np.vstack([_load_signature(data[idea_id]) for idea_id in ids])
+    left, right = np.array(list(pairs)).T
+    scores = (matrix[left] == matrix[right]).mean(axis=1)
+    verified = scores >= threshold
+    edges = list(zip(left[verified].tolist(), right[verified].tolist(), scores[verified].tolist()))
+
+    parents = list(range(len(ids)))
+    for i, j, _ in edges:
+        root_i, root_j = _find(parents, i), _find(parents, j)
+        if root_i != root_j:
+            parents[root_j] = root_i
+
+    clusters, best = {}, {}
+    for i, _, score in edges:
+        root = _find(parents, i)
+        best[root] = max(best.get(root, 0), score)
+    for position in range(len(ids)):
+        root = _find(parents, position)
+        if root in best:
+            clusters.setdefault(root, []).append(ids[position])
+
+    summaries = _summaries([idea_id for group in clusters.values() for idea_id in group])
+    for root, group in clusters.items():
+        ideas = [summaries[idea_id] for idea_id in sorted(group) if idea_id in summaries]
+        result['clusters'].append({
+            'size': len(ideas),
+            'team_count': len({idea['team_id'] for idea in ideas}),
+            'max_similarity': round(best.get(root, 0), 3),
+            'ideas': ideas
+        })
+    result['clusters'].sort(key=lambda cluster: (-cluster['size'], -cluster['max_similarity']))
+    return result
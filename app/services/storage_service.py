@@ -0,0 +1,344 @@
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta, timezone
+import urllib3
+from minio.datatypes import PostPolicy
+from minio.error import S3Error, ServerError
+from flask import current_app
+import logging
+from app.utils.cache import LRUCache
+from app.utils.circuit_breaker import CircuitBreaker
+from app.utils.storage_backend import MinioBackend
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# One client per process (rebuilt after a fork, since sockets must not be shared)
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+# Buckets known to exist, so the check is made once per process
+_ready_buckets = set()
+
+# Presigned download URLs, keyed by (storage path, signing window)
+_url_cache = None
+
+# Per-operation call count and latency
+_stats = {}
+_stats_lock = threading.Lock()
+
+# Breaker failing storage calls fast while storage is down (one per process)
+_breaker = None
+_breaker_pid = None
+
+# Operations computed locally (URL signing), which work whatever the state of storage
+LOCAL_OPERATIONS = {'presign', 'presign_upload'}
+
+# S3 error codes meaning the service itself is in trouble, not the request
+UNAVAILABLE_CODES = {'InternalError', 'ServiceUnavailable', 'SlowDown', 'RequestTimeout'}
+
+def create_storage_client(config):
+    """
+    Build a storage client from configuration.
+
+    Every backend implements the interface in app/utils/storage_backend.py.
+    STORAGE_BACKEND selects it: 'minio' (also for AWS S3 and other
+    S3-compatible services), 'local' for a directory on this server, or
+    'memory' for an in-process stand-in, so tests need no storage server.
+    """
+    backend = config['STORAGE_BACKEND']
+    if backend == 'memory':
+        from app.utils.memory_storage import MemoryStorage
+        return MemoryStorage()
+    if backend == 'local':
+        from app.utils.local_storage import LocalStorage
+        return LocalStorage(config['LOCAL_STORAGE_ROOT'], config['SECRET_KEY'], config['LOCAL_STORAGE_URL_BASE'])
+    if backend not in ('minio', 's3'):
+        raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+
+    # Keep-alive connections shared by every request handled in this process;
+    # maxsize must cover parallel part uploads from concurrent requests
+    http_client = urllib3.PoolManager(
+        maxsize=config['STORAGE_POOL_SIZE'],
+        block=True,
+        timeout=urllib3.Timeout(connect=config['STORAGE_CONNECT_TIMEOUT'], read=config['STORAGE_READ_TIMEOUT']),
+        # Idempotent requests are retried a bounded number of times with
+        # jittered backoff, so retries from many workers do not line up
+        retries=urllib3.Retry(
+            total=config['STORAGE_RETRIES'],
+            backoff_factor=0.2,
+            backoff_jitter=0.2,
+            backoff_max=config['STORAGE_RETRY_MAX_SECONDS'],
+            status_forcelist=[500, 502, 503, 504]
+        )
+    )
+    return MinioBackend(
+        config['MINIO_ENDPOINT'],
+        access_key=config['MINIO_ACCESS_KEY'],
+        secret_key=config['MINIO_SECRET_KEY'],
+        secure=config['MINIO_SECURE'],
+        # A known region lets presigned URLs be signed locally, without a
+        # bucket location lookup
+        region=config['MINIO_REGION'],
+        http_client=http_client
+    )
+
+def get_storage_client():
+    """Shared storage client for the current process"""
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                _client = create_storage_client(current_app.config)
+                _client_pid = pid
+                _ready_buckets.clear()
+                _get_url_cache().clear()
+    return _client
+
+def reset_storage_client():
+    """Drop the shared client (e.g. after changing storage configuration)"""
+    global _client, _client_pid
+    with _client_lock:
+        _client = None
+        _client_pid = None
+        _ready_buckets.clear()
+        _get_url_cache().clear()
+
+def ensure_bucket(bucket_name=None):
+    """Create the bucket if needed; only the first call per process talks to storage"""
+    bucket_name = bucket_name or current_app.config['MINIO_BUCKET_NAME']
+    if bucket_name in _ready_buckets:
+        return
+
+    client = get_storage_client()
+    with timed('bucket_exists'):
+        exists = client.bucket_exists(bucket_name)
+    if not exists:
+        with timed('make_bucket'):
+            client.make_bucket(bucket_name)
+        logger.info(f"Created bucket: {bucket_name}")
+    _ready_buckets.add(bucket_name)
+
+def init_storage(app):
+    """
+    Set up the storage bucket at startup.
+
+    A storage outage must not keep the app from starting, so failures are
+    logged and the bucket is checked again on first use.
+    """
+    with app.app_context():
+        try:
+            ensure_bucket()
+        except Exception as e:
+            logger.warning(f"Storage not ready at startup: {str(e)}")
+
+def _get_url_cache():
+    global _url_cache
+    if _url_cache is None:
+        _url_cache = LRUCache(current_app.config['PRESIGNED_URL_CACHE_SIZE'])
+    return _url_cache
+
+def split_storage_path(storage_path):
+    """Split a stored 'bucket/object' path into its two parts"""
+    bucket_name, object_name = storage_path.split('/', 1)
+    return bucket_name, object_name
+
+def presigned_urls(storage_paths):
+    """
+    Presigned download URLs for many objects at once.
+
+    Time is divided into windows of PRESIGNED_URL_REFRESH_SECONDS and every
+    URL is signed as of the start of the current window, valid for
+    PRESIGNED_URL_EXPIRY_SECONDS. Within a window the URL for an object is
+    therefore always the same and comes from the cache; once the window
+    rolls over a fresh one is signed, so a URL handed out always has at
+    least expiry - refresh seconds left. URLs are never stored in the
+    database. Signing is local (no storage request), and a batch shares one
+    clock read and one client lookup.
+
+    Args:
+        storage_paths (list): 'bucket/object' paths
+
+    Returns:
+        dict: storage path -> URL
+    """
+    config = current_app.config
+    refresh = config['PRESIGNED_URL_REFRESH_SECONDS']
+    expires = timedelta(seconds=config['PRESIGNED_URL_EXPIRY_SECONDS'])
+    window = int(time.time()) // refresh
+    signed_at = datetime.fromtimestamp(window * refresh, timezone.utc)
+
+    cache = _get_url_cache()
+    client = None
+    urls = {}
+    for storage_path in dict.fromkeys(storage_paths):
+        key = (storage_path, window)
+        url = cache.get(key)
+        if url is None:
+            if client is None:
+                client = get_storage_client()
+            bucket_name, object_name = split_storage_path(storage_path)
+            with timed('presign'):
+                url = client.presigned_get_object(bucket_name, object_name, expires=expires, request_date=signed_at)
+            cache.set(key, url)
+        urls[storage_path] = url
+    return urls
+
+def presigned_url(storage_path):
+    """Presigned download URL for one 'bucket/object' path"""
+    return presigned_urls([storage_path])[storage_path]
+
+def bucket_url(bucket_name):
+    """URL that presigned POST forms are submitted to"""
+    config = current_app.config
+    if config['STORAGE_BACKEND'] == 'memory':
+        return f"memory://{bucket_name}"
+    scheme = 'https' if config['MINIO_SECURE'] else 'http'
+    return f"{scheme}://{config['MINIO_ENDPOINT']}/{bucket_name}"
+
+def supports_presigned_uploads():
+    """Whether the storage backend accepts uploads straight from clients"""
+    return getattr(get_storage_client(), 'supports_presigned_uploads', True)
+
+def presigned_upload(storage_path, content_type, max_size, expires, method='post'):
+    """
+    Presigned request letting a client upload one object straight to storage.
+
+    A POST policy pins the key and Content-Type and limits the size to
+    ``max_size``; a presigned PUT cannot constrain either, so those are
+    checked when the upload is completed.
+
+    Returns:
+        dict: 'method', 'url' and, for POST, the form 'fields' to send
+    """
+    bucket_name, object_name = split_storage_path(storage_path)
+    client = get_storage_client()
+    with timed('presign_upload'):
+        if method == 'put':
+            url = client.presigned_put_object(bucket_name, object_name, expires=expires)
+            return {'method': 'PUT', 'url': url, 'headers': {'Content-Type': content_type}}
+
+        policy = PostPolicy(bucket_name, datetime.now(timezone.utc) + expires)
+        policy.add_equals_condition('key', object_name)
+        policy.add_equals_condition('Content-Type', content_type)
+        policy.add_content_length_range_condition(1, max_size)
+        fields = client.presigned_post_policy(policy)
+    return {
+        'method': 'POST',
+        'url': bucket_url(bucket_name),
+        'fields': {'key': object_name, 'Content-Type': content_type, **fields}
+    }
+
+def stat_stored_object(storage_path):
+    """Metadata of a stored object (a HEAD request); raises S3Error if missing"""
+    bucket_name, object_name = split_storage_path(storage_path)
+    with timed('stat_object'):
+        return get_storage_client().stat_object(bucket_name, object_name)
+
+def create_multipart_upload(storage_path, content_type):
+    """Start a multipart upload of a 'bucket/object' path; returns its upload ID"""
+    bucket_name, object_name = split_storage_path(storage_path)
+    with timed('create_multipart_upload'):
+        return get_storage_client().create_multipart_upload(bucket_name, object_name, content_type)
+
+def upload_part(storage_path, upload_id, part_number, data):
+    """Upload one part of a multipart upload; returns its ETag"""
+    bucket_name, object_name = split_storage_path(storage_path)
+    with timed('upload_part'):
+        return get_storage_client().upload_part(bucket_name, object_name, upload_id, part_number, data)
+
+def complete_multipart_upload(storage_path, upload_id, parts):
+    """Assemble a multipart upload from (part number, ETag) pairs"""
+    bucket_name, object_name = split_storage_path(storage_path)
+    with timed('complete_multipart_upload'):
+        get_storage_client().complete_multipart_upload(bucket_name, object_name, upload_id, parts)
+
+def abort_multipart_upload(storage_path, upload_id):
+    """Discard a multipart upload and the parts stored for it"""
+    bucket_name, object_name = split_storage_path(storage_path)
+    with timed('abort_multipart_upload'):
+        get_storage_client().abort_multipart_upload(bucket_name, object_name, upload_id)
+
+def is_storage_failure(error):
+    """Whether an error means storage is unreachable or failing, rather than refusing one request"""
+    if isinstance(error, S3Error):
+        return error.code in UNAVAILABLE_CODES
+    return isinstance(error, (ServerError, urllib3.exceptions.HTTPError, ConnectionError, TimeoutError))
+
+def get_storage_breaker():
+    """
+    Circuit breaker guarding storage calls in this process.
+
+    While it is open, storage calls raise CircuitOpenError at once and a
+    background thread checks the bucket every CIRCUIT_RESET_SECONDS.
+    """
+    global _breaker, _breaker_pid
+    pid = os.getpid()
+    if _breaker is None or _breaker_pid != pid:
+        with _client_lock:
+            if _breaker is None or _breaker_pid != pid:
+                app = current_app._get_current_object()
+
+                def probe():
+                    with app.app_context():
+                        get_storage_client().bucket_exists(app.config['MINIO_BUCKET_NAME'])
+
+                _breaker = CircuitBreaker(
+                    'Storage',
+                    failure_threshold=app.config['CIRCUIT_FAILURE_THRESHOLD'],
+                    reset_seconds=app.config['CIRCUIT_RESET_SECONDS'],
+                    is_failure=is_storage_failure,
+                    probe=probe
+                )
+                _breaker_pid = pid
+    return _breaker
+
+def check_storage_available():
+    """Raise CircuitOpenError before any work is done if storage is known to be down"""
+    get_storage_breaker().check()
+
+@contextmanager
+def timed(operation):
+    """Record the duration of a storage operation, failing fast while storage is down"""
+    # Entering the guard raises CircuitOpenError without calling storage
+    with nullcontext() if operation in LOCAL_OPERATIONS else get_storage_breaker().guard():
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with _stats_lock:
+                stats = _stats.setdefault(operation, {'count': 0, 'errors': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+                stats['count'] += 1
+                stats['errors'] += failed
+                stats['total_seconds'] += elapsed
+                stats['max_seconds'] = max(stats['max_seconds'], elapsed)
+            if elapsed > current_app.config['STORAGE_SLOW_SECONDS']:
+                logger.warning(f"Slow storage operation {operation}: {elapsed:.3f}s")
+
+def get_storage_stats():
+    """Call counts and latencies per storage operation in this process"""
+    with _stats_lock:
+        return {
+            operation: {
+                'count': stats['count'],
+                'errors': stats['errors'],
+                'avg_ms': round(stats['total_seconds'] / stats['count'] * 1000, 2),
+                'max_ms': round(stats['max_seconds'] * 1000, 2)
+            }
+            for operation, stats in _stats.items()
+        }
+
+def get_url_cache_stats():
+    """Size and hit rate of the presigned URL cache"""
+    cache = _get_url_cache()
+    return {'size': len(cache), 'hits': cache.hits, 'misses': cache.misses}
@@ -0,0 +1,237 @@
+"""
+Typeahead search over students, teams, professors and senior mentors.
+
+Every searchable text is normalised (lower case, accents and punctuation
+dropped) into keys kept in sorted in-memory lists, one per kind of entity and
+match tier, so finding the entries starting with a prefix is a binary search
+followed by a short scan. Tiers rank matches:
+
+0. the start of a name ("ali" finds "Alice Smith")
+1. the start of a later word of a name ("smi" finds "Alice Smith")
+2. the start of a secondary field or one of its words: a student's roll
+   number, a professor's department
+
+The lists live in each process and are refreshed incrementally: at most every
+TYPEAHEAD_REFRESH_SECONDS the rows updated since the last refresh are
+re-keyed. A full rebuild every TYPEAHEAD_REBUILD_SECONDS picks up deletions.
+"""
+
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from itertools import islice
+from flask import current_app
+import logging
+from app import db
+from app.models.mentor import Mentor
+from app.models.professor import Professor
+from app.models.student import Student
+from app.models.team import Team
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Most results returned at once
+MAX_RESULTS = 25
+
+# Match tiers, best first
+NAME_START, NAME_WORD, SECONDARY = 0, 1, 2
+TIERS = (NAME_START, NAME_WORD, SECONDARY)
+
+# Overlap when looking for rows changed since the last refresh, for writes
+# committed while it ran and clock differences between app servers
+CHANGE_OVERLAP = timedelta(seconds=5)
+
+def normalize(text):
+    """Lower-case words of a text, without accents or punctuation, joined by single spaces"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(re.findall(r'\w+', text.lower()))
+
+def _word_starts(text):
+    """The text from the start of each of its words"""
+    words = normalize(text).split(' ')
+    return [' '.join(words[i:]) for i in range(len(words)) if words[i]]
+
+def _keys(name, *secondary):
+    """(tier, key) of everything an entity is found by"""
+    starts = _word_starts(name)
+    keys = {(NAME_START, starts[0])} if starts else set()
+    keys.update((NAME_WORD, key) for key in starts[1:])
+    for text in secondary:
+        keys.update((SECONDARY, key) for key in _word_starts(text))
+    return keys
+
+# kind -> (model, columns loaded, function turning a row into (keys, result))
+SOURCES = {
+    'student': (Student, [Student.id, Student.name, Student.roll_no, Student.team_id], lambda row: (
+        _keys(row.name, row.roll_no),
+        {'id': row.id, 'name': row.name, 'roll_no': row.roll_no, 'team_id': row.team_id}
+    )),
+    'team': (Team, [Team.id, Team.name, Team.is_locked], lambda row: (
+        _keys(row.name),
+        {'id': row.id, 'name': row.name, 'is_locked': row.is_locked}
+    )),
+    'professor': (Professor, [Professor.id, Professor.name, Professor.department], lambda row: (
+        _keys(row.name, row.department),
+        {'id': row.id, 'name': row.name, 'department': row.department}
+    )),
+    'mentor': (Mentor, [Mentor.id, Mentor.name, Mentor.year], lambda row: (
+        _keys(row.name),
+        {'id': row.id, 'name': row.name, 'year': row.year}
+    ))
+}
+
+class TypeaheadIndex:
+    """Sorted (key, id) lists per kind and tier of one database, with the result of every entity"""
+
+    def __init__(self):
+        self.lists = {(kind, tier): [] for kind in SOURCES for tier in TIERS}
+        self.entities = {}
+        self.synced_at = None
+        self.checked_at = 0
+        self.rebuilt_at = 0
+        self._lock = threading.Lock()
+
+    def _rows(self, kind, since=None):
+        model, columns, _ = SOURCES[kind]
+        query = db.session.query(*columns)
+        if since is not None:
+            query = query.filter(model.updated_at >= since)
+        return query.yield_per(5000)
+
+    def _rebuild(self):
+        lists = {key: [] for key in self.lists}
+        entities = {}
+        for kind, (_, _, entry) in SOURCES.items():
+            for row in self._rows(kind):
+                keys, result = entry(row)
+                entities[(kind, row.id)] = (keys, result)
+                for tier, key in keys:
+                    lists[(kind, tier)].append((key, row.id))
+        for entries in lists.values():
+            entries.sort()
+        self.lists, self.entities = lists, entities
+
+    def _remove(self, kind, entity_id):
+        keys, _ = self.entities.pop((kind, entity_id), (set(), None))
+        for tier, key in keys:
+            entries = self.lists[(kind, tier)]
+            position = bisect_left(entries, (key, entity_id))
+            if position < len(entries) and entries[position] == (key, entity_id):
+                del entries[position]
+
+    def _update(self, since):
+        changed = 0
+        for kind, (_, _, entry) in SOURCES.items():
+            for row in self._rows(kind, since):
+                keys, result = entry(row)
+                self._remove(kind, row.id)
+                self.entities[(kind, row.id)] = (keys, result)
+                for tier, key in keys:
+                    insort(self.lists[(kind, tier)], (key, row.id))
+                changed += 1
+        return changed
+
+    def refresh(self, force=False):
+        """Bring the lists up to date with the database, at most every TYPEAHEAD_REFRESH_SECONDS"""
+        config = current_app.config
+        now = time.monotonic()
+        if not force and now - self.checked_at < config['TYPEAHEAD_REFRESH_SECONDS']:
+            return
+
+        with self._lock:
+            if not force and now - self.checked_at < config['TYPEAHEAD_REFRESH_SECONDS']:
+                return
+            started = datetime.utcnow()
+            if force or self.synced_at is None or now - self.rebuilt_at >= config['TYPEAHEAD_REBUILD_SECONDS']:
+                self._rebuild()
+                self.rebuilt_at = now
+                logger.info(f"Built typeahead index with {len(self.entities)} entries")
+            else:
+                self._update(self.synced_at - CHANGE_OVERLAP)
+            self.synced_at = started
+            self.checked_at = now
+
+    def _matches(self, kind, tier, prefix):
+        entries = self.lists[(kind, tier)]
+        position = bisect_left(entries, (prefix,))
+        while position < len(entries) and entries[position][0].startswith(prefix):
+            yield entries[position]
+            position += 1
+
+    def search(self, prefix, kinds, limit):
+        """Results of the first ``limit`` entities matching ``prefix``, best tier first, then alphabetically"""
+        self.refresh()
+        results = []
+        seen = set()
+        with self._lock:
+            for tier in TIERS:
+                # Each kind's matches are already sorted, so only the first few
+                # of each can make it into the results (some may already be
+                # in them from a better tier)
+                wanted = limit + len(results)
+                candidates = sorted(
+                    (key, kind, entity_id)
+                    for kind in kinds
+                    for key, entity_id in islice(self._matches(kind, tier, prefix), wanted)
+                )
+                for _, kind, entity_id in candidates:
+                    if (kind, entity_id) in seen:
+                        continue
+                    seen.add((kind, entity_id))
+                    results.append(dict(self.entities[(kind, entity_id)][1], type=kind))
+                    if len(results) >= limit:
+                        return results
+        return results
+
+# Per-process indexes, keyed by database URL
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_typeahead_index():
+    """The typeahead index of the current database"""
+    key = str(db.session.get_bind().url)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = TypeaheadIndex()
+        return _indexes[key]
+
+def typeahead(query, types=None, limit=10):
+    """
+    Students, teams, professors and mentors whose names (or roll numbers or
+    departments) start with what has been typed so far.
+
+    Args:
+        query (str): Typed text; matched case- and accent-insensitively
+        types (list): Kinds to search ('student', 'team', 'professor',
+            'mentor'), all by default
+
+    Returns:
+        dict: {'valid': False, 'message'} for an empty query or unknown type,
+        otherwise {'valid': True, 'results'}, each result with its 'type'
+    """
+    prefix = normalize(query)
+    if not prefix:
+        return {
+            'valid': False,
+            'message': 'Query must contain at least one letter or digit'
+        }
+
+    types = types or list(SOURCES)
+    unknown = [kind for kind in types if kind not in SOURCES]
+    if unknown:
+        return {
+            'valid': False,
+            'message': f"Unknown type: {unknown[0]} (expected one of {', '.join(SOURCES)})"
+        }
+
+    limit = max(1, min(limit, MAX_RESULTS))
+    return {
+        'valid': True,
+        'results': get_typeahead_index().search(prefix, types, limit)
+    }
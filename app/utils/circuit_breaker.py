@@ -0,0 +1,216 @@
+"""
+Circuit breakers and bounded retries for calls to external services
+(object storage, SMTP).
+
+A breaker counts consecutive failed calls. Once FAILURE_THRESHOLD is
+reached it opens: calls are rejected at once with CircuitOpenError instead
+of each waiting for a timeout, and a background thread probes the service
+every ``reset_seconds`` until it answers again, which closes the breaker.
+Breakers without a probe instead let a single trial call through
+(half-open) once ``reset_seconds`` have passed.
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Recent call durations kept for latency percentiles
+LATENCY_WINDOW = 512
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a service whose breaker is open"""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"{name} is temporarily unavailable")
+        self.name = name
+        self.retry_after = retry_after
+
+def jittered_delay(attempt, base_seconds, max_seconds):
+    """Full-jitter backoff: a random delay up to base * 2^attempt, capped"""
+    return random.uniform(0, min(max_seconds, base_seconds * 2 ** attempt))
+
+def retry_call(func, attempts, base_seconds, max_seconds, retry_on=(Exception,)):
+    """
+    Call ``func`` until it succeeds, at most ``attempts`` times, sleeping a
+    jittered, exponentially growing delay between tries. Only exceptions in
+    ``retry_on`` are retried; the last one is raised.
+    """
+    for attempt in range(attempts):
+        try:
+            return func()
+        except retry_on:
+            if attempt + 1 >= attempts:
+                raise
+            time.sleep(jittered_delay(attempt, base_seconds, max_seconds))
+
+class CircuitBreaker:
+    """
+    Thread-safe breaker for one external service.
+
+    Args:
+        name (str): Service name, used in errors and logs
+        failure_threshold (int): Consecutive failures that open the breaker
+        reset_seconds (float): Time between probes (or before the half-open trial)
+        is_failure (callable): Whether an exception means the service is
+            unhealthy; errors the service answered with (e.g. a missing
+            object) should not count. Every exception counts by default.
+        probe (callable): Health check run in the background while open;
+            raising means still unhealthy
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_seconds=30, is_failure=None, probe=None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.is_failure = is_failure or (lambda error: True)
+        self.probe = probe
+        self.state = CLOSED
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._probe_thread = None
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._counts = {'calls': 0, 'failures': 0, 'rejected': 0, 'opened': 0}
+        self._last_error = None
+
+    def _retry_after(self):
+        waited = time.monotonic() - self._opened_at if self._opened_at else 0
+        return max(self.reset_seconds - waited, 1)
+
+    def check(self):
+        """Raise CircuitOpenError if a call would be rejected right now"""
+        with self._lock:
+            self._admit(trial=False)
+
+    def _admit(self, trial):
+        # Called with the lock held; returns whether this call is the half-open trial
+        if self.state == CLOSED:
+            return False
+        if self.state == OPEN and self.probe is None and time.monotonic() - self._opened_at >= self.reset_seconds:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self._trial_running:
+            if trial:
+                self._trial_running = True
+            return True
+        self._counts['rejected'] += 1
+        raise CircuitOpenError(self.name, self._retry_after())
+
+    @contextmanager
+    def guard(self):
+        """Run the block as a call to the service, or reject it while the breaker is open"""
+        with self._lock:
+            trial = self._admit(trial=True)
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.record(time.perf_counter() - start, error, trial)
+
+    def call(self, func, *args, **kwargs):
+        """Call ``func`` through the breaker"""
+        with self.guard():
+            return func(*args, **kwargs)
+
+    def record(self, elapsed, error=None, trial=False):
+        """Record the outcome of a call"""
+        failed = error is not None and self.is_failure(error)
+        with self._lock:
+            self._latencies.append(elapsed)
+            self._counts['calls'] += 1
+            if trial:
+                self._trial_running = False
+            if not failed:
+                self._consecutive_failures = 0
+                if self.state == HALF_OPEN:
+                    self._close()
+                return
+
+            self._counts['failures'] += 1
+            self._consecutive_failures += 1
+            self._last_error = f"{type(error).__name__}: {error}"[:500]
+            if self.state == HALF_OPEN or (self.state == CLOSED and
+                                           self._consecutive_failures >= self.failure_threshold):
+                self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._counts['opened'] += 1
+        logger.error(f"Circuit for {self.name} opened after {self._consecutive_failures} failures: {self._last_error}")
+        if self.probe is not None and (self._probe_thread is None or not self._probe_thread.is_alive()):
+            self._probe_thread = threading.Thread(target=self._run_probe, name=f'{self.name}-probe', daemon=True)
+            self._probe_thread.start()
+
+    def _close(self):
+        self.state = CLOSED
+        self._opened_at = None
+        self._consecutive_failures = 0
+        logger.info(f"Circuit for {self.name} closed")
+
+    def _run_probe(self):
+        while True:
+            time.sleep(self.reset_seconds)
+            with self._lock:
+                if self.state == CLOSED:
+                    return
+            start = time.perf_counter()
+            try:
+                self.probe()
+            except Exception as e:
+                logger.warning(f"{self.name} still unavailable: {str(e)}")
+                continue
+            with self._lock:
+                self._latencies.append(time.perf_counter() - start)
+                self._close()
+            return
+
+    def reset(self):
+        """Close the breaker (e.g. after fixing configuration)"""
+        with self._lock:
+            self._close()
+
+    def stats(self):
+        """State, counters and recent latency of calls to the service"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = dict(self._counts)
+            stats.update({
+                'name': self.name,
+                'state': self.state,
+                'consecutive_failures': self._consecutive_failures,
+                'retry_after': round(self._retry_after(), 1) if self.state != CLOSED else None,
+                'last_error': self._last_error
+            })
+
+        def percentile(p):
+            return round(latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000, 2)
+
+        stats['latency_ms'] = {
+            'p50': percentile(0.5),
+            'p95': percentile(0.95),
+            'p99': percentile(0.99),
+            'max': round(latencies[-1] * 1000, 2)
+        } if latencies else None
+        return stats
+
+    def public_stats(self):
+        """stats() without the last error, whose text may name internal hosts"""
+        stats = self.stats()
+        stats.pop('last_error')
+        return stats
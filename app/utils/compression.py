@@ -0,0 +1,137 @@
+"""
+Compression of responses, negotiated through Accept-Encoding.
+
+JSON, NDJSON and text responses of at least COMPRESSION_MIN_SIZE bytes are
+sent with brotli when the client accepts it and the brotli package is
+installed, otherwise with gzip. Streamed responses are compressed chunk by
+chunk, each chunk flushed so clients can decode rows as they arrive.
+
+Responses anyone could get (GET requests without credentials, such as the
+public leaderboard) are compressed once per distinct body: the compressed
+bytes are kept in an LRU cache keyed by a digest of the body, so polling
+clients cost a hash instead of a compression.
+"""
+
+import gzip
+import hashlib
+import zlib
+import logging
+from flask import request
+from app.utils.cache import LRUCache
+
+# brotli is optional; without it responses are compressed with gzip only
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Content types worth compressing; archives, images and PDFs already are
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/x-ndjson', 'application/javascript', 'image/svg+xml'}
+
+def _encodings():
+    """Encodings this process can produce, preferred first"""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+def _compressible(response):
+    mimetype = response.mimetype or ''
+    return mimetype in COMPRESSIBLE_MIMETYPES or mimetype.startswith('text/')
+
+def _is_public():
+    """Whether the response to this request is the same for every client"""
+    return request.method in ('GET', 'HEAD') and 'Authorization' not in request.headers
+
+def _cacheable(response):
+    cache_control = response.cache_control
+    return (
+        _is_public() and 'Set-Cookie' not in response.headers
+        and not cache_control.private and not cache_control.no_store
+    )
+
+class Compressor:
+    """Compresses response bodies at the configured levels"""
+
+    def __init__(self, app):
+        config = app.config
+        self.min_size = config['COMPRESSION_MIN_SIZE']
+        self.level = config['COMPRESSION_LEVEL']
+        self.brotli_quality = config['COMPRESSION_BROTLI_QUALITY']
+        self.cache = LRUCache(config['COMPRESSION_CACHE_SIZE'])
+
+    def compress(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def compress_cached(self, data, encoding):
+        """Compressed ``data``, reused while the same body is sent again"""
+        key = (encoding, hashlib.blake2b(data, digest_size=16).digest())
+        compressed = self.cache.get(key)
+        if compressed is None:
+            compressed = self.compress(data, encoding)
+            self.cache.set(key, compressed)
+        return compressed
+
+    def compress_stream(self, chunks, encoding):
+        """Compressed chunks of a streamed body, each flushed as it is produced"""
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            process, flush, finish = compressor.process, compressor.flush, compressor.finish
+        else:
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            process, flush, finish = compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode()
+                if chunk:
+                    yield process(chunk) + flush()
+            yield finish()
+        finally:
+            # Closes the original body (and the request context it holds)
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+
+    def __call__(self, response):
+        """after_request hook compressing ``response`` when the client accepts it"""
+        if not _compressible(response) or response.direct_passthrough:
+            return response
+        response.vary.add('Accept-Encoding')
+        if (
+            response.status_code < 200 or response.status_code in (204, 206, 304)
+            or 'Content-Encoding' in response.headers
+        ):
+            return response
+
+        encoding = request.accept_encodings.best_match(_encodings())
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = self.compress_stream(response.response, encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            if _cacheable(response):
+                response.set_data(self.compress_cached(data, encoding))
+            else:
+                response.set_data(self.compress(data, encoding))
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+def init_compression(app):
+    """Compress the app's responses, unless COMPRESSION_ENABLED is off"""
+    if not app.config['COMPRESSION_ENABLED']:
+        return None
+    compressor = Compressor(app)
+    app.after_request(compressor)
+    app.extensions['compression'] = compressor
+    if brotli is None:
+        logger.info("brotli is not installed; compressing responses with gzip only")
+    return compressor
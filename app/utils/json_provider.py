@@ -0,0 +1,70 @@
+"""
+JSON providers for responses and request bodies.
+
+orjson is used when it is installed (several times faster than the standard
+library, and it encodes datetimes itself); otherwise the standard library
+encoder is used. Both write dates and datetimes as ISO 8601, the format the
+API uses everywhere, instead of Flask's default HTTP dates. JSON_PROVIDER
+picks one explicitly ('orjson' or 'stdlib'; 'auto' by default).
+"""
+
+from datetime import date
+from flask.json.provider import DefaultJSONProvider, _default
+import logging
+
+# orjson is optional; without it responses are encoded by the standard library
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _iso_default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    return _default(value)
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Flask's provider with ISO 8601 dates"""
+
+    # Whether dumps() encodes datetimes itself, so serializers can leave them as they are
+    native_datetimes = False
+    default = staticmethod(_iso_default)
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Provider encoding with orjson"""
+
+    native_datetimes = True
+
+    def _options(self, indent=False):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_iso_default, option=self._options(kwargs.get('indent'))).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """Like Flask's, but the body goes straight from orjson's bytes into the response"""
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=_iso_default, option=self._options(indent) | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+def create_json_provider(app):
+    """JSON provider for an app, as configured by JSON_PROVIDER"""
+    choice = app.config.get('JSON_PROVIDER', 'auto')
+    if choice == 'orjson' and orjson is None:
+        logger.warning("JSON_PROVIDER is orjson but orjson is not installed; using the standard library")
+    if choice in ('auto', 'orjson') and orjson is not None:
+        return OrjsonProvider(app)
+    return StdlibJSONProvider(app)
@@ -0,0 +1,295 @@
+"""
+Local filesystem storage backend, for single-server deployments without an
+object store. Buckets are directories under a root directory and objects are
+files inside them; metadata (Content-Type, ETag) is kept in JSON sidecar
+files under ``<root>/.meta`` and parts of multipart uploads under
+``<root>/.multipart/<upload id>``.
+
+Presigned download URLs point at the application itself
+(``/api/files/local/<bucket>/<object>``) and carry an HMAC signature and an
+expiry time instead of S3 credentials.
+"""
+
+import hashlib
+import hmac
+import json
+import mmap
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from urllib.parse import quote
+from app.utils.storage_backend import StorageBackend, StreamResponse
+
+# Directory under the root holding metadata sidecars (not a valid bucket name)
+META_DIR = '.meta'
+
+# Directory under the root holding the parts of unfinished multipart uploads
+MULTIPART_DIR = '.multipart'
+
+# Prefix of files being written, hidden from listings until renamed into place
+TEMP_PREFIX = '.upload-'
+
+class LocalObject:
+    """Stored file plus the metadata ``stat_object`` reports"""
+
+    def __init__(self, bucket_name, object_name, size, etag, content_type, metadata, last_modified):
+        self.bucket_name = bucket_name
+        self.object_name = object_name
+        self.size = size
+        self.etag = etag
+        self.content_type = content_type
+        self.metadata = metadata or {}
+        self.last_modified = last_modified
+        self.version_id = None
+        self.is_dir = False
+
+class LocalStorage(StorageBackend):
+    """Object store on a local directory with a MinIO-like interface"""
+
+    # Browsers cannot upload to the filesystem; uploads go through the app
+    supports_presigned_uploads = False
+
+    def __init__(self, root, secret_key, url_base=''):
+        self.root = os.path.abspath(root)
+        self._secret = secret_key.encode() if isinstance(secret_key, str) else secret_key
+        self.url_base = url_base.rstrip('/')
+
+    def _bucket_dir(self, bucket_name):
+        path = os.path.join(self.root, bucket_name)
+        if bucket_name.startswith('.') or '/' in bucket_name or not os.path.isdir(path):
+            raise self.error('NoSuchBucket', 'The specified bucket does not exist', bucket_name)
+        return path
+
+    def _check_name(self, bucket_name, object_name):
+        # Object names become paths, so they must not escape the bucket
+        parts = object_name.split('/')
+        if object_name.startswith('/') or any(part in ('', '.', '..') for part in parts) \
+                or parts[-1].startswith(TEMP_PREFIX):
+            raise self.error('InvalidObjectName', 'Object name is not allowed', bucket_name, object_name)
+
+    def object_path(self, bucket_name, object_name):
+        """Filesystem path of an object (which may not exist)"""
+        self._check_name(bucket_name, object_name)
+        return os.path.join(self._bucket_dir(bucket_name), *object_name.split('/'))
+
+    def _meta_path(self, bucket_name, object_name):
+        return os.path.join(self.root, META_DIR, bucket_name, *object_name.split('/')) + '.json'
+
+    def _stat(self, bucket_name, object_name, path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            raise self.error('NoSuchKey', 'Object does not exist', bucket_name, object_name)
+        try:
+            with open(self._meta_path(bucket_name, object_name)) as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            meta = {}
+        return LocalObject(
+            bucket_name, object_name, st.st_size,
+            meta.get('etag') or f"{int(st.st_mtime_ns):x}-{st.st_size:x}",
+            meta.get('content_type', 'application/octet-stream'),
+            meta.get('metadata'),
+            datetime.fromtimestamp(st.st_mtime, timezone.utc)
+        )
+
+    def bucket_exists(self, bucket_name):
+        return not bucket_name.startswith('.') and os.path.isdir(os.path.join(self.root, bucket_name))
+
+    def make_bucket(self, bucket_name, location=None, object_lock=False):
+        if self.bucket_exists(bucket_name):
+            raise self.error('BucketAlreadyOwnedByYou', 'Bucket already exists', bucket_name)
+        os.makedirs(os.path.join(self.root, bucket_name))
+
+    def put_object(self, bucket_name, object_name, data, length, content_type='application/octet-stream',
+                   metadata=None, part_size=0, num_parallel_uploads=3, **kwargs):
+        """
+        Stream ``data`` into a temporary file next to the target and rename
+        it into place, so readers never see a partially written object.
+        """
+        path = self.object_path(bucket_name, object_name)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        chunk_size = part_size or 5 * 1024 * 1024
+        md5 = hashlib.md5()
+        written = 0
+        fd, temp_path = tempfile.mkstemp(prefix=TEMP_PREFIX, dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                while length < 0 or written < length:
+                    chunk = data.read(chunk_size if length < 0 else min(chunk_size, length - written))
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    md5.update(chunk)
+                    written += len(chunk)
+                if length >= 0 and written != length:
+                    raise IOError(f"stream having not enough data; expected: {length}, got: {written} bytes")
+                f.flush()
+                os.fsync(f.fileno())
+            self._commit(bucket_name, object_name, temp_path, md5.hexdigest(), content_type, metadata)
+        except BaseException:
+            _unlink(temp_path)
+            raise
+        return self._stat(bucket_name, object_name, path)
+
+    def _commit(self, bucket_name, object_name, temp_path, etag, content_type, metadata=None):
+        """Record metadata and rename a fully written temporary file into place"""
+        meta_path = self._meta_path(bucket_name, object_name)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        with open(meta_path, 'w') as f:
+            json.dump({'etag': etag, 'content_type': content_type, 'metadata': metadata or {}}, f)
+        os.replace(temp_path, self.object_path(bucket_name, object_name))
+
+    def stat_object(self, bucket_name, object_name, **kwargs):
+        return self._stat(bucket_name, object_name, self.object_path(bucket_name, object_name))
+
+    def get_object(self, bucket_name, object_name, offset=0, length=0, **kwargs):
+        """
+        Open an object for reading.
+
+        Whole-object reads stream from the file; range reads map the file
+        into memory and hand out a view of the requested bytes, so only the
+        pages actually read are loaded and nothing is copied up front.
+        """
+        obj = self.stat_object(bucket_name, object_name)
+        headers = {'Content-Type': obj.content_type, 'ETag': obj.etag}
+        path = self.object_path(bucket_name, object_name)
+
+        if not offset and not length:
+            return StreamResponse(open(path, 'rb'), headers)
+        if offset >= obj.size and obj.size:
+            raise self.error('InvalidRange', 'The requested range is not satisfiable', bucket_name, object_name)
+        if not obj.size:
+            return StreamResponse(b'', headers)
+
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        end = min(offset + length, obj.size) if length else obj.size
+        view = memoryview(mapped)
+        data = view[offset:end]
+        view.release()
+        return StreamResponse(data, headers, on_close=mapped.close)
+
+    def remove_object(self, bucket_name, object_name, **kwargs):
+        _unlink(self.object_path(bucket_name, object_name))
+        _unlink(self._meta_path(bucket_name, object_name))
+
+    def list_objects(self, bucket_name, prefix=None, recursive=False, **kwargs):
+        bucket_dir = self._bucket_dir(bucket_name)
+        names = []
+        for directory, _, filenames in os.walk(bucket_dir):
+            relative = os.path.relpath(directory, bucket_dir)
+            for filename in filenames:
+                if filename.startswith(TEMP_PREFIX):
+                    continue
+                names.append(filename if relative == '.' else f"{relative.replace(os.sep, '/')}/{filename}")
+
+        for name in sorted(names):
+            if prefix and not name.startswith(prefix):
+                continue
+            if not recursive and '/' in name[len(prefix or ''):]:
+                continue
+            try:
+                yield self.stat_object(bucket_name, name)
+            except Exception:
+                continue  # Removed while listing
+
+    def sign(self, bucket_name, object_name, expires_at):
+        """HMAC signature of a download URL for an object, valid until ``expires_at`` (Unix time)"""
+        message = f"{bucket_name}/{object_name}\n{expires_at}".encode()
+        return hmac.new(self._secret, message, hashlib.sha256).hexdigest()
+
+    def verify_signature(self, bucket_name, object_name, expires_at, signature):
+        """Whether a presigned download URL is authentic and not expired"""
+        try:
+            expires_at = int(expires_at)
+        except (TypeError, ValueError):
+            return False
+        if expires_at < time.time():
+            return False
+        return hmac.compare_digest(self.sign(bucket_name, object_name, expires_at), signature or '')
+
+    def presigned_get_object(self, bucket_name, object_name, expires=None, response_headers=None,
+                             request_date=None, **kwargs):
+        seconds = int(expires.total_seconds()) if expires else 7 * 24 * 60 * 60
+        request_date = request_date or datetime.now(timezone.utc)
+        expires_at = int(request_date.timestamp()) + seconds
+        return (f"{self.url_base}/api/files/local/{bucket_name}/{quote(object_name)}"
+                f"?expires={expires_at}&signature={self.sign(bucket_name, object_name, expires_at)}")
+
+    def _upload_dir(self, bucket_name, object_name, upload_id):
+        path = os.path.join(self.root, MULTIPART_DIR, upload_id)
+        if not upload_id.isalnum() or not os.path.isdir(path):
+            raise self.error('NoSuchUpload', 'The specified multipart upload does not exist', bucket_name, object_name)
+        return path
+
+    def create_multipart_upload(self, bucket_name, object_name, content_type='application/octet-stream'):
+        self.object_path(bucket_name, object_name)  # Validates the bucket and name
+        upload_id = uuid.uuid4().hex
+        path = os.path.join(self.root, MULTIPART_DIR, upload_id)
+        os.makedirs(path)
+        with open(os.path.join(path, 'upload.json'), 'w') as f:
+            json.dump({'bucket': bucket_name, 'object': object_name, 'content_type': content_type}, f)
+        return upload_id
+
+    def upload_part(self, bucket_name, object_name, upload_id, part_number, data):
+        directory = self._upload_dir(bucket_name, object_name, upload_id)
+        fd, temp_path = tempfile.mkstemp(prefix=TEMP_PREFIX, dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, os.path.join(directory, str(int(part_number))))
+        except BaseException:
+            _unlink(temp_path)
+            raise
+        return hashlib.md5(data).hexdigest()
+
+    def complete_multipart_upload(self, bucket_name, object_name, upload_id, parts):
+        directory = self._upload_dir(bucket_name, object_name, upload_id)
+        with open(os.path.join(directory, 'upload.json')) as f:
+            info = json.load(f)
+        path = self.object_path(bucket_name, object_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # ETag of a multipart object as S3 computes it: MD5 of the part MD5s
+        digests = hashlib.md5()
+        fd, temp_path = tempfile.mkstemp(prefix=TEMP_PREFIX, dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for part_number, etag in parts:
+                    part_path = os.path.join(directory, str(int(part_number)))
+                    if not os.path.isfile(part_path):
+                        raise self.error('InvalidPart', f'Part {part_number} was not uploaded', bucket_name, object_name)
+                    with open(part_path, 'rb') as part:
+                        shutil.copyfileobj(part, out, 1024 * 1024)
+                    digests.update(bytes.fromhex(etag))
+                out.flush()
+                os.fsync(out.fileno())
+            self._commit(bucket_name, object_name, temp_path, f"{digests.hexdigest()}-{len(parts)}",
+                         info['content_type'])
+        except BaseException:
+            _unlink(temp_path)
+            raise
+        shutil.rmtree(directory, ignore_errors=True)
+
+    def abort_multipart_upload(self, bucket_name, object_name, upload_id):
+        shutil.rmtree(self._upload_dir(bucket_name, object_name, upload_id), ignore_errors=True)
+
+    def presigned_put_object(self, bucket_name, object_name, expires=None):
+        raise NotImplementedError('Presigned uploads need an S3-compatible storage backend')
+
+    def presigned_post_policy(self, policy):
+        raise NotImplementedError('Presigned uploads need an S3-compatible storage backend')
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
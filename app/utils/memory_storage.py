@@ -0,0 +1,161 @@
+"""
+In-process stand-in for MinIO, for tests and local development without a
+storage server. Implements the storage backend interface (the subset of the
+``minio.Minio`` API the application uses), with the same error types.
+"""
+
+import hashlib
+import threading
+import uuid
+from datetime import datetime, timezone
+from urllib.parse import quote
+from app.utils.storage_backend import StorageBackend, StreamResponse
+
+class MemoryObject:
+    """Stored object plus the metadata ``stat_object`` reports"""
+
+    def __init__(self, bucket_name, object_name, data, content_type, metadata):
+        self.bucket_name = bucket_name
+        self.object_name = object_name
+        self.data = data
+        self.size = len(data)
+        self.etag = hashlib.md5(data).hexdigest()
+        self.content_type = content_type
+        self.metadata = metadata or {}
+        self.last_modified = datetime.now(timezone.utc)
+        self.version_id = None
+        self.is_dir = False
+
+class MemoryStorage(StorageBackend):
+    """Thread-safe, dictionary backed object store with a MinIO-like interface"""
+
+    def __init__(self):
+        self._buckets = {}
+        self._uploads = {}  # Upload ID -> (bucket, object, content type, {part number: bytes})
+        self._lock = threading.Lock()
+        self.request_count = 0  # Calls that would have been HTTP requests against MinIO
+
+    def _bucket(self, bucket_name):
+        bucket = self._buckets.get(bucket_name)
+        if bucket is None:
+            raise self.error('NoSuchBucket', 'The specified bucket does not exist', bucket_name)
+        return bucket
+
+    def _object(self, bucket_name, object_name):
+        obj = self._bucket(bucket_name).get(object_name)
+        if obj is None:
+            raise self.error('NoSuchKey', 'Object does not exist', bucket_name, object_name)
+        return obj
+
+    def bucket_exists(self, bucket_name):
+        self.request_count += 1
+        return bucket_name in self._buckets
+
+    def make_bucket(self, bucket_name, location=None, object_lock=False):
+        self.request_count += 1
+        with self._lock:
+            if bucket_name in self._buckets:
+                raise self.error('BucketAlreadyOwnedByYou', 'Bucket already exists', bucket_name)
+            self._buckets[bucket_name] = {}
+
+    def put_object(self, bucket_name, object_name, data, length, content_type='application/octet-stream',
+                   metadata=None, part_size=0, num_parallel_uploads=3, **kwargs):
+        self.request_count += 1
+        # Read in parts like the real client so streaming readers behave the same
+        chunk_size = part_size or 5 * 1024 * 1024
+        buffer = bytearray()
+        while length < 0 or len(buffer) < length:
+            chunk = data.read(chunk_size if length < 0 else min(chunk_size, length - len(buffer)))
+            if not chunk:
+                break
+            buffer.extend(chunk)
+        if length >= 0 and len(buffer) != length:
+            raise IOError(f"stream having not enough data; expected: {length}, got: {len(buffer)} bytes")
+
+        obj = MemoryObject(bucket_name, object_name, bytes(buffer), content_type, metadata)
+        with self._lock:
+            self._bucket(bucket_name)[object_name] = obj
+        return obj
+
+    def stat_object(self, bucket_name, object_name, **kwargs):
+        self.request_count += 1
+        return self._object(bucket_name, object_name)
+
+    def get_object(self, bucket_name, object_name, offset=0, length=0, **kwargs):
+        self.request_count += 1
+        obj = self._object(bucket_name, object_name)
+        end = offset + length if length else obj.size
+        return StreamResponse(obj.data[offset:end], {'Content-Type': obj.content_type, 'ETag': obj.etag})
+
+    def remove_object(self, bucket_name, object_name, **kwargs):
+        self.request_count += 1
+        with self._lock:
+            self._bucket(bucket_name).pop(object_name, None)
+
+    def list_objects(self, bucket_name, prefix=None, recursive=False, **kwargs):
+        self.request_count += 1
+        with self._lock:
+            objects = sorted(self._bucket(bucket_name).items())
+        for name, obj in objects:
+            if prefix and not name.startswith(prefix):
+                continue
+            if not recursive and '/' in name[len(prefix or ''):]:
+                continue
+            yield obj
+
+    def presigned_get_object(self, bucket_name, object_name, expires=None, response_headers=None,
+                             request_date=None, **kwargs):
+        # Signing happens locally in the real client too, so it is not counted as a request
+        seconds = int(expires.total_seconds()) if expires else 7 * 24 * 60 * 60
+        request_date = request_date or datetime.now(timezone.utc)
+        return (f"memory://{bucket_name}/{quote(object_name)}"
+                f"?X-Amz-Date={request_date.strftime('%Y%m%dT%H%M%SZ')}&X-Amz-Expires={seconds}")
+
+    def presigned_put_object(self, bucket_name, object_name, expires=None):
+        seconds = int(expires.total_seconds()) if expires else 7 * 24 * 60 * 60
+        return f"memory://{bucket_name}/{quote(object_name)}?X-Amz-Expires={seconds}"
+
+    def presigned_post_policy(self, policy):
+        return {'x-amz-algorithm': 'AWS4-HMAC-SHA256', 'policy': 'memory', 'x-amz-signature': 'memory'}
+
+    def _upload(self, bucket_name, object_name, upload_id):
+        upload = self._uploads.get(upload_id)
+        if upload is None or upload[:2] != (bucket_name, object_name):
+            raise self.error('NoSuchUpload', 'The specified multipart upload does not exist', bucket_name, object_name)
+        return upload
+
+    def create_multipart_upload(self, bucket_name, object_name, content_type='application/octet-stream'):
+        self.request_count += 1
+        self._bucket(bucket_name)
+        upload_id = uuid.uuid4().hex
+        with self._lock:
+            self._uploads[upload_id] = (bucket_name, object_name, content_type, {})
+        return upload_id
+
+    def upload_part(self, bucket_name, object_name, upload_id, part_number, data):
+        self.request_count += 1
+        self._upload(bucket_name, object_name, upload_id)[3][part_number] = bytes(data)
+        return hashlib.md5(data).hexdigest()
+
+    def complete_multipart_upload(self, bucket_name, object_name, upload_id, parts):
+        self.request_count += 1
+        _, _, content_type, stored = self._upload(bucket_name, object_name, upload_id)
+        buffer = bytearray()
+        for index, (part_number, etag) in enumerate(parts):
+            data = stored.get(part_number)
+            if data is None or hashlib.md5(data).hexdigest() != etag:
+                raise self.error('InvalidPart', f'Part {part_number} was not uploaded', bucket_name, object_name)
+            if index < len(parts) - 1 and len(data) < 5 * 1024 * 1024:
+                raise self.error('EntityTooSmall', 'Part is smaller than the minimum allowed size',
+                                 bucket_name, object_name)
+            buffer.extend(data)
+        obj = MemoryObject(bucket_name, object_name, bytes(buffer), content_type, None)
+        with self._lock:
+            self._bucket(bucket_name)[object_name] = obj
+            self._uploads.pop(upload_id, None)
+
+    def abort_multipart_upload(self, bucket_name, object_name, upload_id):
+        self.request_count += 1
+        self._upload(bucket_name, object_name, upload_id)
+        with self._lock:
+            self._uploads.pop(upload_id, None)
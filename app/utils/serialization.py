@@ -0,0 +1,393 @@
+"""
+Model serializers with sparse fieldsets and embedded relationships.
+
+A Serializer describes what a model turns into: its columns, computed fields
+and the relationships that can be embedded. Requests pick from them:
+
+- ``?fields=id,name`` returns only those fields. Embeds may be listed as
+  well, and dotted paths pick fields of embedded objects
+  (``?fields=id,name,members.name``). Without ``fields`` a model's default
+  fields and embeds are returned.
+- ``?embed=professor,members.team`` embeds relationships on top of that.
+
+The selection also plans the query: only the columns it needs are loaded
+(``load_only``) and each embedded relationship costs one extra SELECT for all
+rows together (``selectinload``) instead of one per row.
+
+Each selection is compiled once into a function building the dict with a
+single literal, reading loaded columns straight from the instance state;
+which columns are dates comes from the column types. When the app's JSON
+provider encodes datetimes itself (orjson), responses leave them to it
+instead of calling isoformat() per field and row. Selections are cached per
+query string.
+
+Large lists can be streamed instead (``stream_response``): rows are fetched
+in batches with a server-side cursor where the database has one, and each
+batch is serialized and sent before the next is fetched, so memory stays
+flat however many rows there are.
+"""
+
+import logging
+from sqlalchemy import Date, DateTime, inspect
+from sqlalchemy.orm import load_only, selectinload
+from flask import Response, current_app, has_app_context, stream_with_context
+from app.utils.cache import LRUCache
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Deepest chain of embeds a request may ask for (e.g. members.team.professor)
+MAX_EMBED_DEPTH = 3
+
+# Serializers by model name, filled by Serializer()
+_registry = {}
+
+# Distinct ?fields=/?embed= combinations kept compiled per serializer
+SELECTION_CACHE_SIZE = 256
+
+# Streamed responses: rows fetched (and related rows selectin-loaded) per batch
+STREAM_BATCH_SIZE = 500
+
+# Newline-delimited JSON, one object per line
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+class FieldsetError(ValueError):
+    """Raised for ?fields= or ?embed= naming something a model does not have"""
+
+class Field:
+    """
+    Computed field.
+
+    Args:
+        get (callable): Value of the field for an object
+        columns: Columns ``get`` reads
+        relationships (dict): Relationships ``get`` reads -> columns it
+            reads on the related objects
+    """
+
+    def __init__(self, get, columns=(), relationships=None):
+        self.get = get
+        self.columns = tuple(columns)
+        self.relationships = relationships or {}
+
+class Embed:
+    """
+    Relationship that can be embedded.
+
+    Args:
+        relationship (str): Relationship attribute of the model
+        dump (callable): Serializes the related objects instead of their
+            model's serializer (which then loads them in full)
+    """
+
+    def __init__(self, relationship, dump=None):
+        self.relationship = relationship
+        self.dump = dump
+
+def _native_datetimes():
+    """Whether the app's JSON provider encodes datetimes as ISO 8601 itself"""
+    return has_app_context() and getattr(current_app.json, 'native_datetimes', False)
+
+class Selection:
+    """Fields and embeds picked for one model (embeds map to nested selections)"""
+
+    def __init__(self, serializer, fields, embeds):
+        self.serializer = serializer
+        self.fields = fields
+        self.embeds = embeds
+        self._functions = {}
+
+    def options(self):
+        """Loader options for a query of the model that load what this selection needs"""
+        return _options(self.serializer.model, self.serializer.plan(self))
+
+    def function(self, native=False):
+        """
+        The compiled serializer of this selection; with ``native`` dates and
+        datetimes are left for the JSON encoder.
+        """
+        if native not in self._functions:
+            self._functions[native] = _compile(self, native)
+        return self._functions[native]
+
+    def dump(self, obj):
+        """The selected fields and embeds of an object, for a response"""
+        return self.function(_native_datetimes())(obj)
+
+    def dump_all(self, objects):
+        """dump() of every object"""
+        function = self.function(_native_datetimes())
+        return [function(obj) for obj in objects]
+
+class _Plan:
+    """Columns and relationships (each with its own plan) to load; ``full`` loads every column"""
+
+    def __init__(self, full=False):
+        self.full = full
+        self.columns = set()
+        self.relationships = {}
+
+    def relationship(self, model, name):
+        prop = inspect(model).relationships[name]
+        # selectinload matches related rows by these, so they must be loaded
+        self.columns.update(column.key for column in prop.local_columns)
+        if name not in self.relationships:
+            self.relationships[name] = _Plan()
+            self.relationships[name].columns.update(column.key for column in prop.remote_side)
+        return self.relationships[name]
+
+    def merge(self, other):
+        self.full = self.full or other.full
+        self.columns |= other.columns
+        for name, plan in other.relationships.items():
+            self.relationships.setdefault(name, _Plan()).merge(plan)
+
+def _options(model, plan):
+    mapper = inspect(model)
+    options = []
+    if not plan.full:
+        columns = plan.columns | {column.key for column in mapper.primary_key}
+        options.append(load_only(*[getattr(model, key) for key in sorted(columns)]))
+    for name, related in plan.relationships.items():
+        prop = mapper.relationships[name]
+        options.append(selectinload(getattr(model, name)).options(*_options(prop.mapper.class_, related)))
+    return options
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+def _one(function, value):
+    return function(value) if value is not None else None
+
+def _compile(selection, native):
+    """
+    Compile the function serializing one object of a selection.
+
+    The fast path reads columns from the instance's __dict__; if any is not
+    loaded (expired, or deferred by another query) the attribute path loads it.
+    """
+    serializer = selection.serializer
+    namespace = {'_iso': _iso, '_one': _one}
+    items = []
+    for name in selection.fields:
+        field = serializer.computed.get(name)
+        if field is not None:
+            namespace[f'_field_{name}'] = field.get
+            items.append((name, f'_field_{name}(obj)', None))
+        elif name in serializer.date_columns and not native:
+            items.append((name, f'_iso(d[{name!r}])', f'_iso(obj.{name})'))
+        else:
+            items.append((name, f'd[{name!r}]', f'obj.{name}'))
+    for name, nested in selection.embeds.items():
+        embed = serializer.embeds[name]
+        related = f'obj.{embed.relationship}'
+        if embed.dump is not None:
+            namespace[f'_embed_{name}'] = embed.dump
+            items.append((name, f'_embed_{name}({related})', None))
+            continue
+        namespace[f'_embed_{name}'] = nested.function(native)
+        if inspect(serializer.model).relationships[embed.relationship].uselist:
+            items.append((name, f'[_embed_{name}(item) for item in {related}]', None))
+        else:
+            items.append((name, f'_one(_embed_{name}, {related})', None))
+
+    fast = ', '.join(f'{name!r}: {expression}' for name, expression, _ in items)
+    slow = ', '.join(f'{name!r}: {attribute or expression}' for name, expression, attribute in items)
+    source = (
+        f'def dump(obj):\n'
+        f'    d = obj.__dict__\n'
+        f'    try:\n'
+        f'        return {{{fast}}}\n'
+        f'    except KeyError:\n'
+        f'        return {{{slow}}}\n'
+    )
+    exec(compile(source, f'<serializer {serializer.model.__name__}>', 'exec'), namespace)
+    return namespace['dump']
+
+def _paths(value):
+    """Dotted paths of a comma-separated parameter, as lists of names"""
+    if value is None:
+        return None
+    return [path.split('.') for path in (part.strip() for part in value.split(',')) if path]
+
+class Serializer:
+    """
+    Serializer of one model.
+
+    Every column is available except ``exclude``; ``default`` lists the
+    fields returned when a request does not pick any.
+
+    Args:
+        model: SQLAlchemy model
+        default (list): Fields returned by default (columns or computed)
+        exclude: Columns never serialized (e.g. password hashes)
+        computed (dict): Name -> Field
+        embeds (dict): Name -> Embed
+        default_embeds: Embeds returned by default
+    """
+
+    def __init__(self, model, default, exclude=(), computed=None, embeds=None, default_embeds=()):
+        self.model = model
+        self.computed = computed or {}
+        self.embeds = embeds or {}
+        attrs = [attr for attr in inspect(model).column_attrs if attr.key not in exclude]
+        self.columns = [attr.key for attr in attrs]
+        self.date_columns = {attr.key for attr in attrs if isinstance(attr.columns[0].type, (Date, DateTime))}
+        self.default = list(default)
+        self.default_embeds = list(default_embeds)
+        self.available = set(self.columns) | set(self.computed)
+        self._selections = LRUCache(SELECTION_CACHE_SIZE)
+        _registry[model.__name__] = self
+
+    def _target(self, name):
+        prop = inspect(self.model).relationships[self.embeds[name].relationship]
+        return _registry[prop.mapper.class_.__name__]
+
+    def select(self, fields=None, embed=None, default_embeds=None, depth=0):
+        """
+        Selection for ``fields`` and ``embed`` (comma-separated dotted paths,
+        as in the query string).
+
+        Raises:
+            FieldsetError: For unknown fields or embeds, or embeds nested too deep
+        """
+        key = (fields, embed, None if default_embeds is None else tuple(default_embeds), depth)
+        selection = self._selections.get(key)
+        if selection is None:
+            selection = self._select(_paths(fields), _paths(embed) or [], default_embeds, depth)
+            self._selections.set(key, selection)
+        return selection
+
+    def _select(self, field_paths, embed_paths, default_embeds, depth):
+        if depth > MAX_EMBED_DEPTH:
+            raise FieldsetError(f'Embeds can be nested at most {MAX_EMBED_DEPTH} levels deep')
+
+        nested_fields, nested_embeds = {}, {}
+        if field_paths is None:
+            fields = list(self.default)
+            for name in self.default_embeds if default_embeds is None else default_embeds:
+                nested_embeds.setdefault(name, [])
+        else:
+            fields = []
+            for name, *rest in field_paths:
+                if name in self.embeds:
+                    nested_embeds.setdefault(name, [])
+                    if rest:
+                        nested_fields.setdefault(name, []).append(rest)
+                elif rest:
+                    raise FieldsetError(f"'{name}' cannot be embedded in {self.model.__name__}")
+                elif name not in self.available:
+                    raise FieldsetError(
+                        f"Unknown field '{name}' for {self.model.__name__}; "
+                        f"choose from: {', '.join(sorted(self.available | set(self.embeds)))}"
+                    )
+                elif name not in fields:
+                    fields.append(name)
+        for name, *rest in embed_paths:
+            if name not in self.embeds:
+                raise FieldsetError(
+                    f"'{name}' cannot be embedded in {self.model.__name__}; "
+                    f"choose from: {', '.join(sorted(self.embeds)) or 'nothing'}"
+                )
+            nested_embeds.setdefault(name, [])
+            if rest:
+                nested_embeds[name].append(rest)
+
+        embeds = {}
+        for name, paths in nested_embeds.items():
+            if self.embeds[name].dump is not None:
+                embeds[name] = None
+                continue
+            embeds[name] = self._target(name)._select(nested_fields.get(name), paths, None, depth + 1)
+        return Selection(self, fields, embeds)
+
+    def select_request(self, request, default_embeds=None):
+        """Selection asked for by a request's ?fields= and ?embed="""
+        return self.select(request.args.get('fields'), request.args.get('embed'), default_embeds)
+
+    def plan(self, selection):
+        plan = _Plan()
+        for name in selection.fields:
+            field = self.computed.get(name)
+            if field is None:
+                plan.columns.add(name)
+                continue
+            plan.columns.update(field.columns)
+            for relationship, columns in field.relationships.items():
+                plan.relationship(self.model, relationship).columns.update(columns)
+        for name, nested in selection.embeds.items():
+            embed = self.embeds[name]
+            related = plan.relationship(self.model, embed.relationship)
+            related.merge(_Plan(full=True) if nested is None else nested.serializer.plan(nested))
+        return plan
+
+    def dump(self, obj, selection=None):
+        """
+        Serialize an object (with the default selection if none is given)
+        into plain JSON types, dates as ISO 8601 strings.
+        """
+        return (selection or self.select()).function()(obj)
+
+    def default_selection(self, default_embeds=None):
+        """Selection of the default fields (and ``default_embeds`` instead of the default embeds)"""
+        return self.select(default_embeds=default_embeds)
+
+def serializer_for(model):
+    """Serializer registered for a model class"""
+    return _registry[model.__name__]
+
+def streaming_format(request):
+    """
+    How a list response should be streamed, if at all: 'ndjson' when the
+    request accepts application/x-ndjson over JSON, 'array' for
+    ``?stream=true``, otherwise None.
+    """
+    if request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE:
+        return 'ndjson'
+    if request.args.get('stream', 'false').lower() in ('1', 'true'):
+        return 'array'
+    return None
+
+def stream_response(query, selection, format='array'):
+    """
+    Stream the rows of a query serialized by ``selection``, as a JSON array
+    or as NDJSON.
+
+    Rows are fetched STREAM_BATCH_SIZE at a time (``yield_per``), and each
+    batch is encoded and sent before the next is fetched. An error halfway
+    ends the response early, which clients see as invalid JSON (or a short
+    NDJSON stream).
+    """
+    encoder = current_app.json
+    function = selection.function(getattr(encoder, 'native_datetimes', False))
+
+    def encode(batch):
+        if format == 'ndjson':
+            return ''.join(encoder.dumps(function(obj)) + '\n' for obj in batch)
+        # One encoder call per batch: a JSON array without its brackets
+        return encoder.dumps([function(obj) for obj in batch])[1:-1]
+
+    def generate():
+        yield '' if format == 'ndjson' else '['
+        first = True
+        batch = []
+        try:
+            for obj in query.yield_per(STREAM_BATCH_SIZE):
+                batch.append(obj)
+                if len(batch) >= STREAM_BATCH_SIZE:
+                    yield ('' if first or format == 'ndjson' else ',') + encode(batch)
+                    first = False
+                    batch = []
+            if batch:
+                yield ('' if first or format == 'ndjson' else ',') + encode(batch)
+        except Exception as e:
+            logger.error(f"Streaming {selection.serializer.model.__name__} rows failed: {str(e)}")
+            raise
+        if format != 'ndjson':
+            yield ']\n'
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=NDJSON_MIMETYPE if format == 'ndjson' else 'application/json'
+    )
@@ -0,0 +1,144 @@
+"""
+The storage backend interface.
+
+The application talks to storage through the subset of the ``minio.Minio``
+client API below, plus explicit multipart upload calls, so a MinIO client
+(which also speaks to AWS S3 and other S3-compatible services) is a backend
+with the thin MinioBackend subclass. Other backends subclass StorageBackend
+and implement the same methods with the same argument names, return values
+and errors (``minio.error.S3Error`` with S3 error codes).
+"""
+
+from minio import Minio
+from minio.datatypes import Part
+from minio.error import S3Error
+
+class StorageBackend:
+    """Base class for storage backends that are not a MinIO client"""
+
+    # Whether clients can upload straight to the backend with presigned requests
+    supports_presigned_uploads = True
+
+    def error(self, code, message, bucket_name, object_name=None):
+        """Build the S3Error a MinIO client would raise"""
+        resource = f"/{bucket_name}/{object_name}" if object_name else f"/{bucket_name}"
+        return S3Error(code, message, resource, None, None, None, bucket_name, object_name)
+
+    def bucket_exists(self, bucket_name):
+        raise NotImplementedError
+
+    def make_bucket(self, bucket_name, location=None, object_lock=False):
+        raise NotImplementedError
+
+    def put_object(self, bucket_name, object_name, data, length, content_type='application/octet-stream',
+                   metadata=None, part_size=0, num_parallel_uploads=3, **kwargs):
+        """
+        Store ``length`` bytes read from ``data``, or everything until EOF
+        if length is -1 (streamed in ``part_size`` pieces, multipart style).
+        """
+        raise NotImplementedError
+
+    def get_object(self, bucket_name, object_name, offset=0, length=0, **kwargs):
+        """Response with ``read``, ``stream``, ``close`` and ``release_conn``; length 0 reads to the end"""
+        raise NotImplementedError
+
+    def stat_object(self, bucket_name, object_name, **kwargs):
+        """Object with ``size``, ``etag``, ``content_type`` and ``last_modified``"""
+        raise NotImplementedError
+
+    def remove_object(self, bucket_name, object_name, **kwargs):
+        raise NotImplementedError
+
+    def list_objects(self, bucket_name, prefix=None, recursive=False, **kwargs):
+        raise NotImplementedError
+
+    def presigned_get_object(self, bucket_name, object_name, expires=None, response_headers=None,
+                             request_date=None, **kwargs):
+        raise NotImplementedError
+
+    def presigned_put_object(self, bucket_name, object_name, expires=None):
+        raise NotImplementedError
+
+    def presigned_post_policy(self, policy):
+        raise NotImplementedError
+
+    def create_multipart_upload(self, bucket_name, object_name, content_type='application/octet-stream'):
+        """Start a multipart upload; returns its upload ID"""
+        raise NotImplementedError
+
+    def upload_part(self, bucket_name, object_name, upload_id, part_number, data):
+        """
+        Store one part (bytes) of a multipart upload; returns its ETag.
+
+        Every part but the last must be at least 5MB. Uploading a part
+        number again replaces that part.
+        """
+        raise NotImplementedError
+
+    def complete_multipart_upload(self, bucket_name, object_name, upload_id, parts):
+        """Assemble the object from ``parts``, a list of (part number, ETag) in order"""
+        raise NotImplementedError
+
+    def abort_multipart_upload(self, bucket_name, object_name, upload_id):
+        """Discard a multipart upload and its parts"""
+        raise NotImplementedError
+
+class MinioBackend(Minio):
+    """MinIO/S3 client exposing the multipart calls of the backend interface"""
+
+    supports_presigned_uploads = True
+
+    def create_multipart_upload(self, bucket_name, object_name, content_type='application/octet-stream'):
+        return self._create_multipart_upload(bucket_name, object_name, {'Content-Type': content_type})
+
+    def upload_part(self, bucket_name, object_name, upload_id, part_number, data):
+        return self._upload_part(bucket_name, object_name, data, None, upload_id, part_number)
+
+    def complete_multipart_upload(self, bucket_name, object_name, upload_id, parts):
+        return self._complete_multipart_upload(
+            bucket_name, object_name, upload_id, [Part(number, etag) for number, etag in parts]
+        )
+
+    def abort_multipart_upload(self, bucket_name, object_name, upload_id):
+        self._abort_multipart_upload(bucket_name, object_name, upload_id)
+
+class StreamResponse:
+    """
+    Mimics the urllib3 response returned by ``get_object``.
+
+    Wraps a readable buffer: a BytesIO, a file or a memoryview of an mmap.
+    """
+
+    def __init__(self, data, headers=None, on_close=None):
+        self._data = memoryview(data) if isinstance(data, (bytes, bytearray, memoryview)) else None
+        self._file = None if self._data is not None else data
+        self._position = 0
+        self._on_close = on_close
+        self.headers = headers or {}
+
+    def read(self, amt=None):
+        if self._file is not None:
+            return self._file.read(-1 if amt is None else amt)
+        end = len(self._data) if amt is None else min(len(self._data), self._position + amt)
+        chunk = bytes(self._data[self._position:end])
+        self._position = end
+        return chunk
+
+    def stream(self, amt=64 * 1024):
+        while True:
+            chunk = self.read(amt)
+            if not chunk:
+                return
+            yield chunk
+
+    def close(self):
+        if self._data is not None:
+            self._data.release()
+        if self._file is not None:
+            self._file.close()
+        if self._on_close:
+            self._on_close()
+            self._on_close = None
+
+    def release_conn(self):
+        pass
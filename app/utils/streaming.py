@@ -0,0 +1,161 @@
+"""
+Helpers for handling request bodies as streams instead of spooled files
+"""
+
+import hashlib
+from werkzeug.sansio.multipart import Epilogue, Field, File, MultipartDecoder, NeedData
+
+# Bytes read from the request body per iteration
+READ_CHUNK_SIZE = 64 * 1024
+
+# Largest non-file form field accepted in a streamed multipart body
+MAX_FIELD_SIZE = 64 * 1024
+
+class UploadTooLarge(Exception):
+    """Raised while streaming once an upload exceeds its size limit"""
+
+class ChecksumMismatch(ValueError):
+    """Raised at the end of a stream whose SHA-256 differs from the one announced"""
+
+class StreamedFile:
+    """
+    A file part of a multipart request body, read straight from the socket.
+
+    Chunks must be consumed before moving on to the next part; whatever is
+    left unread is skipped when the next part is requested.
+    """
+
+    def __init__(self, name, filename, content_type, events):
+        self.name = name
+        self.filename = filename
+        self.content_type = content_type
+        self._events = events
+        self._done = False
+
+    def iter_chunks(self):
+        """Yield the file's bytes as they arrive"""
+        while not self._done:
+            event = next(self._events, None)
+            if event is None:
+                raise ValueError('Request body ended in the middle of a file')
+            if not event.more_data:
+                self._done = True
+            if event.data:
+                yield event.data
+
+    def drain(self):
+        """Skip whatever is left of this part"""
+        for _ in self.iter_chunks():
+            pass
+
+def _iter_multipart_events(stream, boundary):
+    """Feed the request body to a multipart decoder and yield its events"""
+    decoder = MultipartDecoder(boundary)
+    while True:
+        data = stream.read(READ_CHUNK_SIZE)
+        decoder.receive_data(data or None)
+        event = decoder.next_event()
+        while not isinstance(event, (Epilogue, NeedData)):
+            yield event
+            event = decoder.next_event()
+        if not data or isinstance(event, Epilogue):
+            return
+
+def iter_streamed_files(request, form=None):
+    """
+    Yield the file parts of a multipart/form-data request without spooling them.
+
+    Regular form fields met along the way are decoded into ``form`` if given.
+    ``request.files`` and ``request.form`` must not be touched beforehand,
+    since they consume the body.
+    """
+    boundary = request.mimetype_params.get('boundary')
+    if request.mimetype != 'multipart/form-data' or not boundary:
+        return
+
+    events = _iter_multipart_events(request.stream, boundary.encode())
+    for event in events:
+        if isinstance(event, File):
+            upload = StreamedFile(
+                event.name,
+                event.filename,
+                event.headers.get('Content-Type', 'application/octet-stream'),
+                events
+            )
+            yield upload
+            upload.drain()
+        elif isinstance(event, Field):
+            value = bytearray()
+            for data in events:
+                value.extend(data.data)
+                if len(value) > MAX_FIELD_SIZE:
+                    raise UploadTooLarge(f'Form field {event.name} is too large')
+                if not data.more_data:
+                    break
+            if form is not None:
+                form[event.name] = value.decode('utf-8', 'replace')
+
+def get_streamed_file(request, field='file'):
+    """Return the first streamed file part with the given field name, or None"""
+    for upload in iter_streamed_files(request):
+        if upload.name == field:
+            return upload
+    return None
+
+class HashingReader:
+    """
+    File-like wrapper over a chunk iterator.
+
+    Computes the SHA-256 and size of everything read and raises
+    UploadTooLarge as soon as the size limit is crossed, so limits and
+    checksums need no second pass over the data. If ``expected_sha256`` is
+    given, reaching the end of a stream with a different digest raises
+    ChecksumMismatch, before the consumer sees end of file.
+    """
+
+    def __init__(self, chunks, max_size=None, expected_sha256=None):
+        self._chunks = iter(chunks)
+        self._buffer = bytearray()
+        self._hash = hashlib.sha256()
+        self.max_size = max_size
+        self.expected_sha256 = expected_sha256
+        self.size = 0
+        self.exhausted = False
+
+    @property
+    def sha256(self):
+        """Hex digest of the bytes read so far"""
+        return self._hash.hexdigest()
+
+    def _fill(self, size):
+        while size is None or size < 0 or len(self._buffer) < size:
+            try:
+                chunk = next(self._chunks)
+            except StopIteration:
+                self.exhausted = True
+                if self.expected_sha256 and self.sha256 != self.expected_sha256:
+                    raise ChecksumMismatch('Uploaded content does not match the announced SHA-256')
+                break
+            self.size += len(chunk)
+            if self.max_size is not None and self.size > self.max_size:
+                raise UploadTooLarge(f'Upload exceeds the {self.max_size} byte limit')
+            self._hash.update(chunk)
+            self._buffer.extend(chunk)
+
+    def prefetch(self, size):
+        """
+        Buffer up to ``size`` bytes without consuming them.
+
+        Returns True if the whole stream fit, in which case ``size`` and
+        ``sha256`` are already final.
+        """
+        self._fill(size + 1)
+        return self.exhausted
+
+    def read(self, size=-1):
+        self._fill(size)
+        if size is None or size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
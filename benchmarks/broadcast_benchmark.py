@@ -0,0 +1,68 @@
+"""
+Broadcast benchmark against a local SMTP sink.
+
+Compares calling send_email once per recipient (a new connection each time)
+with run_broadcast (pooled connections, body rendered once).
+
+Usage:
+    python benchmarks/broadcast_benchmark.py --students 2000 --connect-delay 0.02
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import TestingConfig
+from benchmarks.smtp_sink import SMTPSink
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--naive', type=int, default=200, help='Messages to send one connection at a time')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--connect-delay', type=float, default=0.02, help='Simulated handshake + login seconds')
+    args = parser.parse_args()
+
+    sink = SMTPSink(connect_delay=args.connect_delay).start()
+
+    TestingConfig.SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    from app import create_app, db
+    from app.models.student import Student
+    from app.services.broadcast_service import create_broadcast, run_broadcast
+    from app.services.email_service import send_email
+
+    app = create_app('testing')
+    app.config.update(SMTP_HOST='127.0.0.1', SMTP_PORT=sink.port, SMTP_USE_TLS=False, SMTP_USER='')
+
+    with app.app_context():
+        db.create_all()
+        db.session.bulk_insert_mappings(Student, [
+            {'name': f'Student {i}', 'roll_no': f'R{i:06d}', 'email': f'student{i}@example.com',
+             'password_hash': '-', 'year': 1 + i % 4}
+            for i in range(args.students)
+        ])
+        db.session.commit()
+
+        start = time.perf_counter()
+        for i in range(args.naive):
+            send_email(f'student{i}@example.com', 'Deadline reminder', 'broadcast.html',
+                       message='Submissions close on Friday.')
+        naive = time.perf_counter() - start
+        print(f'send_email loop: {args.naive} messages in {naive:.2f}s '
+              f'({args.naive / naive:.0f} msg/s)')
+
+        campaign = create_broadcast('all_students', 'Deadline reminder', 'Submissions close on Friday.')
+        start = time.perf_counter()
+        run_broadcast(campaign, concurrency=args.concurrency, rate_limit=0)
+        pooled = time.perf_counter() - start
+        print(f'run_broadcast:   {campaign.sent_count} messages in {pooled:.2f}s '
+              f'({campaign.sent_count / pooled:.0f} msg/s, {args.concurrency} connections, '
+              f'{campaign.failed_count} failed)')
+
+    sink.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Email template rendering benchmark.
+
+Renders each notification template (HTML plus the derived plain-text part)
+repeatedly from the cached environment, then builds complete MIME messages.
+No app or request context is needed.
+
+Usage:
+    python benchmarks/email_template_benchmark.py --messages 5000
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.email_service import build_email_message, precompile_email_templates, render_email
+
+TEMPLATES = {
+    'team_invitation.html': {'team_name': 'Circuit Breakers', 'inviter_name': 'Asha Rao',
+                             'message': 'You have been invited.'},
+    'mentor_request.html': {'team_name': 'Circuit Breakers', 'team_message': 'We are building\nan IoT soil sensor.',
+                            'message': 'Mentorship requested.'},
+    'request_response.html': {'team_name': 'Circuit Breakers', 'status': 'accepted', 'responder_name': 'Dr. Mehta',
+                              'message': 'Request accepted.'},
+    'meeting_notification.html': {'meeting_title': 'Design review', 'team_name': 'Circuit Breakers',
+                                  'scheduled_date': datetime(2025, 3, 14, 15, 0), 'message': 'Meeting scheduled.'},
+    'digest.html': {'sections': [{'title': 'Mentorship requests', 'count': 10,
+                                  'items': [{'message': f'Team {i} requested your mentorship', 'subject': ''}
+                                            for i in range(10)]}]},
+}
+
+def rate(count, elapsed):
+    return f'{count / elapsed:,.0f}/s'
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=5000, help='Messages per template')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    precompile_email_templates()
+    print(f'compile all templates: {(time.perf_counter() - start) * 1000:.1f}ms (once per process)')
+
+    for template, context in TEMPLATES.items():
+        start = time.perf_counter()
+        for _ in range(args.messages):
+            render_email('Subject', template, **context)
+        rendered = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(args.messages):
+            build_email_message(f'user{i}@example.com', 'Subject', template, 'noreply@wisepair.com',
+                                **context).as_bytes()
+        built = time.perf_counter() - start
+
+        print(f'{template:28} render html+text {rate(args.messages, rendered):>10}   '
+              f'full MIME message {rate(args.messages, built):>10}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+Model serializer benchmark.
+
+For each model's default response (teams with their members, the
+leaderboard with team names, ...) at each row count, measures:
+
+- reference: a field-by-field getattr/isoformat() dict per row, the way the
+  hand-written to_dict() methods worked
+- compiled: the generated serializer, dates as ISO strings (stdlib JSON)
+- native: the generated serializer leaving datetimes to orjson
+- the JSON encoding of the result with the standard library and orjson
+
+Rows are loaded from an in-memory SQLite database first; only serializing
+and encoding are timed.
+
+Usage:
+    python benchmarks/serializer_benchmark.py --rows 1000 10000 100000
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def rate(count, elapsed):
+    return f'{count / elapsed:,.0f}/s'
+
+def timed(func):
+    """Result and duration of func(), without garbage collection pauses"""
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        result = func()
+        return result, time.perf_counter() - start
+    finally:
+        gc.enable()
+
+def reference_dump(selection, obj):
+    """Serialize like the hand-written to_dict() methods: getattr and isoformat() per field"""
+    serializer = selection.serializer
+    data = {}
+    for name in selection.fields:
+        field = serializer.computed.get(name)
+        value = field.get(obj) if field is not None else getattr(obj, name)
+        data[name] = value.isoformat() if isinstance(value, datetime) else value
+    for name, nested in selection.embeds.items():
+        related = getattr(obj, serializer.embeds[name].relationship)
+        if isinstance(related, list):
+            data[name] = [reference_dump(nested, item) for item in related]
+        else:
+            data[name] = reference_dump(nested, related) if related is not None else None
+    return data
+
+def seed(db, models, count):
+    """``count`` rows of every model, linked the way a real cohort is"""
+    Student, Team, Professor, Mentor, Leaderboard, Meeting, Idea = models
+    now = datetime(2025, 3, 14, 15, 0, 0, 123456)
+    stamps = {'created_at': now, 'updated_at': now}
+    ids = range(1, count + 1)
+    db.session.execute(db.insert(Professor), [
+        dict(stamps, id=i, name=f'Professor {i}', email=f'p{i}@example.com', department='Computer Science',
+             expertise='distributed systems', accepted_team_count=i % 4) for i in ids
+    ])
+    db.session.execute(db.insert(Mentor), [
+        dict(stamps, id=i, name=f'Mentor {i}', email=f'm{i}@example.com', year=4) for i in ids
+    ])
+    db.session.execute(db.insert(Student), [
+        dict(stamps, id=i, name=f'Student {i}', roll_no=f'R{i:07d}', email=f's{i}@example.com', password_hash='x',
+             year=2, team_id=(i - 1) // 4 + 1) for i in ids
+    ])
+    db.session.execute(db.insert(Team), [
+        dict(stamps, id=i, name=f'Team {i}', is_locked=False, leader_id=i,
+             professor_id=i, senior_mentor_id=i) for i in ids
+    ])
+    db.session.execute(db.insert(Leaderboard), [
+        dict(stamps, id=i, team_id=i, meetings_done=i % 7, tasks_done=i % 5, mentor_feedback_count=i % 3,
+             total_score=i % 15) for i in ids
+    ])
+    db.session.execute(db.insert(Meeting), [
+        dict(stamps, id=i, title=f'Review {i}', description='Progress review', status='scheduled',
+             scheduled_date=now + timedelta(days=i % 30), team_id=i, professor_id=i) for i in ids
+    ])
+    db.session.execute(db.insert(Idea), [
+        dict(stamps, id=i, title=f'Idea {i}', description='A soil moisture sensor network for small farms',
+             problem_statement='Irrigation is guesswork', team_id=i) for i in ids
+    ])
+    db.session.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000], help='Row counts to measure')
+    args = parser.parse_args()
+
+    from app.config import TestingConfig
+    TestingConfig.SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    from app import create_app, db
+    from app.models import Idea, Leaderboard, Meeting, Mentor, Professor, Student, Team
+    from app.schemas.serializers import (
+        idea_serializer, leaderboard_serializer, meeting_serializer, mentor_serializer, professor_serializer,
+        student_serializer, team_serializer
+    )
+
+    app = create_app('testing')
+    benchmarks = [
+        ('student', Student, student_serializer.select()),
+        ('team (+members)', Team, team_serializer.select()),
+        ('professor', Professor, professor_serializer.select()),
+        ('mentor', Mentor, mentor_serializer.select()),
+        ('leaderboard', Leaderboard, leaderboard_serializer.select()),
+        ('meeting', Meeting, meeting_serializer.select()),
+        ('idea', Idea, idea_serializer.select(default_embeds=[])),
+    ]
+    print(f"orjson: {'yes' if orjson else 'not installed'}")
+
+    for count in args.rows:
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            _, elapsed = timed(lambda: seed(db, (Student, Team, Professor, Mentor, Leaderboard, Meeting, Idea), count))
+            print(f'\n{count:,} rows per model (seeded in {elapsed:.1f}s)')
+            print(f"{'model':18}{'reference':>14}{'compiled':>14}{'native':>14}{'stdlib json':>14}{'orjson':>14}")
+
+            for name, model, selection in benchmarks:
+                objects = model.query.options(*selection.options()).all()
+                compiled, native = selection.function(), selection.function(native=True)
+                for obj in objects[:100]:
+                    reference_dump(selection, obj), compiled(obj), native(obj)
+
+                reference_rows, reference = timed(lambda: [reference_dump(selection, obj) for obj in objects])
+                rows, compiled_time = timed(lambda: [compiled(obj) for obj in objects])
+                native_rows, native_time = timed(lambda: [native(obj) for obj in objects])
+                assert rows == reference_rows
+                _, stdlib_time = timed(lambda: json.dumps(rows, separators=(',', ':'), sort_keys=True))
+                orjson_time = timed(lambda: orjson.dumps(native_rows, option=orjson.OPT_SORT_KEYS))[1] if orjson else None
+
+                print(f'{name:18}{rate(count, reference):>14}{rate(count, compiled_time):>14}'
+                      f'{rate(count, native_time):>14}{rate(count, stdlib_time):>14}'
+                      f"{rate(count, orjson_time) if orjson_time else '-':>14}")
+            db.session.remove()
+
+if __name__ == '__main__':
+    main()
@@ -22,5 +22,6 @@ setup(
         "pytest==7.4.3",
         "alembic==1.13.1",
         "Pillow==10.1.0",
+        "numpy==1.26.4",
     ],
 ) 
\ No newline at end of file